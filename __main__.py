@@ -20,75 +20,66 @@ __maintainer__ = skj_std.__maintainer__
 #
 #                                                         CORE (START)
 #
-from skj_parser_cmdline import parse_args
-try:  # Firs of all, parse command line args, all later decisions are based on them
-    parse_args()
-except IOError as exception_msg:
-    skj_std.exit_with_failure(exception_msg, "CLINE_ARG_PARSE")
-
-
-from skj_checker_common import check_command_exists
-try:  # Check dependencies, they are required
-    check_command_exists(["gnuplot", "-V"], False)
-    check_command_exists(["ffmpeg", "-version"], False)
-except OSError as exception_msg:
-    skj_std.exit_with_failure(exception_msg, "REQ_CMD_MISS")
-
-
-try:  # Try to create temporary directories, they are mandatory for the script to continue
-    skj_std.create_temp_files()
-except ValueError as exception_msg:
-    skj_std.exit_with_failure(exception_msg, "TEMP_DIR_CREATE")
-
-
-try:  # Do we have a valid config file? Then parse it too
-    if skj_std.arguments_values['config'] != skj_std.arguments_defaults['config']:
-        from skj_parser_cnffile import parse_directives
-        parse_directives()
-except IOError as exception_msg:
-    skj_std.exit_with_failure(exception_msg, "CNF_DIR_PARSE")
-
-
-from skj_checker_common import check_parsed_args
-try:  # If we have alived the user input so far, now do some REAL user input checks
-    check_parsed_args()
-except (OSError, IOError, ValueError) as exception_msg:
-    skj_std.exit_with_failure(exception_msg, "ARGS_ERR_CHECK")
-
-
-from skj_subprocess_gnuplot import set_file_properties
-try:  # Convert simple list of file names to more complex structures containing file properties
-    for source_file in list(skj_std.arguments_values['source']):
-        file_properties = set_file_properties(source_file)
-        skj_std.arguments_values['source'].pop(0)
-        if file_properties != None: # This filters files with only whitespaces
-            skj_std.arguments_values['source'].append(file_properties)
-    if not skj_std.arguments_values['source']:
-        raise ValueError(skj_std.create_error_msg("NO_SOURCE", skj_std.arguments_values['source'], False))
-except ValueError as exception_msg:
-    skj_std.exit_with_failure(exception_msg, "SET_FILE_PROPERTIES")
-
-
-from skj_animation import set_animation_properties
-try: # set animation properties (S/F/T, adding seq for each file, num of frames for each file, etc)
-    set_animation_properties()
-except (ValueError, IndexError, TypeError, ArithmeticError) as exception_msg:
-    skj_std.exit_with_failure(exception_msg, "SET_ANIM_PROPERTIES")
-
-
-from skj_subprocess_gnuplot import draw_animation_frames
-try: # Do not forget that this deletes the whole adding_seq for each file if type multiplot ...
-    draw_animation_frames() # ... but that is okay, it will no longer be needed
-except (IndexError, ValueError) as exception_msg:
-    skj_std.exit_with_failure(exception_msg, "DRAW_ANIM_FRAMES")
-
-from skj_animation import create_animation
-try:
-    create_animation()
-except OSError as exception_msg:
-    skj_std.exit_with_failure(exception_msg, "CREATE_ANIM")
-
-skj_std.exit_with_success()
+def main():
+    ''' Create the animation (or run the batch, daemon or client) described by the command line. Processes
+        scanning sources import this file again (see multiprocessing), so nothing may run on import.
+        status: finished
+        return: None
+        raise: SystemExit
+    '''
+    from skj_profile import get_mark, start_profile, profile_stage
+    started = get_mark()
+
+    from skj_parser_cmdline import parse_args
+    try:  # Firs of all, parse command line args, all later decisions are based on them
+        parse_args()
+    except IOError as exception_msg:
+        skj_std.exit_with_failure(exception_msg, "CLINE_ARG_PARSE")
+
+    if skj_std.arguments_values['connect'] != None:
+        from sys import argv
+        from skj_daemon import run_client
+        try:  # Daemon does all the work, it prints directly to our stdout && stderr
+            exit(run_client(argv[1:]))
+        except OSError as exception_msg:
+            skj_std.exit_with_failure(exception_msg, "DAEMON")
+    start_profile(started) # Nothing is measured without --profile
+
+    from skj_checker_common import check_command_exists
+    try:  # Check dependencies, they are required (gnuplot is checked by every job, raster renderer does not need it)
+        with profile_stage("check_command_exists"):
+            if skj_std.arguments_values['daemon'] != None: # Its warm gnuplots are started right away
+                check_command_exists(["gnuplot", "-V"], False)
+            check_command_exists(["ffmpeg", "-version"], False)
+    except OSError as exception_msg:
+        skj_std.exit_with_failure(exception_msg, "REQ_CMD_MISS")
+
+    if skj_std.arguments_values['batch'] != None:
+        from skj_batch import run_batch
+        try:  # Every job gets the same stages as a single animation, but its frames are drawn by a shared pool
+            exit(run_batch())
+        except IOError as exception_msg:
+            skj_std.exit_with_failure(exception_msg, "CNF_DIR_PARSE")
+
+    if skj_std.arguments_values['daemon'] != None:
+        from skj_daemon import run_daemon
+        try:  # Serve jobs until terminated
+            run_daemon()
+        except OSError as exception_msg:
+            skj_std.exit_with_failure(exception_msg, "DAEMON")
+        skj_std.exit_with_success()
+
+    from skj_job import JobError, run_job
+    try:  # The animation is a job of the command line, run in-process just like any other job, see skj_job
+        run_job(skj_std.get_job())
+    except JobError as exception_msg: # Job has been closed already
+        print(exception_msg)
+        exit(skj_std.exit_codes[exception_msg.exit_code])
+    exit(skj_std.exit_codes["SUCCESS"])
+
+
+if __name__ == "__main__":
+    main()
 
 #
 #                                                         CORE (END)
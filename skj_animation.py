@@ -13,6 +13,9 @@ __license__ = skj_std.__license__
 __year__ = skj_std.__year__
 __maintainer__ = skj_std.__maintainer__
 
+encoding_gop = 250 # Frames between keyframes (x264 default), chunks encoded in parallel are multiples of it
+
+
 def get_anim_records():
     ''' Return number of lines for every source file 
         status: finished
@@ -22,38 +25,74 @@ def get_anim_records():
     for source_file in skj_std.arguments_values['source']:
         yield source_file["num_of_lines"]
 
-def create_speed_seq(file_, int_, frac_):
-    ''' Create int sequence where each number represents count of lines to be added to gnuplot input  
+class FrameSchedule(object):
+    ''' Records of one file added to gnuplot input in every frame, computed on demand instead of stored in list.
+        After frame k there are min(records, floor((k + 1) * speed)) records plotted, speed is an exact fraction
         status: finished
-        return: list
-        raise: None
     '''
-    from math import modf
+    def __init__(self, records_, speed_):
+        from fractions import Fraction
+        speed = Fraction(speed_).limit_denominator(1000000) # Turn 5.76 (float) back to 144/25
+        self.records = records_
+        self.numerator = speed.numerator
+        self.denominator = speed.denominator
+        self.frames = -(-records_ * self.denominator // self.numerator) # ceil(records / speed)
 
-    file_seq = list()
-    frac_reminder = 0
+    def __len__(self):
+        return self.frames
 
-    if frac_ == 0: # If the speed is integer, we could just return the quotient and reminder and not whole list...
-        file_seq = [int_ for i in range(0, int(file_['num_of_lines'] / int_))]
-        if file_['num_of_lines'] % int_ != 0: # ... which would save some time && memory
-            file_seq.append(file_['num_of_lines'] % int_)
-    else:
-        while sum(file_seq) != file_['num_of_lines']:
-            to_append = int_
-            frac_reminder += frac_
+    def __getitem__(self, frame_):
+        ''' Number of records added in frame_ '''
+        if frame_ < 0:
+            frame_ += self.frames
+        if not 0 <= frame_ < self.frames:
+            raise IndexError("frame index out of range")
+        return self.plotted(frame_) - self.plotted(frame_ - 1)
+
+    def __iter__(self):
+        for frame in range(0, self.frames):
+            yield self[frame]
 
-            if frac_reminder >= 1:
-                frac_reminder_frac  = modf(frac_reminder)[0]
-                frac_reminder_natur = modf(frac_reminder)[1]
-                frac_reminder -= frac_reminder_natur
-                to_append += int(frac_reminder_natur)
+    def plotted(self, frame_):
+        ''' Number of records plotted after frame_ (0 before the first frame) '''
+        if frame_ < 0:
+            return 0
+        return min(self.records, (frame_ + 1) * self.numerator // self.denominator)
 
-            if sum(file_seq) + to_append <= file_['num_of_lines']:
-                file_seq.append(to_append)
-            else:
-                file_seq.append(file_['num_of_lines'] - sum(file_seq))
+    def plotted_sum(self, frames_):
+        ''' Sum of plotted(k) for first frames_ frames, it is proportional to the cost of drawing them.
+            All but the last frame are below the records limit, so it is a floor sum computed in O(log).
+        '''
+        frames = max(0, min(frames_, self.frames - 1))
+        plotted_sum = self.records if frames_ >= self.frames else 0
 
-    return file_seq
+        # sum(floor((a * i + b) / m) for i in range(n)), see eg. AtCoder Library floor_sum
+        n, m, a, b = frames, self.denominator, self.numerator, self.numerator
+        while n > 0:
+            if a >= m:
+                plotted_sum += n * (n - 1) // 2 * (a // m)
+                a %= m
+            if b >= m:
+                plotted_sum += n * (b // m)
+                b %= m
+            y_max = a * n + b
+            if y_max < m:
+                break
+            n, b, m, a = y_max // m, y_max % m, a, m
+
+        return plotted_sum
+
+
+def create_speed_seq(file_, speed_):
+    ''' Create sequence where each number represents count of lines to be added to gnuplot input
+        status: finished
+        return: FrameSchedule
+        raise: TypeError
+    '''
+    try:
+        return FrameSchedule(file_['num_of_lines'], speed_)
+    except (TypeError, ValueError, ZeroDivisionError) as exception_msg:
+        raise TypeError(skj_std.create_error_msg("INTERNAL", exception_msg))
 
 
 def determine_anim_type():
@@ -162,12 +201,15 @@ def calculate_sfft():
     skj_std.arguments_values['frames'] = ceil(skj_std.arguments_values['records'] / skj_std.arguments_values['speed'])
 
 
-def set_animation_properties():
+def set_animation_properties(job_=None):
     ''' Set properties of animation like speed, time, num of frames, num of records, type, etc
         status: finished
         return: None
         raise: TypeError, IndexError, ValueError
     '''
+    if job_ != None: # Run in job_ (in-process API, see skj_job), otherwise in the current job
+        return job_.run(set_animation_properties)
+
     # Get animation type
     skj_std.arguments_values['animation_type'] = determine_anim_type() # raise IndexError
 
@@ -200,54 +242,215 @@ def set_animation_properties():
                             str(skj_std.arguments_values['speed']) + "/" + str(skj_std.arguments_values['fps'])))
 
     # Create sequence of records added to every created frame
-    from math import modf
-    try: # Divide the speed on it's integer and fractional parts
-        speed_fraction = modf(skj_std.arguments_values['speed'])[0]
-        speed_integer = int(modf(skj_std.arguments_values['speed'])[1])
-    except TypeError as exception_msg:
-        raise TypeError(skj_std.create_error_msg("INTERNAL", exception_msg))
     for source_file in skj_std.arguments_values['source']: # Add the sequence to each file's properties
-        source_file['adding_seq'] = create_speed_seq(file_=source_file, int_=speed_integer, frac_=speed_fraction)
+        source_file['adding_seq'] = create_speed_seq(file_=source_file, speed_=skj_std.arguments_values['speed'])
+
+    # Frames are drawn file after file in oneline animation and for all files at once in multiplot
+    if skj_std.arguments_values['animation_type'] == "oneline":
+        skj_std.arguments_values['frames'] = sum(len(f['adding_seq']) for f in skj_std.arguments_values['source'])
+    else:
+        skj_std.arguments_values['frames'] = max(len(f['adding_seq']) for f in skj_std.arguments_values['source'])
 
 
-def create_animation():
-    ''' Finally, call ffmpeg and let it do it's magic
+def create_output_dir():
+    ''' Create directory the animation is stored to, it is named after the animation
         status: finished
-        return: None
+        return: str
         raise: OSError
     '''
     import os
-    import subprocess
     from sys import argv
 
+    if skj_std.arguments_values.get('output') != None: # Already created (eg. in advance by batch, see skj_batch)
+        return skj_std.arguments_values['output']
+
     if skj_std.arguments_values['name'] == skj_std.arguments_defaults['name']:
         skj_std.arguments_values['name'] = os.path.split(argv[0])[1]
-    output = os.path.join(os.getcwd(), skj_std.arguments_values['name']) # Output directory
+    output = skj_std.get_job_path(skj_std.arguments_values['name']) # Output directory
 
-    if os.path.isdir(output):
-        i = 0 # If the dir already exists ...
-        output = output + '_' + str(i)
-        while os.path.isdir(output):
+    i = -1
+    while True:
+        try:
+            os.makedirs(output) # If we do not have write/execute in working directory of the job...
+            break
+        except FileExistsError: # If the dir already exists (even created by concurrent job just now) ...
             i += 1 # ... try output_i where i = max(i,0) + 1
-            output = output[:output.rfind('_')] + '_' + str(i)
+            output = (output[:output.rfind('_')] if i > 0 else output) + '_' + str(i)
+        except OSError as exception_msg:
+            if skj_std.arguments_values['ignoreerrors']:
+                skj_std.print_msg_verbose(err_=skj_std.create_error_msg("OUTPUT_DIR_CREATE", output))
+                output = skj_std.temp_directories['root'] # ... move output to temp dir we already have ...
+                break
+            else: # ... or die!
+                raise OSError(skj_std.create_error_msg("OUTPUT_DIR_CREATE", output))
+
+    skj_std.arguments_values['output'] = output # Where the job has stored its animation, see skj_job
+    return output
 
-    try:
-        os.makedirs(output) # If we do not have write/execute in os.getcwd()...
-    except OSError as exception_msg:
-        if skj_std.arguments_values['ignoreerrors']:
-            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("OUTPUT_DIR_CREATE", output))
-            output = skj_std.temp_directories['root'] # ... move output to temp dir we already have ...
-        else: # ... or die!
-            raise OSError(skj_std.create_error_msg("OUTPUT_DIR_CREATE", output))
 
+def get_animation_file():
+    ''' Get the file animation is stored to, it is in a new output dir
+        status: finished
+        return: str
+        raise: OSError
+    '''
+    import os
+
+    output = create_output_dir() # raise OSError
     filetype = ".mp4"
+    return os.path.join(output, skj_std.arguments_values['name'].split('/')[-1]) + filetype
+
+
+def create_ffmpeg_command(input_, output_=None):
+    ''' Create ffmpeg command reading frames using input_ options and storing animation to output_
+        (output dir by default)
+        status: finished
+        return: list
+        raise: OSError
+    '''
+    if output_ == None:
+        output_ = get_animation_file() # raise OSError
     codec  = "libx264"
-    ffmpeg = ["ffmpeg", "-f", "image2", "-r", str(skj_std.arguments_values['fps']), "-i", \
-              os.path.join(skj_std.temp_directories['gnuplot'], "g_%0" + \
-              str(len(str(skj_std.arguments_values['frames']))) + "d.png"),
-              "-c:v", codec, "-r", str(skj_std.arguments_values['fps']), \
-               os.path.join(output, skj_std.arguments_values['name'].split('/')[-1]) + filetype]
+    return ["ffmpeg"] + input_ + ["-c:v", codec, "-r", str(skj_std.arguments_values['fps']), output_]
+
+
+def start_animation_encoder(job_=None):
+    ''' Start ffmpeg reading frames from it's stdin (png from gnuplot, raw RGB from raster renderer),
+        so they can be encoded while they are drawn
+        status: finished
+        return: subprocess.Popen
+        raise: OSError
+    '''
+    import subprocess
+
+    if job_ != None: # Run in job_ (in-process API, see skj_job), otherwise in the current job
+        return job_.run(start_animation_encoder)
+
+    if skj_std.arguments_values['renderer'] == "raster": # Raw RGB frames
+        from skj_subprocess_gnuplot import get_frame_size
+        ffmpeg = create_ffmpeg_command(["-f", "rawvideo", "-pix_fmt", "rgb24", "-s", "%dx%d" % get_frame_size(), \
+                                        "-r", str(skj_std.arguments_values['fps']), "-i", "-"]) # raise OSError
+    else:
+        ffmpeg = create_ffmpeg_command(["-f", "image2pipe", "-c:v", "png", "-r", \
+                                        str(skj_std.arguments_values['fps']), "-i", "-"]) # raise OSError
+    try:
+        return subprocess.Popen(ffmpeg, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, \
+                                cwd=skj_std.get_job().cwd)
+    except (OSError, ValueError) as exception_msg:
+        raise OSError(skj_std.create_error_msg("PYTHON", exception_msg))
+
+
+def create_animation(encoder_=None, job_=None):
+    ''' Finally, call ffmpeg and let it do it's magic. If encoder_ is running, just wait for it to finish
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    import os
+    import subprocess
+    from skj_progress import start_progress, update_progress, end_progress
+
+    if job_ != None: # Run in job_ (in-process API, see skj_job), otherwise in the current job
+        return job_.run(create_animation, encoder_)
+
+    if encoder_ != None:
+        encoder_.stdin.close() # No more frames for ffmpeg
+        if encoder_.wait() != 0:
+            raise OSError(skj_std.create_error_msg("PYTHON", subprocess.CalledProcessError(encoder_.returncode, \
+                                                                                          encoder_.args)))
+        return
+
+    frames = os.path.join(skj_std.temp_directories['gnuplot'], "g_%0" + \
+                          str(len(str(skj_std.arguments_values['frames']))) + "d.png")
+    start_progress("encode", skj_std.arguments_values['frames'])
     try:
-        subprocess.check_call(ffmpeg, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    except subprocess.CalledProcessError as exception_msg:
-        raise OSError(skj_std.create_error_msg("PYTHON", exception_msg))
\ No newline at end of file
+        if skj_std.arguments_values['encodejobs'] > 1 and skj_std.arguments_values['frames'] > encoding_gop:
+            encode_animation_chunks(frames) # raise OSError
+        else:
+            run_ffmpeg(create_ffmpeg_command(["-f", "image2", "-r", str(skj_std.arguments_values['fps']), \
+                                              "-i", frames]), update_progress) # raise OSError
+    finally:
+        end_progress()
+
+
+def run_ffmpeg(ffmpeg_, frames_done_):
+    ''' Run ffmpeg_, with --progress it writes it's progress as key=value lines to stdout (-progress)
+        and frames_done_(done_=frames) is called for each report
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    import subprocess
+
+    if skj_std.arguments_values['progress'] == None:
+        try:
+            subprocess.check_call(ffmpeg_, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, \
+                                  cwd=skj_std.get_job().cwd)
+        except (subprocess.CalledProcessError, OSError) as exception_msg:
+            raise OSError(skj_std.create_error_msg("PYTHON", exception_msg))
+        return
+
+    try:
+        with subprocess.Popen(ffmpeg_[:1] + ["-nostats", "-progress", "pipe:1"] + ffmpeg_[1:], \
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=skj_std.get_job().cwd) as ffmpeg:
+            for line in ffmpeg.stdout:
+                if line.startswith(b"frame="):
+                    frames_done_(done_=int(line[len(b"frame="):]))
+    except (OSError, ValueError) as exception_msg:
+        raise OSError(skj_std.create_error_msg("PYTHON", exception_msg))
+
+    if ffmpeg.returncode != 0:
+        raise OSError(skj_std.create_error_msg("PYTHON", subprocess.CalledProcessError(ffmpeg.returncode, \
+                                                                                      ffmpeg.args)))
+
+
+def encode_animation_chunks(frames_):
+    ''' Encode frames_ (image2 pattern) in chunks by arguments_values['encodejobs'] ffmpegs at once,
+        then join the chunks without reencoding. Every chunk is a multiple of encoding_gop frames and
+        starts with a keyframe, so the animation has the same keyframes as if it was encoded at once.
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    from shutil import rmtree
+    from tempfile import mkdtemp
+    from skj_progress import update_progress
+
+    frames = skj_std.arguments_values['frames']
+    chunk = -(-frames // skj_std.arguments_values['encodejobs']) # ceil
+    chunk = -(-chunk // encoding_gop) * encoding_gop
+    chunks = [(first, min(first + chunk, frames)) for first in range(0, frames, chunk)]
+    done = [0] * len(chunks)
+
+    animation = get_animation_file() # raise OSError
+    try:
+        segments = mkdtemp(prefix="tmp__", suffix="__segments", dir=skj_std.temp_directories['root'])
+    except OSError as exception_msg:
+        raise OSError(skj_std.create_error_msg("PYTHON", exception_msg))
+
+    def encode_chunk_job(i_):
+        def frames_done(done_):
+            done[i_] = done_
+            update_progress(done_=sum(done))
+
+        first, last = chunks[i_]
+        run_ffmpeg(create_ffmpeg_command(["-f", "image2", "-r", str(skj_std.arguments_values['fps']), \
+                                          "-start_number", str(first), "-i", frames_, \
+                                          "-frames:v", str(last - first), "-g", str(encoding_gop)], \
+                                         os.path.join(segments, str(i_) + ".mp4")), frames_done)
+
+    try:
+        with ThreadPoolExecutor(max_workers=skj_std.arguments_values['encodejobs']) as executor:
+            jobs = [executor.submit(skj_std.bind_job(encode_chunk_job), i) for i in range(0, len(chunks))]
+            for job in jobs:
+                job.result() # raise OSError of the first failed chunk
+
+        with open(os.path.join(segments, "concat.txt"), mode="w", encoding="utf-8") as f:
+            for i in range(0, len(chunks)):
+                f.write("file '" + str(i) + ".mp4'\n") # Relative to the list
+        run_ffmpeg(["ffmpeg", "-f", "concat", "-i", os.path.join(segments, "concat.txt"), "-c", "copy", \
+                    animation], lambda done_: None) # raise OSError
+    finally:
+        rmtree(segments, ignore_errors=True)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+''' Create many animations described by batch manifest (--batch), drawing && encoding them by a shared pool '''
+
+# IMPORTS
+import skj_std
+
+# AUTHOR
+__author__ = skj_std.__author__
+__email__ = skj_std.__email__
+__status__ = skj_std.__status__
+__version__ = skj_std.__version__
+__license__ = skj_std.__license__
+__year__ = skj_std.__year__
+__maintainer__ = skj_std.__maintainer__
+
+#
+#                                                         MANIFEST (START)
+#
+
+
+def read_manifest(path_):
+    ''' Split manifest path_ into entries separated by empty lines, entries with only comments are skipped
+        status: finished
+        return: list of list
+        raise: IOError
+    '''
+    entries = [list()]
+    try:
+        with open(path_, mode="r", encoding="utf-8") as manifest:
+            for line in manifest:
+                if line.strip():
+                    entries[-1].append(line)
+                elif entries[-1]: # Entry has ended
+                    entries.append(list())
+    except (IOError, ValueError) as exception_msg:
+        raise IOError(skj_std.create_error_msg("PYTHON", exception_msg, False))
+
+    return [entry for entry in entries if any(line.partition('#')[0].strip() for line in entry)]
+
+#
+#                                                         MANIFEST (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         JOBS (START)
+#
+jobs = list() # Prepared jobs of the batch, inherited by the processes of the pool, see run_batch()
+
+
+def scan_batch_sources(scanned_):
+    ''' Scan sources of the current job which have not been scanned by the previous jobs, all of them are then
+        passed to set_files_properties() as already scanned (like downloaded sources are)
+        status: finished
+        return: None
+        raise: ValueError
+    '''
+    import os
+    from skj_subprocess_gnuplot import set_files_properties
+
+    time_format = skj_std.arguments_values['timeformat']
+    sources = [source for source in skj_std.arguments_values['source'] if source not in skj_std.downloaded_sources]
+    missing = list({(os.path.abspath(source), time_format): source for source in sources \
+                    if (os.path.abspath(source), time_format) not in scanned_}.values())
+    if missing:
+        for source, file_properties in zip(missing, set_files_properties(missing, time_format)): # raise ValueError
+            scanned_[(os.path.abspath(source), time_format)] = file_properties
+
+    for source in sources: # Records are shared by the jobs, they never change them
+        skj_std.downloaded_sources[source] = scanned_[(os.path.abspath(source), time_format)]
+
+
+def prepare_batch_job(number_, entry_, argv_, scanned_):
+    ''' Prepare job number_: parse argv_ with directives of manifest entry_ added, check them and describe
+        the animation (scanning only sources not in scanned_). Its output dir is created right now, so the jobs
+        get the same names as if they were created one by one.
+        status: finished
+        return: dict
+        raise: None
+    '''
+    from skj_parser_cmdline import parse_args
+    from skj_parser_cnffile import parse_directive_lines, add_directives_to_args
+    from skj_animation import create_output_dir
+    from skj_subprocess_gnuplot import get_frames_cost
+    from skj_job import JobError, prepare_job, describe_job
+
+    def add_entry_directives():
+        parse_args(argv_) # Batch itself has been parsed, so this can not fail
+        repeatable = skj_std.arguments_repeatable + ("source",)
+        add_directives_to_args(parse_directive_lines(entry_, repeatable), repeatable)
+
+    job = {"number": number_, "exit_code": None, "cost": 0, "job": skj_std.Job()}
+    try:
+        job["job"].run(add_entry_directives)
+    except (IOError, IndexError, TypeError, ValueError) as exception_msg:
+        print(skj_std.create_error_msg("PYTHON", exception_msg, False))
+        job["exit_code"] = skj_std.exit_codes["CNF_DIR_PARSE"]
+        return job
+
+    try:
+        prepare_job(job["job"])
+        try:
+            job["job"].run(scan_batch_sources, scanned_)
+        except ValueError as exception_msg:
+            raise JobError(exception_msg, "SET_FILE_PROPERTIES")
+        describe_job(job["job"])
+        try:
+            job["job"].run(create_output_dir)
+        except OSError as exception_msg:
+            raise JobError(exception_msg, "CREATE_ANIM")
+    except JobError as exception_msg:
+        print(exception_msg)
+        job["job"].close(exception_msg.exit_code)
+        job["exit_code"] = skj_std.exit_codes[exception_msg.exit_code]
+        return job
+
+    # Pool is the only parallelism, every job draws && encodes in one process
+    job["job"].arguments_values['jobs'] = job["job"].arguments_values['encodejobs'] = 1
+    job["cost"] = job["job"].run(get_frames_cost, job["job"].arguments_values['frames'])
+    return job
+
+
+def run_batch_job(number_):
+    ''' Draw && encode frames of prepared job number_, in a process of the pool
+        status: finished
+        return: (int, int)
+        raise: None
+    '''
+    import os
+    from skj_job import JobError, produce_job
+
+    job = jobs[number_]["job"]
+    try:
+        produce_job(job)
+    except JobError as exception_msg:
+        print(exception_msg)
+        job.close(exception_msg.exit_code)
+        try:
+            os.rmdir(job.arguments_values['output']) # Only if it is empty
+        except OSError:
+            pass
+        return number_, skj_std.exit_codes[exception_msg.exit_code]
+    job.close()
+    return number_, skj_std.exit_codes["SUCCESS"]
+
+
+def run_batch():
+    ''' Create animations of all entries of arguments_values['batch'] manifest. Every job gets the command line
+        arguments with directives of its entry added (just like config file directives). Jobs are prepared
+        one by one, every distinct source is scanned once. Then arguments_values['jobs'] processes draw && encode
+        them, jobs with the highest frames cost (see get_frames_cost()) are started first.
+        status: finished
+        return: int - exit code of the first failed job (SUCCESS if none has failed)
+        raise: IOError
+    '''
+    import sys
+    import multiprocessing
+
+    entries = read_manifest(skj_std.arguments_values['batch']) # raise IOError
+    scanned = dict() # Properties of sources scanned by the previous jobs, by path && time format
+
+    jobs[:] = [prepare_batch_job(number, entry, sys.argv[1:], scanned) for number, entry in enumerate(entries)]
+    scanned.clear()
+
+    order = [job["number"] for job in sorted(jobs, key=lambda job: job["cost"], reverse=True) \
+             if job["exit_code"] == None]
+    if order:
+        sys.stdout.flush() # Otherwise every process of the pool prints it again
+        sys.stderr.flush()
+        with multiprocessing.get_context("fork").Pool(min(max(1, skj_std.arguments_values['jobs']), len(order))) \
+             as pool:
+            for number, exit_code in pool.imap_unordered(run_batch_job, order, chunksize=1): # Keeps the order
+                jobs[number]["exit_code"] = exit_code
+
+    for job in jobs:
+        if job["exit_code"] != skj_std.exit_codes["SUCCESS"]:
+            print(skj_std.create_info_msg("job " + str(job["number"] + 1) + " has failed: " + str(job["exit_code"])))
+        else:
+            skj_std.print_msg_verbose(info_=skj_std.create_info_msg("job " + str(job["number"] + 1) + \
+                                                                    " created: " + \
+                                                                    job["job"].arguments_values['output']))
+    failed = [job["exit_code"] for job in jobs if job["exit_code"] != skj_std.exit_codes["SUCCESS"]]
+    return failed[0] if failed else skj_std.exit_codes["SUCCESS"]
+
+#
+#                                                         JOBS (END)
+#
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+''' Benchmark every stage of animation creation on synthetic data, results are written as JSON.
+    Run as: python skj_benchmark.py [-h] [options] '''
+
+# IMPORTS
+import skj_std
+
+# AUTHOR
+__author__ = skj_std.__author__
+__email__ = skj_std.__email__
+__status__ = skj_std.__status__
+__version__ = skj_std.__version__
+__license__ = skj_std.__license__
+__year__ = skj_std.__year__
+__maintainer__ = skj_std.__maintainer__
+
+#
+#                                                         SYNTHETIC DATA (START)
+#
+time_format = "[%Y/%m/%d %H:%M:%S]" # Same format as the files in examples/
+
+
+def generate_source(path_, lines_, start_, fractional_):
+    ''' Generate source file path_ with lines_ records one minute apart starting at start_ (epoch seconds).
+        Values are sine wave, fractional_ ones like examples/real, integer ones like examples/int.
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    from math import sin
+    from time import gmtime, strftime
+
+    with open(path_, mode="w", encoding="utf-8") as f:
+        for i in range(0, lines_):
+            value = sin(i / 100)
+            if fractional_:
+                value = repr(value)
+            else:
+                value = str(round(10 * value))
+            f.write(strftime(time_format, gmtime(start_ + i * 60)) + " " + value + "\n")
+
+
+def generate_sources(data_dir_, lines_, files_, type_, fractional_):
+    ''' Generate (or reuse already generated) files_ source files with lines_ records in total.
+        Oneline files follow each other in time, multiplot files all cover the same time.
+        status: finished
+        return: list of str
+        raise: OSError
+    '''
+    import os
+
+    case_dir = os.path.join(data_dir_, "_".join([str(lines_), str(files_), type_, \
+                                                 "real" if fractional_ else "int"]))
+    os.makedirs(case_dir, exist_ok=True)
+
+    start = 1241000000 # 2009/04/29, about when examples/ start
+    file_lines = max(1, lines_ // files_)
+    sources = list()
+    for i in range(0, files_):
+        source = os.path.join(case_dir, str(i) + ".data")
+        if not os.path.isfile(source):
+            generate_source(source + ".tmp", file_lines, start, fractional_)
+            os.replace(source + ".tmp", source) # Interrupted generation is never reused
+        if type_ == "oneline":
+            start += file_lines * 60
+        sources.append(source)
+
+    return sources
+
+#
+#                                                         SYNTHETIC DATA (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         STAGES (START)
+#
+
+
+def time_stage(stages_, stage_, function_, *args_):
+    ''' Run function_(*args_) and store it's wall && cpu time to stages_[stage_]
+        status: finished
+        return: anything function_ returns
+        raise: anything function_ raises
+    '''
+    from time import perf_counter, process_time
+
+    wall, cpu = perf_counter(), process_time()
+    result = function_(*args_)
+    stages_[stage_] = {"wall": perf_counter() - wall, "cpu": process_time() - cpu}
+    return result
+
+
+def create_null_gnuplot(directory_):
+    ''' Create gnuplot which just throws it's input away, so frame payload generation can be timed alone
+        status: finished
+        return: str - directory with the null gnuplot
+        raise: OSError
+    '''
+    import os
+
+    null_gnuplot = os.path.join(directory_, "gnuplot")
+    with open(null_gnuplot, mode="w") as f:
+        f.write("#!/bin/sh\nexec cat > /dev/null\n")
+    os.chmod(null_gnuplot, 0o755)
+
+    return directory_
+
+
+def run_case(sources_, speed_, arguments_, stages_, work_dir_, name_):
+    ''' Run all stages_ of animation creation with sources_ and speed_, the same way __main__ does. Animation is
+        named name_ (in work_dir_), it is deleted afterwards.
+        status: finished
+        return: dict - case properties && stage times
+        raise: OSError, ValueError, IndexError, TypeError, ArithmeticError
+    '''
+    import os
+    import sys
+    from shutil import rmtree, which
+
+    sys.argv = ["animator", "-t", time_format, "-S", str(speed_), "--no-cache", \
+                "-n", os.path.join(work_dir_, name_)] + arguments_ + sources_
+
+    from skj_parser_cmdline import parse_args
+    from skj_checker_common import check_parsed_args
+    parse_args()
+    skj_std.create_temp_files()
+    check_parsed_args()
+
+    from skj_subprocess_gnuplot import set_files_properties, draw_animation_frames
+    from skj_animation import set_animation_properties, create_animation
+    times = dict()
+
+    source = skj_std.arguments_values['source']
+    skj_std.arguments_values['source'] = [file_properties for file_properties in \
+                                          time_stage(times, "set_file_properties", set_files_properties, source) \
+                                          if file_properties != None]
+    time_stage(times, "set_animation_properties", set_animation_properties)
+    case = {"records": skj_std.arguments_values['records'], "frames": skj_std.arguments_values['frames'], \
+            "animation_type": skj_std.arguments_values['animation_type'], "stages": times}
+
+    arguments_values = dict(skj_std.arguments_values) # Drawing changes some values, every stage needs originals
+    if "payload" in stages_:
+        path = os.environ["PATH"]
+        os.environ["PATH"] = create_null_gnuplot(work_dir_) + os.pathsep + path
+        try:
+            time_stage(times, "payload", draw_animation_frames)
+        finally:
+            os.environ["PATH"] = path
+        if skj_std.arguments_values['workdir'] == None: # Render creates another temp dir for its frames
+            rmtree(skj_std.temp_directories["gnuplot"], ignore_errors=True)
+
+    if "render" in stages_:
+        times["render"] = None # Skipped
+        if which("gnuplot") != None:
+            skj_std.arguments_values.update(arguments_values)
+            time_stage(times, "render", draw_animation_frames)
+    if "encode" in stages_:
+        times["encode"] = None
+        if times.get("render") != None and which("ffmpeg") != None:
+            time_stage(times, "encode", create_animation)
+
+    if skj_std.arguments_values.get('output') != None: # Exactly the dir created by this case, see create_output_dir()
+        rmtree(skj_std.arguments_values['output'], ignore_errors=True)
+    skj_std.cleanup_temp_files()
+    return case
+
+#
+#                                                         STAGES (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         BENCHMARK (START)
+#
+
+
+def parse_benchmark_args():
+    ''' Parse benchmark command line arguments
+        status: finished
+        return: argparse.Namespace
+        raise: None
+    '''
+    import argparse
+
+    def int_list(value_):
+        return [int(float(value)) for value in value_.split(",")] # Allow 1e6
+
+    parser = argparse.ArgumentParser(description='''\
+Benchmark every stage of animation creation on synthetic data.
+Stages: set_file_properties, set_animation_properties, payload (frames sent to gnuplot which throws them away),
+render (real gnuplot) and encode (ffmpeg). Render && encode are skipped without gnuplot/ffmpeg.''',
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int_list, default=[1000, 10000, 100000],
+                        help='''Total numbers of records. (default: 1e3,1e4,1e5)''')
+    parser.add_argument('--files', type=int_list, default=[1, 10],
+                        help='''Numbers of source files the records are split into. (default: 1,10)''')
+    parser.add_argument('--types', type=lambda v: v.split(","), default=["oneline", "multiplot"],
+                        help='''Animation types. (default: oneline,multiplot)''')
+    parser.add_argument('--speeds', type=lambda v: v.split(","), default=["integer", "fractional"],
+                        help='''Integer and/or fractional speed. (default: integer,fractional)''')
+    parser.add_argument('--frames', type=int, default=100,
+                        help='''About how many frames every animation has, speed is set from it. (default: 100)''')
+    parser.add_argument('--stages', type=lambda v: v.split(","), default=["payload", "render", "encode"],
+                        help='''Drawing stages to run. (default: payload,render,encode)''')
+    parser.add_argument('--full', action='store_true', default=False,
+                        help='''Run all sizes: 1e3 ... 1e7 records in 1 ... 1000 files.''')
+    parser.add_argument('--args', type=str, default="",
+                        help='''Additional animator options, eg. "-j 4 --binary".''')
+    parser.add_argument('--data-dir', type=str, default=None,
+                        help='''Directory for generated data, reused between runs. (default: temp dir)''')
+    parser.add_argument('--output', type=str, default=None,
+                        help='''JSON results file. (default: stdout)''')
+
+    arguments = parser.parse_args()
+    if arguments.full:
+        arguments.lines = [1000, 10000, 100000, 1000000, 10000000]
+        arguments.files = [1, 10, 100, 1000]
+    return arguments
+
+
+def run_benchmark():
+    ''' Run benchmark of all cases and write the results
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    import json
+    import os
+    import platform
+    import shlex
+    import sys
+    from tempfile import mkdtemp
+    from time import gmtime, strftime
+
+    arguments = parse_benchmark_args()
+    work_dir = mkdtemp(prefix="tmp__", suffix="__benchmark")
+    data_dir = arguments.data_dir if arguments.data_dir != None else os.path.join(work_dir, "data")
+
+    results = {"version": __version__, "python": platform.python_version(), "platform": platform.platform(), \
+               "date": strftime("%Y-%m-%dT%H:%M:%SZ", gmtime()), "arguments": arguments.args, "cases": list()}
+    try:
+        for lines in arguments.lines:
+            for files in arguments.files:
+                for type_ in arguments.types:
+                    if type_ == "multiplot" and files == 1:
+                        continue # One file is always oneline
+                    for speed in arguments.speeds:
+                        sources = generate_sources(data_dir, lines, files, type_, speed == "fractional")
+                        records = lines if type_ == "oneline" else max(1, lines // files)
+                        case_speed = max(1, records // arguments.frames) + (0.37 if speed == "fractional" else 0)
+
+                        case = {"lines": lines, "files": files, "type": type_, "speed": case_speed}
+                        case.update(run_case(sources, case_speed, shlex.split(arguments.args), arguments.stages, \
+                                             work_dir, "animation_" + str(len(results["cases"]))))
+                        results["cases"].append(case)
+                        print(skj_std.create_info_msg(json.dumps(case)), file=sys.stderr)
+    finally: # Everything the run has created (animations, null gnuplot, generated data if not in --data-dir)
+        from shutil import rmtree
+        rmtree(work_dir, ignore_errors=True)
+
+    if arguments.output != None:
+        with open(arguments.output, mode="w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+#
+#                                                         BENCHMARK (END)
+#
+
+if __name__ == "__main__":
+    run_benchmark()
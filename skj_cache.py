@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+''' Persistent caches shared by all runs of the script '''
+
+# IMPORTS
+import skj_std
+
+# AUTHOR
+__author__ = skj_std.__author__
+__email__ = skj_std.__email__
+__status__ = skj_std.__status__
+__version__ = skj_std.__version__
+__license__ = skj_std.__license__
+__year__ = skj_std.__year__
+__maintainer__ = skj_std.__maintainer__
+
+#
+#                                                         CACHE DIRECTORY (START)
+#
+caches = ("properties", "frames", "downloads") # Directories of the caches, see get_cache_dir()
+
+
+def get_cache_dir(cache_="properties"):
+    ''' Get (and create) directory of cache_, it is inside arguments_values['cachedir'] or ~/.cache/animator
+        status: finished
+        return: str / None
+        raise: None
+    '''
+    import os
+
+    if skj_std.arguments_values['cachedir'] != skj_std.arguments_defaults['cachedir']:
+        cache_dir = skj_std.arguments_values['cachedir']
+    else:
+        cache_dir = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "animator")
+    cache_dir = os.path.join(cache_dir, cache_)
+
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    except OSError as exception_msg: # No cache is not a reason to stop
+        skj_std.print_msg_verbose(info_=skj_std.create_info_msg("cache disabled: " + str(exception_msg)))
+        return None
+
+    return cache_dir
+
+
+def write_cache_file(path_, data_):
+    ''' Write data_ into cache file path_. Data are written into a temp file which then replaces path_,
+        so other processes using the cache never see half written file.
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    import os
+    from tempfile import mkstemp
+
+    temp_file = mkstemp(dir=os.path.dirname(path_), prefix=".tmp__")
+    try:
+        with os.fdopen(temp_file[0], mode="wb") as f:
+            f.write(data_)
+        os.replace(temp_file[1], path_)
+    except OSError:
+        try:
+            os.remove(temp_file[1])
+        except OSError:
+            pass
+        raise
+
+
+def clear_cache(cache_=None):
+    ''' Delete all entries of cache_ (of all the caches by default). Only directories of the caches are deleted,
+        never the cache root itself: --cache-dir may point to a directory holding data of the user.
+        status: finished
+        return: None
+        raise: None
+    '''
+    from shutil import rmtree
+
+    for cache in (caches if cache_ == None else (cache_,)):
+        cache_dir = get_cache_dir(cache)
+        if cache_dir != None:
+            rmtree(cache_dir, ignore_errors=True)
+
+#
+#                                                         CACHE DIRECTORY (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         FILE PROPERTIES (START)
+#
+memory_records = 5000000 # Records of sources the daemon keeps in memory, see remember_file_properties()
+
+
+def get_properties_key(file_, datetime_format_):
+    ''' Get the key file_ properties are cached under: path, size, mtime, inode and time format
+        status: finished
+        return: tuple / None
+        raise: None
+    '''
+    import os
+
+    if file_ in skj_std.downloaded_sources: # Already scanned while downloading (and cached by the download cache)
+        return None
+
+    try:
+        file_stat = os.stat(file_)
+    except OSError:
+        return None
+
+    return (os.path.abspath(file_), file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_dev, file_stat.st_ino,
+            datetime_format_)
+
+
+def get_properties_path(key_):
+    ''' Get the cache file of key_, there is one for each file && time format (older entries are overwritten)
+        status: finished
+        return: str / None
+        raise: None
+    '''
+    import os
+    from hashlib import sha1
+
+    cache_dir = get_cache_dir("properties")
+    if cache_dir == None:
+        return None
+
+    return os.path.join(cache_dir, sha1(repr((key_[0], key_[-1])).encode()).hexdigest() + ".pickle")
+
+
+def load_file_properties(file_, datetime_format_):
+    ''' Load cached properties (including the record store) of file_, if file_ has not changed since stored
+        status: finished
+        return: (key, dict / None)
+        raise: None
+    '''
+    import pickle
+
+    if skj_std.arguments_values['nocache']:
+        return None, None
+
+    key = get_properties_key(file_, datetime_format_)
+    if key != None and skj_std.properties_memory != None:
+        with skj_std.properties_memory["lock"]: # Jobs of the daemon run concurrently
+            remembered = skj_std.properties_memory["properties"].get(key)
+            if remembered != None:
+                skj_std.properties_memory["properties"].move_to_end(key) # Least recently used are forgotten first
+        if remembered != None:
+            skj_std.print_msg_verbose(info_=skj_std.create_info_msg("remembered properties used: " + file_))
+            return key, dict(remembered, path=file_) # Job adds its own keys (eg. adding_seq)
+
+    if key == None or get_properties_path(key) == None:
+        return None, None
+
+    try:
+        with open(get_properties_path(key), mode="rb") as f:
+            cached = pickle.load(f)
+    except FileNotFoundError:
+        return key, None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError) as exception_msg:
+        skj_std.print_msg_verbose(info_=skj_std.create_info_msg("bad cache entry: " + str(exception_msg)))
+        return key, None
+
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return key, None # File has changed
+
+    skj_std.print_msg_verbose(info_=skj_std.create_info_msg("cached properties used: " + file_))
+    cached["properties"]["path"] = file_
+    remember_file_properties(key, cached["properties"])
+    return key, cached["properties"]
+
+
+def store_file_properties(key_, file_properties_):
+    ''' Store file properties under key_ (got from load_file_properties() before the file was scanned)
+        status: finished
+        return: None
+        raise: None
+    '''
+    import pickle
+
+    if skj_std.arguments_values['nocache'] or key_ == None or file_properties_ == None:
+        return
+    remember_file_properties(key_, file_properties_)
+    path = get_properties_path(key_)
+    if path == None:
+        return
+
+    try:
+        write_cache_file(path, pickle.dumps({"key": key_, "properties": file_properties_},
+                                            protocol=pickle.HIGHEST_PROTOCOL))
+    except (OSError, pickle.PicklingError) as exception_msg:
+        skj_std.print_msg_verbose(info_=skj_std.create_info_msg("cannot cache properties: " + str(exception_msg)))
+
+
+def remember_file_properties(key_, file_properties_):
+    ''' Keep file properties under key_ in memory of the daemon (if running), so the next jobs do not even
+        unpickle them. At most memory_records records are kept, least recently used files are forgotten.
+        status: finished
+        return: None
+        raise: None
+    '''
+    if skj_std.properties_memory == None:
+        return
+
+    with skj_std.properties_memory["lock"]:
+        memory = skj_std.properties_memory["properties"]
+        memory[key_] = dict(file_properties_)
+        memory.move_to_end(key_)
+        while len(memory) > 1 and sum(properties['num_of_lines'] for properties in memory.values()) > memory_records:
+            memory.popitem(last=False)
+
+#
+#                                                         FILE PROPERTIES (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         FRAMES (START)
+#
+
+
+def get_frame_path(cache_dir_, key_):
+    ''' Get the cache file of frame with key_, frames are spread into 256 subdirs by the first byte of key_
+        status: finished
+        return: str
+        raise: None
+    '''
+    import os
+    return os.path.join(cache_dir_, key_[:2], key_ + ".png")
+
+
+def link_file(source_, destination_):
+    ''' Hard link source_ to destination_, copy it if linking is not possible (eg. different filesystems)
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    import os
+    from shutil import copyfile
+
+    try:
+        os.link(source_, destination_)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        copyfile(source_, destination_)
+
+
+def load_frame(cache_dir_, key_, path_):
+    ''' Put cached frame with key_ to path_, the frame is marked as recently used
+        status: finished
+        return: bool
+        raise: None
+    '''
+    import os
+
+    frame = get_frame_path(cache_dir_, key_)
+    try:
+        link_file(frame, path_)
+    except OSError:
+        return False
+
+    try:
+        os.utime(frame) # Least recently used frames are evicted first
+    except OSError:
+        pass
+    return True
+
+
+def store_frame(cache_dir_, key_, path_):
+    ''' Store frame drawn into path_ to the cache under key_
+        status: finished
+        return: None
+        raise: None
+    '''
+    import os
+    from threading import get_ident
+
+    frame = get_frame_path(cache_dir_, key_)
+    # Unique for every thread, jobs of one process (daemon, batch) store frames concurrently
+    temp_frame = os.path.join(os.path.dirname(frame), ".tmp__" + str(os.getpid()) + "__" + str(get_ident()))
+    try:
+        os.makedirs(os.path.dirname(frame), exist_ok=True)
+        if os.path.lexists(temp_frame): # Left by killed run, linking would fail
+            os.remove(temp_frame)
+        link_file(path_, temp_frame)
+        os.replace(temp_frame, frame) # Concurrent runs never see half written frame
+    except OSError as exception_msg:
+        skj_std.print_msg_verbose(info_=skj_std.create_info_msg("cannot cache frame: " + str(exception_msg)))
+
+
+def evict_frames(cache_dir_, size_):
+    ''' Delete least recently used frames until the cache has at most size_ bytes
+        status: finished
+        return: None
+        raise: None
+    '''
+    import os
+
+    frames = list()
+    try:
+        subdirs = [subdir.path for subdir in os.scandir(cache_dir_) if subdir.is_dir()]
+    except OSError:
+        return
+    for subdir in subdirs:
+        try:
+            for frame in os.scandir(subdir):
+                frame_stat = frame.stat()
+                frames.append((frame_stat.st_mtime, frame_stat.st_size, frame.path))
+        except OSError: # Frames evicted by other running process, nothing to worry about
+            continue
+
+    cache_size = sum(frame[1] for frame in frames)
+    if cache_size <= size_:
+        return
+
+    frames.sort()
+    for frame_mtime, frame_size, frame in frames:
+        try:
+            os.remove(frame)
+        except OSError:
+            continue
+        cache_size -= frame_size
+        if cache_size <= size_:
+            break
+
+#
+#                                                         FRAMES (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         DOWNLOADS (START)
+#
+
+
+def load_download(url_):
+    ''' Load cached download of url_: it's validators (ETag, Last-Modified) and data
+        status: finished
+        return: dict / None
+        raise: None
+    '''
+    import os
+    import pickle
+    from hashlib import sha1
+
+    cache_dir = get_cache_dir("downloads")
+    if skj_std.arguments_values['nocache'] or cache_dir == None:
+        return None
+
+    try:
+        with open(os.path.join(cache_dir, sha1(url_.encode()).hexdigest() + ".pickle"), mode="rb") as f:
+            cached = pickle.load(f)
+        if not isinstance(cached, dict) or cached.get("url") != url_:
+            return None
+        with open(os.path.join(cache_dir, "data", cached["data"]), mode="rb") as f:
+            cached["data"] = f.read()
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, KeyError):
+        return None
+
+    return cached
+
+
+def store_download(url_, headers_, data_):
+    ''' Store data_ downloaded from url_ with validators from response headers_. Data are stored under their hash,
+        so the same data downloaded from more urls are stored just once.
+        status: finished
+        return: None
+        raise: None
+    '''
+    import os
+    import pickle
+    from hashlib import sha1, sha256
+
+    cache_dir = get_cache_dir("downloads")
+    if skj_std.arguments_values['nocache'] or cache_dir == None:
+        return
+    if headers_.get("ETag") == None and headers_.get("Last-Modified") == None:
+        return # Could not be revalidated
+
+    data = sha256(data_).hexdigest()
+    try:
+        os.makedirs(os.path.join(cache_dir, "data"), exist_ok=True)
+        if not os.path.isfile(os.path.join(cache_dir, "data", data)):
+            write_cache_file(os.path.join(cache_dir, "data", data), data_)
+        write_cache_file(os.path.join(cache_dir, sha1(url_.encode()).hexdigest() + ".pickle"), \
+                         pickle.dumps({"url": url_, "etag": headers_.get("ETag"), \
+                                       "last_modified": headers_.get("Last-Modified"), "data": data}))
+    except (OSError, pickle.PicklingError) as exception_msg:
+        skj_std.print_msg_verbose(info_=skj_std.create_info_msg("cannot cache download: " + str(exception_msg)))
+
+#
+#                                                         DOWNLOADS (END)
+#
@@ -37,15 +37,170 @@ def check_command_exists(command_, ignorable_=True):
         return command_
 
 
+def check_renderer():
+    ''' Check if frames can be drawn by arguments_values['renderer'], fall back to gnuplot if they can not
+        status: finished
+        return: None
+        raise: ValueError
+    '''
+    from importlib.util import find_spec
+
+    if skj_std.arguments_values['renderer'] not in ["gnuplot", "raster"]: # Config file directive
+        if skj_std.arguments_values['ignoreerrors']:
+            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("INVALID_VALUE", \
+                                                                   skj_std.arguments_values['renderer']))
+            skj_std.arguments_values['renderer'] = skj_std.arguments_defaults['renderer']
+        else:
+            raise ValueError(skj_std.create_error_msg("INVALID_VALUE", skj_std.arguments_values['renderer']))
+
+    if skj_std.arguments_values['renderer'] != "raster":
+        return
+    fallback = None
+    if skj_std.arguments_values['gnuplotparams']:
+        fallback = "raw gnuplot params"
+    elif skj_std.arguments_values['workdir'] != None:
+        fallback = "work dir keeps png frames"
+    elif find_spec("numpy") == None:
+        fallback = "No module named 'numpy'"
+
+    if fallback != None:
+        skj_std.print_msg_verbose(info_=skj_std.create_info_msg("drawing by gnuplot: " + fallback))
+        skj_std.arguments_values['renderer'] = "gnuplot"
+
+
+time_parsers = dict() # Compiled time formats, see get_time_parser()
+
+
+def compile_time_format(format_, bytes_=False):
+    ''' Compile strftime format_ into parser returning the same time_struct as strptime, just a lot faster.
+        Format is turned into one regex and the numbers are converted directly, date of the record is cached.
+        Formats with other directives than %Y %y %m %d %H %M %S %% are parsed by strptime itself.
+        Parser compiled with bytes_ parses ASCII bytes (or memoryviews), anything it can't handle is decoded.
+        status: finished
+        return: function
+        raise: None
+    '''
+    from time import strptime, struct_time
+    from datetime import date
+    from re import compile as re_compile, IGNORECASE, error as re_error
+    from operator import itemgetter
+
+    if bytes_: # Whatever the bytes parser can't handle is decoded and passed to the text one
+        parse_text = get_time_parser(format_)
+        def parse_fallback(datetime_, format_):
+            return parse_text(bytes(datetime_).decode("utf-8"))
+    else:
+        parse_fallback = strptime
+
+    def parse_slow(datetime_):
+        return parse_fallback(datetime_, format_)
+
+    if not isinstance(format_, str):
+        return parse_slow # Let strptime raise TypeError
+
+    # The same regexes strptime uses, so the same strings are matched
+    directives = {'d': r"(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])",
+                  'H': r"(?P<H>2[0-3]|[0-1]\d|\d)",
+                  'm': r"(?P<m>1[0-2]|0[1-9]|[1-9])",
+                  'M': r"(?P<M>[0-5]\d|\d)",
+                  'S': r"(?P<S>6[0-1]|[0-5]\d|\d)",
+                  'y': r"(?P<y>\d\d)",
+                  'Y': r"(?P<Y>\d\d\d\d)"}
+
+    time_format = re_compile(r"([\\.^$*+?\(\){}\[\]|])").sub(r"\\\1", format_)
+    time_format = re_compile(r"\s+").sub(r"\\s+", time_format)
+    time_regex = str()
+    used = list() # Directives in the order of regex groups
+    while '%' in time_format:
+        directive_index = time_format.index('%') + 1
+        directive = time_format[directive_index:directive_index + 1]
+        if directive == '%':
+            time_regex += time_format[:directive_index - 1] + '%'
+        elif directive in directives and directive not in used:
+            time_regex += time_format[:directive_index - 1] + directives[directive]
+            used.append(directive)
+        else: # Unknown, locale dependent or repeated directive
+            return parse_slow
+        time_format = time_format[directive_index + 1:]
+    time_regex += time_format
+
+    if not used or ('y' in used and 'Y' in used):
+        return parse_slow
+    try:
+        match = re_compile(time_regex.encode() if bytes_ else time_regex, IGNORECASE).match
+    except re_error:
+        return parse_slow
+    text_type = (bytes, memoryview) if bytes_ else str
+
+    # Missing directives point behind the regex groups, to the '0' appended to every match
+    date_key = itemgetter(*[used.index(d) if d in used else -1 for d in ('Y', 'y', 'm', 'd')])
+    hour, minute, second = [used.index(d) if d in used else -1 for d in ('H', 'M', 'S')]
+    dates = dict() # (year, month, day, weekday, julian) of every date seen so far
+
+    def parse_date(date_):
+        if 'Y' in used:
+            year = int(date_[0])
+        elif 'y' in used: # [00, 68] is in the century 2000, [69,99] in 1900
+            year = int(date_[1]) + (2000 if int(date_[1]) <= 68 else 1900)
+        else:
+            year = 1900
+        month = int(date_[2]) if 'm' in used else 1
+        day = int(date_[3]) if 'd' in used else 1
+        if year == 1900 and 'Y' not in used and 'y' not in used and month == 2 and day == 29:
+            return None # strptime has a special fix for this one
+
+        try:
+            record_date = date(year, month, day)
+        except ValueError: # Day out of range for month
+            return None
+
+        parsed = (year, month, day, record_date.weekday(), record_date.toordinal() - date(year, 1, 1).toordinal() + 1)
+        if len(dates) > 65536: # Keep the cache small
+            dates.clear()
+        dates[date_] = parsed
+        return parsed # Not from dates, other thread (job, download) may have cleared it just now
+
+    def parse_fast(datetime_):
+        found = match(datetime_) if isinstance(datetime_, text_type) else None
+        if found == None or found.end() != len(datetime_):
+            return parse_fallback(datetime_, format_) # Fails with exactly the same exception
+        groups = found.groups() + (b'0' if bytes_ else '0',)
+
+        record_key = date_key(groups)
+        record_date = dates.get(record_key) # Single lookup, dates are shared by all the threads
+        if record_date == None: # Invalid dates are never cached
+            record_date = parse_date(record_key)
+        if record_date == None:
+            return parse_fallback(datetime_, format_)
+        year, month, day, weekday, julian = record_date
+        return struct_time((year, month, day, int(groups[hour]), int(groups[minute]), int(groups[second]),
+                            weekday, julian, -1, None, None))
+
+    return parse_fast
+
+
+def get_time_parser(format_, bytes_=False):
+    ''' Get parser of format_, compile it only if it has not been compiled yet
+        status: finished
+        return: function
+        raise: None
+    '''
+    try:
+        if (format_, bytes_) not in time_parsers:
+            time_parsers[(format_, bytes_)] = compile_time_format(format_, bytes_)
+    except TypeError: # Unhashable format, leave the complaining to strptime
+        return compile_time_format(format_, bytes_)
+    return time_parsers[(format_, bytes_)]
+
+
 def check_time_format(datetime_, ignorable_=True, verbose_=True):
     ''' Check if string containing date and time is in the specified format.
         status: finished
         return: time_struct / None
         raise: ValueError
     '''
-    from time import strptime
     try:
-        ret = strptime(datetime_[0], datetime_[1])
+        ret = get_time_parser(datetime_[1])(datetime_[0])
     except (ValueError, TypeError, IndexError) as exception_msg:
         if skj_std.arguments_values['ignoreerrors'] and ignorable_ == True:
             skj_std.print_msg_verbose(err_=skj_std.create_error_msg("PYTHON", exception_msg))
@@ -206,12 +361,15 @@ def check_critical_value():
 
     return crit_values
 
-def check_parsed_args():
+def check_parsed_args(job_=None):
     ''' Check arguments for different kinds of errors
         status: finished
         return: None
         raise: ValueError, OSError, IOError
     '''
+    if job_ != None: # Run in job_ (in-process API, see skj_job), otherwise in the current job
+        return job_.run(check_parsed_args)
+
     # Deduplicate parametrs stored in lists, while preserving their order (else list(set(x)))
     for argument in skj_std.arguments_repeatable:
         if skj_std.arguments_values[argument]:
@@ -222,16 +380,32 @@ def check_parsed_args():
     skj_std.arguments_values['source'] = [x for x in skj_std.arguments_values['source']\
                                          if x not in duplicate and not duplicate.add(x)]
 
-    # Download files that are not local, store them in temp files
-    for source in list(skj_std.arguments_values['source']):
-        if source.lower().strip().startswith("http://") or \
-           source.lower().strip().startswith("https://"):
-            skj_std.arguments_values['source'].remove(source)  # Remove link from sources list
-            skj_std.arguments_values['source'].append(skj_std.download_url(source, \
-            skj_std.temp_directories['source'], False))
-            source = skj_std.arguments_values['source'][-1]
+    # All the caches are cleared before anything is loaded from them
+    if skj_std.arguments_values['clearcache']:
+        from skj_cache import clear_cache
+        clear_cache()
+
+    # At least one connection has to download the sources
+    if skj_std.arguments_values['downloads'] < 1:
+        if skj_std.arguments_values['ignoreerrors']:
+            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("INVALID_VALUE", \
+                                                                   skj_std.arguments_values['downloads']))
+            skj_std.arguments_values['downloads'] = skj_std.arguments_defaults['downloads']
+        else:
+            raise ValueError(skj_std.create_error_msg("INVALID_VALUE", skj_std.arguments_values['downloads']))
+
+    # Download && scan files that are not local (links are moved to the end of sources list)
+    urls = [source for source in skj_std.arguments_values['source'] \
+            if source.lower().strip().startswith("http://") or source.lower().strip().startswith("https://")]
+    skj_std.arguments_values['source'] = [source for source in skj_std.arguments_values['source'] \
+                                          if source not in urls]
+    for source in skj_std.arguments_values['source']:
         check_file(source, ignorable_=False) # this used to be in else clause
 
+    from skj_subprocess_gnuplot import scan_download
+    skj_std.arguments_values['source'] += skj_std.download_urls(urls, scan_download, \
+                                                                skj_std.arguments_values['downloaddir'], False)
+
     # Check if -c parametr has correct syntax
     if skj_std.arguments_values['criticalvalue'] != skj_std.arguments_defaults['criticalvalue']:
         skj_std.arguments_values['criticalvalue'] = check_critical_value()
@@ -250,6 +424,65 @@ def check_parsed_args():
     # Well... and also for effects
     if skj_std.arguments_values['effectparams'] != skj_std.arguments_defaults['effectparams']:
         skj_std.arguments_values['effectparams'] = check_effects_syntax()
+
+    # At least one gnuplot has to draw the frames
+    if skj_std.arguments_values['jobs'] < 1:
+        if skj_std.arguments_values['ignoreerrors']:
+            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("INVALID_VALUE", skj_std.arguments_values['jobs']))
+            skj_std.arguments_values['jobs'] = skj_std.arguments_defaults['jobs']
+        else:
+            raise ValueError(skj_std.create_error_msg("INVALID_VALUE", skj_std.arguments_values['jobs']))
+
+    # ... and at least one ffmpeg has to encode them
+    if skj_std.arguments_values['encodejobs'] < 1:
+        if skj_std.arguments_values['ignoreerrors']:
+            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("INVALID_VALUE", \
+                                                                   skj_std.arguments_values['encodejobs']))
+            skj_std.arguments_values['encodejobs'] = skj_std.arguments_defaults['encodejobs']
+        else:
+            raise ValueError(skj_std.create_error_msg("INVALID_VALUE", skj_std.arguments_values['encodejobs']))
+
+    # Datablocks are text only, so incremental frames cannot be sent in binary
+    if skj_std.arguments_values['binary'] and skj_std.arguments_values['incremental']:
+        if skj_std.arguments_values['ignoreerrors']:
+            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("INVALID_VALUE", "binary && incremental"))
+            skj_std.arguments_values['binary'] = skj_std.arguments_defaults['binary']
+        else:
+            raise ValueError(skj_std.create_error_msg("INVALID_VALUE", "binary && incremental"))
+
+    # Empty frame cache is fine, negative is not
+    if skj_std.arguments_values['cachesize'] < 0:
+        if skj_std.arguments_values['ignoreerrors']:
+            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("INVALID_VALUE", \
+                                                                   skj_std.arguments_values['cachesize']))
+            skj_std.arguments_values['cachesize'] = skj_std.arguments_defaults['cachesize']
+        else:
+            raise ValueError(skj_std.create_error_msg("INVALID_VALUE", skj_std.arguments_values['cachesize']))
+
+    # Config file directives are not checked by argparse choices
+    if skj_std.arguments_values['progress'] not in [None, "tty", "machine"]:
+        if skj_std.arguments_values['ignoreerrors']:
+            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("INVALID_VALUE", \
+                                                                   skj_std.arguments_values['progress']))
+            skj_std.arguments_values['progress'] = skj_std.arguments_defaults['progress']
+        else:
+            raise ValueError(skj_std.create_error_msg("INVALID_VALUE", skj_std.arguments_values['progress']))
+
+    check_renderer() # raise ValueError
+
+    # There is nothing to resume without work dir, streamed frames never get into it
+    if skj_std.arguments_values['resume'] and skj_std.arguments_values['workdir'] == None:
+        if skj_std.arguments_values['ignoreerrors']:
+            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("INVALID_VALUE", "resume without work dir"))
+            skj_std.arguments_values['resume'] = skj_std.arguments_defaults['resume']
+        else:
+            raise ValueError(skj_std.create_error_msg("INVALID_VALUE", "resume without work dir"))
+    if skj_std.arguments_values['workdir'] != None and skj_std.arguments_values['stream']:
+        if skj_std.arguments_values['ignoreerrors']:
+            skj_std.print_msg_verbose(err_=skj_std.create_error_msg("INVALID_VALUE", "work dir && stream"))
+            skj_std.arguments_values['stream'] = skj_std.arguments_defaults['stream']
+        else:
+            raise ValueError(skj_std.create_error_msg("INVALID_VALUE", "work dir && stream"))
 #
 #                                                         USER INPUT (END)
 #
\ No newline at end of file
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+''' Daemon keeping gnuplots && parsed sources warm between jobs (--daemon), and its thin client (--connect) '''
+
+# IMPORTS
+import skj_std
+
+# AUTHOR
+__author__ = skj_std.__author__
+__email__ = skj_std.__email__
+__status__ = skj_std.__status__
+__version__ = skj_std.__version__
+__license__ = skj_std.__license__
+__year__ = skj_std.__year__
+__maintainer__ = skj_std.__maintainer__
+
+#
+#                                                         GNUPLOT WORKERS (START)
+#
+worker_ready = "skj_daemon: gnuplot ready" # Printed by gnuplot when it has finished all the commands of a job
+worker_reset = "unset output\nunset print\nreset session\nset terminal png size 640,480 background \"#ffffff\"\n"
+
+
+def start_gnuplot_workers(count_):
+    ''' Start count_ warm gnuplots, more of them are started when a job needs them, but only count_ are kept
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    from threading import Lock
+
+    skj_std.gnuplot_workers = {"idle": list(), "messages": dict(), "size": count_, "lock": Lock()}
+    for worker in range(0, count_):
+        skj_std.gnuplot_workers["idle"].append(start_gnuplot_worker())
+
+
+def start_gnuplot_worker():
+    ''' Start gnuplot whose stderr is read by a thread, so it never blocks on messages nobody reads yet
+        status: finished
+        return: subprocess.Popen
+        raise: OSError
+    '''
+    import subprocess
+    from queue import Queue
+    from threading import Thread
+
+    def read_messages_job(pipe_, queue_):
+        for line in iter(pipe_.readline, b''):
+            queue_.put(line)
+        queue_.put(None) # gnuplot has finished
+        pipe_.close()
+
+    gnuplot = subprocess.Popen(["gnuplot"], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    messages = Queue()
+    Thread(target=read_messages_job, args=(gnuplot.stderr, messages), daemon=True).start()
+    with skj_std.gnuplot_workers["lock"]:
+        skj_std.gnuplot_workers["messages"][gnuplot.pid] = messages
+    return gnuplot
+
+
+def take_gnuplot_worker():
+    ''' Take idle warm gnuplot (or start new one if there is none) for drawing frames into files of the current job,
+        it is moved to working directory of the job
+        status: finished
+        return: subprocess.Popen
+        raise: OSError
+    '''
+    gnuplot = None
+    with skj_std.gnuplot_workers["lock"]:
+        if skj_std.gnuplot_workers["idle"]:
+            gnuplot = skj_std.gnuplot_workers["idle"].pop()
+    if gnuplot == None:
+        gnuplot = start_gnuplot_worker() # raise OSError
+
+    try: # Single quoted gnuplot string only needs to have the quotes doubled
+        gnuplot.stdin.write(("cd '" + skj_std.get_job().cwd.replace("'", "''") + "'\n").encode())
+    except OSError:
+        stop_gnuplot_worker(gnuplot)
+        raise
+    return gnuplot
+
+
+def is_gnuplot_worker(gnuplot_):
+    ''' Check if gnuplot_ has been started by start_gnuplot_worker()
+        status: finished
+        return: bool
+        raise: None
+    '''
+    return skj_std.gnuplot_workers != None and gnuplot_.pid in skj_std.gnuplot_workers["messages"]
+
+
+def release_gnuplot_worker(gnuplot_, stdin_=None):
+    ''' Wait until gnuplot_ has drawn all frames written to stdin_ (None if the job has failed), pass its messages
+        to stderr of the job and keep it for the next job. Failed or surplus gnuplot is stopped.
+        status: finished
+        return: None
+        raise: None
+    '''
+    stderr = skj_std.get_job_stream("stderr")
+    messages = skj_std.gnuplot_workers["messages"][gnuplot_.pid]
+    try:
+        if stdin_ == None:
+            raise OSError("job has failed")
+        # Closing the output finishes the last frame, the session is reset so the next job starts as clean as new
+        stdin_.write((worker_reset + "print '" + worker_ready + "'\n").encode())
+        stdin_.flush()
+        for line in iter(messages.get, None):
+            if line.decode(errors="replace").strip() == worker_ready:
+                break
+            stderr.write(line.decode(errors="replace"))
+        else:
+            raise OSError("gnuplot has finished")
+    except OSError: # Its state is not known, so it can not be used again
+        stop_gnuplot_worker(gnuplot_)
+        return
+    except BaseException: # Neither after a bug, but that is not hidden
+        stop_gnuplot_worker(gnuplot_)
+        raise
+
+    with skj_std.gnuplot_workers["lock"]:
+        if len(skj_std.gnuplot_workers["idle"]) < skj_std.gnuplot_workers["size"]:
+            skj_std.gnuplot_workers["idle"].append(gnuplot_)
+            return
+    stop_gnuplot_worker(gnuplot_)
+
+
+def stop_gnuplot_worker(gnuplot_):
+    ''' Stop gnuplot_ and forget it
+        status: finished
+        return: None
+        raise: None
+    '''
+    import subprocess
+
+    try:
+        gnuplot_.stdin.close()
+    except OSError:
+        pass
+    try:
+        gnuplot_.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        gnuplot_.kill()
+        gnuplot_.wait()
+
+    with skj_std.gnuplot_workers["lock"]:
+        skj_std.gnuplot_workers["messages"].pop(gnuplot_.pid, None)
+
+
+def stop_gnuplot_workers():
+    ''' Stop all idle gnuplots
+        status: finished
+        return: None
+        raise: None
+    '''
+    if skj_std.gnuplot_workers == None:
+        return
+
+    with skj_std.gnuplot_workers["lock"]:
+        idle, skj_std.gnuplot_workers["idle"] = skj_std.gnuplot_workers["idle"], list()
+    for gnuplot in idle:
+        stop_gnuplot_worker(gnuplot)
+
+#
+#                                                         GNUPLOT WORKERS (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         DAEMON (START)
+#
+
+
+def create_daemon_socket(path_):
+    ''' Create unix socket path_ accessible only by the user. Socket left by a dead daemon is replaced.
+        status: finished
+        return: socket.socket
+        raise: OSError
+    '''
+    import os
+    import socket
+    import stat
+
+    if os.path.exists(path_):
+        if not stat.S_ISSOCK(os.stat(path_).st_mode):
+            raise OSError(skj_std.create_error_msg("INVALID_VALUE", path_, False))
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path_)
+            except ConnectionRefusedError:
+                os.remove(path_) # Nobody is listening there
+            else:
+                raise OSError(skj_std.create_error_msg("INVALID_VALUE", "daemon already runs on " + path_, False))
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(path_)
+    except OSError:
+        server.close()
+        raise
+    finally:
+        os.umask(umask)
+    server.listen(64)
+    return server
+
+
+def run_daemon():
+    ''' Serve jobs of clients on arguments_values['daemon'] socket until terminated. Every job runs in its own
+        thread, concurrently with the others, just like the script would run it in the client's working directory.
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    import os
+    import signal
+    from collections import OrderedDict
+    from threading import Lock, Thread
+
+    def terminate(signum_, frame_): # Not SystemExit, that would only end the current job
+        raise KeyboardInterrupt()
+
+    def serve_job_thread(connection_): # Threads do not inherit jobs, so this is the daemon's one
+        exit_code = serve_job(connection_)
+        if exit_code != None:
+            skj_std.print_msg_verbose(info_=skj_std.create_info_msg("job finished: " + str(exit_code)))
+
+    path = os.path.abspath(skj_std.arguments_values['daemon'])
+    server = create_daemon_socket(path) # raise OSError
+    signal.signal(signal.SIGTERM, terminate)
+    jobs = list()
+    try:
+        skj_std.properties_memory = {"properties": OrderedDict(), "lock": Lock()}
+        start_gnuplot_workers(skj_std.arguments_values['jobs']) # raise OSError
+        skj_std.print_msg_verbose(info_=skj_std.create_info_msg("daemon listens on " + path))
+        while True:
+            connection = server.accept()[0]
+            jobs = [job for job in jobs if job.is_alive()]
+            jobs.append(Thread(target=serve_job_thread, args=(connection,)))
+            jobs[-1].start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(path)
+        for job in jobs: # Running jobs are finished, their clients wait for them
+            job.join()
+        stop_gnuplot_workers()
+
+
+def serve_job(connection_):
+    ''' Receive job from connection_: its arguments, working directory and client's stdout && stderr,
+        run it and send back its exit code. Connection is closed afterwards.
+        status: finished
+        return: int / None
+        raise: None
+    '''
+    import json
+    import os
+    import socket
+
+    with connection_:
+        fds = list()
+        try:
+            data, fds = socket.recv_fds(connection_, 65536, 2)[:2]
+            if not data and not fds: # Just a check whether the daemon runs, see create_daemon_socket()
+                return None
+            for chunk in iter(lambda: connection_.recv(65536), b''):
+                data += chunk
+            job = json.loads(data.decode())
+            if len(fds) != 2:
+                raise ValueError("stdout && stderr expected")
+            # Job prints to the client, so do its gnuplots (ffmpeg prints nothing)
+            streams = [os.fdopen(fd, mode="w", buffering=1, encoding="utf-8", errors="replace") for fd in fds]
+        except (OSError, ValueError) as exception_msg:
+            print(skj_std.create_error_msg("PYTHON", exception_msg, False))
+            for fd in fds:
+                os.close(fd)
+            return skj_std.exit_codes["DAEMON"]
+
+        try:
+            exit_code = run_daemon_job(job['argv'], job['cwd'], streams[0], streams[1])
+        finally:
+            for stream in streams:
+                try:
+                    stream.close()
+                except OSError: # Client has gone
+                    pass
+
+        try:
+            connection_.sendall(json.dumps({"exit_code": exit_code}).encode())
+        except OSError: # Client has gone, nobody is interested in the result
+            pass
+        return exit_code
+
+
+def run_daemon_job(argv_, cwd_, stdout_, stderr_):
+    ''' Run job with argv_ in working directory cwd_ printing to stdout_ && stderr_, every job is a new
+        skj_std.Job (just like a new process would be)
+        status: finished
+        return: int
+        raise: None
+    '''
+    from skj_job import JobError, create_job, run_job
+
+    try:
+        run_job(create_job(argv_, cwd_, stdout_, stderr_))
+    except JobError as exception_msg:
+        print(exception_msg, file=stdout_)
+        return skj_std.exit_codes[exception_msg.exit_code]
+    except Exception as exception_msg: # Bug in one job must not stop the daemon
+        print(skj_std.create_error_msg("INTERNAL", repr(exception_msg), False), file=stdout_)
+        return skj_std.exit_codes["DAEMON"]
+    return skj_std.exit_codes["SUCCESS"]
+
+#
+#                                                         DAEMON (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         CLIENT (START)
+#
+
+
+def run_client(argv_):
+    ''' Send job with argv_ to the daemon on arguments_values['connect'] socket, together with working directory,
+        stdout && stderr (so the daemon prints directly here), and wait for it to finish
+        status: finished
+        return: int
+        raise: OSError
+    '''
+    import json
+    import os
+    import socket
+    import sys
+
+    job = json.dumps({"argv": argv_, "cwd": os.getcwd()}).encode()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(skj_std.arguments_values['connect'])
+            sent = socket.send_fds(client, [job], [sys.stdout.fileno(), sys.stderr.fileno()])
+            client.sendall(job[sent:])
+            client.shutdown(socket.SHUT_WR)
+            response = b''.join(iter(lambda: client.recv(65536), b''))
+        return json.loads(response.decode())['exit_code']
+    except (OSError, ValueError, KeyError) as exception_msg: # Daemon is not running or has died during the job
+        raise OSError(skj_std.create_error_msg("PYTHON", exception_msg, False))
+
+#
+#                                                         CLIENT (END)
+#
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+''' In-process API: animations as jobs (see skj_std.Job), more of them can run concurrently in one process '''
+
+# IMPORTS
+import skj_std
+
+# AUTHOR
+__author__ = skj_std.__author__
+__email__ = skj_std.__email__
+__status__ = skj_std.__status__
+__version__ = skj_std.__version__
+__license__ = skj_std.__license__
+__year__ = skj_std.__year__
+__maintainer__ = skj_std.__maintainer__
+
+#
+#                                                         JOBS (START)
+#
+
+
+class JobError(Exception):
+    ''' Failed stage of a job, exit_code is the name of the exit code the script would exit with '''
+
+    def __init__(self, message_, exit_code_):
+        Exception.__init__(self, message_)
+        self.exit_code = exit_code_
+
+
+path_arguments = ("config", "profile", "workdir", "downloaddir", "cachedir") # Relative to working directory of job
+checked_renderers = set() # Renderers whose commands have been found by the jobs of this process, see prepare_job()
+
+
+def create_job(argv_, cwd_=None, stdout_=None, stderr_=None):
+    ''' Create job of the animation described by command line arguments argv_ (without the script name), run in
+        working directory cwd_ and printing to stdout_ && stderr_ (of the process by default). It starts profiling
+        if argv_ asks for it.
+        status: finished
+        return: skj_std.Job
+        raise: JobError
+    '''
+    from skj_profile import get_mark, start_profile
+    from skj_parser_cmdline import parse_args
+
+    started = get_mark()
+    job = skj_std.Job(cwd_, stdout_, stderr_)
+    try:
+        job.run(parse_args, argv_)
+    except IOError as exception_msg:
+        raise JobError(exception_msg, "CLINE_ARG_PARSE")
+    except SystemExit: # argparse has already printed why
+        raise JobError(skj_std.create_error_msg("INVALID_SYNTAX", " ".join(argv_), False), "CLINE_ARG_PARSE")
+    resolve_job_paths(job)
+    job.run(start_profile, started) # Nothing is measured without --profile
+    return job
+
+
+def resolve_job_paths(job_):
+    ''' Make relative paths in arguments of job_ (and its local sources) relative to working directory of job_,
+        so nothing depends on working directory of the process. Absolute paths are kept.
+        status: finished
+        return: None
+        raise: None
+    '''
+    import os
+
+    values = job_.arguments_values
+    for argument in path_arguments:
+        if values.get(argument) != None:
+            values[argument] = os.path.join(job_.cwd, values[argument])
+    values['source'] = [source if source.lower().strip().startswith(("http://", "https://")) else \
+                        os.path.join(job_.cwd, source) for source in values['source']]
+
+
+def prepare_job(job_):
+    ''' Create temp dirs of job_, add config file directives to its arguments and check them (and gnuplot if it is
+        needed by the job)
+        status: finished
+        return: None
+        raise: JobError
+    '''
+    from skj_profile import profile_stage
+    from skj_parser_cnffile import parse_directives
+    from skj_checker_common import check_parsed_args, check_command_exists
+
+    resolve_job_paths(job_) # Job of the command line has been created by the script itself
+    try:  # Try to create temporary directories, they are mandatory for the job to continue
+        with profile_stage("create_temp_files", job_):
+            skj_std.create_temp_files(job_=job_)
+    except ValueError as exception_msg:
+        raise JobError(exception_msg, "TEMP_DIR_CREATE")
+
+    try:  # Do we have a valid config file? Then parse it too
+        with profile_stage("parse_directives", job_):
+            if job_.arguments_values['config'] != job_.arguments_defaults['config']:
+                parse_directives(job_=job_)
+                resolve_job_paths(job_) # Sources added by the directives
+    except IOError as exception_msg:
+        raise JobError(exception_msg, "CNF_DIR_PARSE")
+
+    try:  # If we have alived the user input so far, now do some REAL user input checks
+        with profile_stage("check_parsed_args", job_):
+            check_parsed_args(job_=job_)
+    except (OSError, IOError, ValueError) as exception_msg:
+        raise JobError(exception_msg, "ARGS_ERR_CHECK")
+
+    # Renderer is known only now (directives, fallback of raster renderer), only gnuplot needs gnuplot. Daemon has
+    # checked it when starting its warm gnuplots, other jobs of the process (batch) check it just once.
+    renderer = job_.arguments_values['renderer']
+    try:
+        with profile_stage("check_command_exists", job_):
+            if renderer != "raster" and renderer not in checked_renderers and skj_std.gnuplot_workers == None:
+                job_.run(check_command_exists, ["gnuplot", "-V"], False)
+                checked_renderers.add(renderer)
+    except OSError as exception_msg:
+        raise JobError(exception_msg, "REQ_CMD_MISS")
+
+
+def describe_job(job_):
+    ''' Scan sources of job_ and set properties of its animation (type, frames, records added to every frame, ...)
+        status: finished
+        return: None
+        raise: JobError
+    '''
+    from skj_profile import profile_stage
+    from skj_subprocess_gnuplot import set_files_properties
+    from skj_animation import set_animation_properties
+
+    try:  # Convert simple list of file names to more complex structures containing file properties
+        with profile_stage("set_files_properties", job_):
+            job_.arguments_values['source'] = [file_properties for file_properties in \
+                                               set_files_properties(job_.arguments_values['source'], job_=job_) \
+                                               if file_properties != None] # Filters files with only whitespaces
+        if not job_.arguments_values['source']:
+            raise ValueError(skj_std.create_error_msg("NO_SOURCE", job_.arguments_values['source'], False))
+    except ValueError as exception_msg:
+        raise JobError(exception_msg, "SET_FILE_PROPERTIES")
+
+    try: # set animation properties (S/F/T, adding seq for each file, num of frames for each file, etc)
+        with profile_stage("set_animation_properties", job_):
+            set_animation_properties(job_=job_)
+    except (ValueError, IndexError, TypeError, ArithmeticError) as exception_msg:
+        raise JobError(exception_msg, "SET_ANIM_PROPERTIES")
+
+
+def produce_job(job_):
+    ''' Draw frames of the described animation of job_ and encode them
+        status: finished
+        return: str - output dir the animation is stored in
+        raise: JobError
+    '''
+    from skj_profile import profile_stage
+    from skj_animation import start_animation_encoder, create_animation
+    from skj_subprocess_gnuplot import draw_animation_frames
+
+    encoder = None
+    try: # Streamed frames (and all raster frames) are encoded by ffmpeg while they are still drawn
+        with profile_stage("start_animation_encoder", job_):
+            if job_.arguments_values['stream'] or job_.arguments_values['renderer'] == "raster":
+                encoder = start_animation_encoder(job_=job_)
+    except OSError as exception_msg:
+        raise JobError(exception_msg, "CREATE_ANIM")
+
+    try: # Draw frames into temp dir (or ffmpeg), possibly using more gnuplot processes at once
+        with profile_stage("draw_animation_frames", job_):
+            draw_animation_frames(encoder, job_=job_)
+    except (IndexError, ValueError, OSError) as exception_msg:
+        raise JobError(exception_msg, "DRAW_ANIM_FRAMES")
+
+    try:
+        with profile_stage("create_animation", job_):
+            create_animation(encoder, job_=job_)
+    except OSError as exception_msg:
+        raise JobError(exception_msg, "CREATE_ANIM")
+
+    return job_.arguments_values['output']
+
+
+def run_job(job_):
+    ''' Create the animation of job_ and close it (temp files are deleted, profile is written), ffmpeg is expected
+        to exist. Jobs run in other threads/tasks do not affect each other: every one has its own arguments,
+        temp dirs, working directory && streams. Only the caches are shared.
+        Jobs scanning sources in processes (--jobs) from other threads start them from a fork server, so the main
+        module of such a program has to be importable (guarded by if __name__ == "__main__", see multiprocessing).
+        status: finished
+        return: str - output dir the animation is stored in
+        raise: JobError
+    '''
+    exit_code = "SUCCESS"
+    try:
+        prepare_job(job_)
+        describe_job(job_)
+        return produce_job(job_)
+    except JobError as exception_msg:
+        exit_code = exception_msg.exit_code
+        raise
+    finally: # Even a crashed job does not leave its temp files behind
+        job_.close(exit_code)
+
+#
+#                                                         JOBS (END)
+#
@@ -36,8 +36,8 @@ def alter_args(parser_):
         skj_std.arguments_values['config'] = check_file(skj_std.arguments_values['config']) # raise IOError
 
 
-def parse_args():
-    ''' Parse all command line arguments
+def parse_args(argv_=None):
+    ''' Parse all command line arguments (or argv_ of a job, see skj_job)
         status: finished
         return: dictionary
     '''
@@ -62,7 +62,7 @@ Created by: ''' + __author__ + '''; License: ''' + __license__ + '''; Year: '''
                     See user doc for more info on this. (type: %(type)s, default: %(default)s)''')
 
     # source [source...]
-    data.add_argument('source', type=str, nargs='+',
+    data.add_argument('source', type=str, nargs='*',
                       help='''Path to files with data to process. \
                     Can be a filesystem path or URL accessible using http protocol.''')
 
@@ -131,6 +131,119 @@ Created by: ''' + __author__ + '''; License: ''' + __license__ + '''; Year: '''
                       help='''Name of the animation. \
                     See user doc for more info on this. (type: %(type)s, default: %(default)s)''')
 
+    # --renderer gnuplot/raster
+    glob.add_argument('--renderer', type=str, choices=["gnuplot", "raster"], default="gnuplot", dest='renderer',
+                      help='''Draw frames by gnuplot or inside the script (raster, needs NumPy) and send them \
+                    straight to ffmpeg. Raster falls back to gnuplot with -g or --work-dir, or without NumPy. \
+                    (type: %(type)s, default: %(default)s)''')
+
+    # -j JOBS
+    glob.add_argument('-j', '--jobs', type=int, default=1, dest='jobs',
+                      help='''Number of processes scanning source files and drawing frames in parallel. \
+                    (type: %(type)s, default: %(default)s)''')
+
+    # -i
+    glob.add_argument('-i', '--incremental', action='store_true', default=False, dest='incremental',
+                      help='''Send every record to gnuplot only once, using datablocks. Needs gnuplot >= 5.0. \
+                    (type: bool, default: %(default)s)''')
+
+    # -s
+    glob.add_argument('-s', '--stream', action='store_true', default=False, dest='stream',
+                      help='''Stream frames from gnuplot straight to ffmpeg, without storing them to disk. \
+                    (type: bool, default: %(default)s)''')
+
+    # --epoch
+    glob.add_argument('--epoch', action='store_true', default=False, dest='epoch',
+                      help='''Send times to gnuplot as epoch seconds, so gnuplot does not parse them in every frame. \
+                    (type: bool, default: %(default)s)''')
+
+    # --binary
+    glob.add_argument('--binary', action='store_true', default=False, dest='binary',
+                      help='''Send records to gnuplot as binary float64 pairs, not as text. Needs gnuplot >= 5.0, \
+                    cannot be used with -i. (type: bool, default: %(default)s)''')
+
+    # --downloads N
+    glob.add_argument('--downloads', type=int, default=4, dest='downloads',
+                      help='''Number of sources downloaded at once. \
+                    (type: %(type)s, default: %(default)s)''')
+
+    # --download-dir DIR
+    glob.add_argument('--download-dir', type=str, dest='downloaddir',
+                      help='''Directory to store copies of downloaded sources to. \
+                    Sources are scanned while downloading, so no copy is stored by default. \
+                    (type: %(type)s, default: %(default)s)''')
+
+    # --decimate
+    glob.add_argument('--decimate', action='store_true', default=False, dest='decimate',
+                      help='''Do not send records hidden by already plotted records in the same pixel to gnuplot. \
+                    Only with fixed x && y ranges (-x, -X, -y, -Y not auto) and without raw gnuplot params (-g), \
+                    they may plot records as lines. (type: bool, default: %(default)s)''')
+
+    # --cache-dir DIR
+    glob.add_argument('--cache-dir', type=str, dest='cachedir',
+                      help='''Directory caching properties of source files, drawn frames and downloads between runs. \
+                    (type: %(type)s, default: $XDG_CACHE_HOME/animator or ~/.cache/animator)''')
+
+    # --no-cache
+    glob.add_argument('--no-cache', action='store_true', default=False, dest='nocache',
+                      help='''Always download and scan sources and draw all frames, do not use nor update the cache. \
+                    (type: bool, default: %(default)s)''')
+
+    # --clear-cache
+    glob.add_argument('--clear-cache', action='store_true', default=False, dest='clearcache',
+                      help='''Delete all cached properties of source files, frames and downloads before the run. \
+                    (type: bool, default: %(default)s)''')
+
+    # --cache-size MIB
+    glob.add_argument('--cache-size', type=int, default=1024, dest='cachesize',
+                      help='''Maximum size of cached frames in MiB, least recently used are deleted first. \
+                    (type: %(type)s, default: %(default)s)''')
+
+    # --batch MANIFEST
+    glob.add_argument('--batch', type=str, dest='batch',
+                      help='''Create all animations of this manifest: entries separated by empty lines, \
+                    config file directives in each ("source" can be repeated), the other arguments apply to all. \
+                    Sources are scanned once, -j processes draw && encode the animations, the biggest first. \
+                    (type: %(type)s, default: %(default)s)''')
+
+    # --daemon SOCKET
+    glob.add_argument('--daemon', type=str, dest='daemon',
+                      help='''Run as daemon serving jobs sent by --connect to this unix socket, every one in \
+                    its own thread concurrently with the others. Keeps -j warm gnuplots && parsed sources in memory. \
+                    (type: %(type)s, default: %(default)s)''')
+
+    # --connect SOCKET
+    glob.add_argument('--connect', type=str, dest='connect',
+                      help='''Let the --daemon on this unix socket create the animation, \
+                    all the other arguments are passed to it. (type: %(type)s, default: %(default)s)''')
+
+    # --profile FILE
+    glob.add_argument('--profile', type=str, dest='profile',
+                      help='''Write JSON report with wall/cpu time && peak memory of every stage, \
+                    bytes sent to gnuplot, frames/s of rendering and encoding time to this file. \
+                    (type: %(type)s, default: %(default)s)''')
+
+    # --encode-jobs N
+    glob.add_argument('--encode-jobs', type=int, default=1, dest='encodejobs',
+                      help='''Number of ffmpeg processes encoding chunks of the animation in parallel, \
+                    the chunks are joined without reencoding. (type: %(type)s, default: %(default)s)''')
+
+    # --progress tty/machine
+    glob.add_argument('--progress', type=str, choices=["tty", "machine"], dest='progress',
+                      help='''Print frames done, frames/s, MB/s sent to gnuplot and ETA while drawing && encoding \
+                    to stderr, as one updated line (tty) or as key=value lines (machine). \
+                    (type: %(type)s, default: %(default)s)''')
+
+    # --work-dir DIR
+    glob.add_argument('--work-dir', type=str, dest='workdir',
+                      help='''Draw frames into this directory instead of temp dir and keep them there, \
+                    with manifest of frames done. (type: %(type)s, default: %(default)s)''')
+
+    # --resume
+    glob.add_argument('--resume', action='store_true', default=False, dest='resume',
+                      help='''Do not draw frames done by previous run in --work-dir again, \
+                    if it has used the same sources && options. (type: bool, default: %(default)s)''')
+
     # -E
     glob.add_argument('-E', '--ignore-errors', action='store_true', default=False, dest='ignoreerrors',
                       help='''Try to ignore non-fatal errors, just print warnings. \
@@ -147,7 +260,10 @@ Created by: ''' + __author__ + '''; License: ''' + __license__ + '''; Year: '''
                       help='''Print program version and exit.''')
 
     # Now we know about all possible params, so parse them from command line
-    skj_std.arguments_values = vars(parser.parse_args())
+    skj_std.arguments_values = vars(parser.parse_args(argv_))
+    if not skj_std.arguments_values['source'] and skj_std.arguments_values['daemon'] == None and \
+       skj_std.arguments_values['batch'] == None: # Daemon gets sources from its clients, batch from its manifest
+        parser.error("the following arguments are required: source")
 
     # Most basic edits/checks which need to be passed before parsing optional config file
     alter_args(parser) # raise IOError
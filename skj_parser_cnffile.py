@@ -32,36 +32,61 @@ def add_directives_to_args(config_file_, repeatable_directives_):
                 skj_std.arguments_values[argument] += config_file_[argument]
 
 
-def parse_directives():
-    ''' Parse configuration file directives
+def parse_directive_lines(lines_, repeatable_directives_):
+    ''' Parse directives from lines_ of config file (or of batch manifest entry)
             status: finished
-            return: None
-            raise: IOError
+            return: dict
+            raise: IndexError, TypeError, ValueError
     '''
     config_file = dict()
 
-    for argument in skj_std.arguments_repeatable:
+    for argument in repeatable_directives_:
         config_file[argument] = list()
 
+    for line in lines_:
+        option = line.partition('#')[0].strip().split(None, 1)
+        if len(option) > 0:
+            # Check if it is a valid directive 
+            if option[0].lower() not in skj_std.arguments_defaults:
+                raise ValueError(option[0] + " is not a configuration directive")
+            if len(option) == 1:
+                raise ValueError(option[0] + " does not have configuration value")
+            if option[0].lower() in ["speed", "fps", "time"]: # should be created as list of floats from argparse
+                from skj_checker_common import check_float_ok
+                option[1] = check_float_ok(option[1]) # Check && convert string to float if possible
+            if option[0].lower() in ["jobs", "cachesize", "downloads", "encodejobs"]: # should be created as int
+                option[1] = int(option[1]) # raise ValueError
+            if option[0].lower() in ["incremental", "stream", "epoch", "binary", "decimate", "nocache", "clearcache", \
+                                     "resume", "ignoreerrors"]: # should be created as bool from argparse
+                if option[1].lower() not in ["true", "false", "yes", "no", "on", "off", "1", "0"]:
+                    raise ValueError(option[1] + " is not a boolean value of " + option[0])
+                option[1] = option[1].lower() in ["true", "yes", "on", "1"]
+            if option[0].lower() == "progress" and option[1] not in ["tty", "machine"]: # checked by argparse choices
+                raise ValueError(option[1] + " is not a valid value of " + option[0])
+            if option[0].lower() == "renderer" and option[1] not in ["gnuplot", "raster"]:
+                raise ValueError(option[1] + " is not a valid value of " + option[0])
+
+            # Store valid directives
+            if option[0].lower() in repeatable_directives_:
+                config_file[option[0].lower()].append(option[1])
+            else:
+                config_file[option[0].lower()] = option[1]
+
+    return config_file
+
+
+def parse_directives(job_=None):
+    ''' Parse configuration file directives
+            status: finished
+            return: None
+            raise: IOError
+    '''
+    if job_ != None: # Run in job_ (in-process API, see skj_job), otherwise in the current job
+        return job_.run(parse_directives)
+
     try:
         with open(skj_std.arguments_values['config'], mode="r", encoding="utf-8") as cnf_file:
-            for line in cnf_file:
-                option = line.partition('#')[0].strip().split(None, 1)
-                if len(option) > 0:
-                    # Check if it is a valid directive 
-                    if option[0].lower() not in skj_std.arguments_defaults:
-                        raise ValueError(option[0] + " is not a configuration directive")
-                    if len(option) == 1:
-                        raise ValueError(option[0] + " does not have configuration value")
-                    if option[0].lower() in ["speed", "fps", "time"]: # should be created as list of floats from argparse
-                        from skj_checker_common import check_float_ok
-                        option[1] = check_float_ok(option[1]) # Check && convert string to float if possible
-
-                    # Store valid directives
-                    if option[0].lower() in skj_std.arguments_repeatable:
-                        config_file[option[0].lower()].append(option[1])
-                    else:
-                        config_file[option[0].lower()] = option[1]
+            config_file = parse_directive_lines(cnf_file, skj_std.arguments_repeatable)
     except (IOError, IndexError, TypeError, ValueError) as exception_msg:
         if skj_std.arguments_values['ignoreerrors']:
             skj_std.print_msg_verbose(err_=skj_std.create_error_msg("PYTHON", exception_msg))
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+''' Measure stages of animation creation and write them as JSON report (--profile) '''
+
+# IMPORTS
+import skj_std
+
+# AUTHOR
+__author__ = skj_std.__author__
+__email__ = skj_std.__email__
+__status__ = skj_std.__status__
+__version__ = skj_std.__version__
+__license__ = skj_std.__license__
+__year__ = skj_std.__year__
+__maintainer__ = skj_std.__maintainer__
+
+#
+#                                                         STAGES (START)
+#
+
+
+def get_mark():
+    ''' Get current wall time && cpu times (of the script and of it's finished children)
+        status: finished
+        return: tuple
+        raise: None
+    '''
+    import os
+    from time import perf_counter
+    return perf_counter(), os.times()
+
+
+def get_peak_rss(children_=False):
+    ''' Get peak resident set size the script has had so far (or the biggest of it's finished children) in KiB,
+        it is the peak of the whole run, not of a stage (see rss_sampler)
+        status: finished
+        return: int / None
+        raise: None
+    '''
+    import sys
+    try:
+        import resource
+    except ImportError: # Not on unix
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN if children_ else resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin": # Bytes there
+        peak_rss //= 1024
+    return peak_rss
+
+
+def get_rss():
+    ''' Get current resident set size of the script in KiB
+        status: finished
+        return: int / None
+        raise: None
+    '''
+    import os
+
+    try:
+        with open("/proc/self/statm", mode="rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError, AttributeError): # Not on linux
+        return None
+
+
+class rss_sampler:
+    ''' Sample resident set size of the script (see get_rss()) every interval_ seconds in own thread between
+        start() && stop(), stop() returns the peak of the samples. It is the peak of the whole process, so stages of
+        jobs running at the same time are included.
+    '''
+
+    def __init__(self, interval_=0.01):
+        from threading import Event, Thread
+
+        self.interval = interval_
+        self.peak = get_rss()
+        self.stopped = Event()
+        self.thread = Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, get_rss())
+
+    def start(self):
+        if self.peak != None: # Nothing to sample otherwise
+            self.thread.start()
+        return self
+
+    def stop(self):
+        if self.peak != None:
+            self.stopped.set()
+            self.thread.join()
+            self.peak = max(self.peak, get_rss())
+        return self.peak
+
+
+def record_stage(stage_, mark_, peak_rss_=None):
+    ''' Store stage_ which started at mark_ (see get_mark()) with peak_rss_ sampled during it (see rss_sampler),
+        current resident set size is used if it has not been sampled
+        status: finished
+        return: None
+        raise: None
+    '''
+    wall, times = get_mark()
+
+    skj_std.profile["stages"].append({"stage": stage_, "wall": wall - mark_[0],
+                                      "cpu": round(times.user + times.system - mark_[1].user - mark_[1].system, 6),
+                                      "children_cpu": round(times.children_user + times.children_system - \
+                                                            mark_[1].children_user - mark_[1].children_system, 6),
+                                      "peak_rss_kib": peak_rss_ if peak_rss_ != None else get_rss(),
+                                      "cumulative_peak_rss_kib": get_peak_rss(),
+                                      "children_cumulative_peak_rss_kib": get_peak_rss(True)})
+
+
+def start_profile(mark_):
+    ''' Start profiling if it is wanted, everything since mark_ is recorded as parsing of arguments
+        status: finished
+        return: None
+        raise: None
+    '''
+    from threading import Lock
+
+    if skj_std.arguments_values['profile'] == None:
+        return
+
+    skj_std.profile = {"stages": list(), "counters": dict(), "lock": Lock()}
+    record_stage("parse_args", mark_)
+
+
+class profile_stage:
+    ''' Record the stage run inside "with profile_stage(name, job):" to profile of job (the current one by default),
+        nothing is done without --profile
+    '''
+
+    def __init__(self, stage_, job_=None):
+        self.stage = stage_
+        self.job = job_ if job_ != None else skj_std.get_job()
+
+    def __enter__(self):
+        if self.job.profile != None:
+            self.sampler = rss_sampler().start()
+            self.mark = get_mark()
+
+    def __exit__(self, *exception_):
+        if self.job.profile != None:
+            self.job.run(record_stage, self.stage, self.mark, self.sampler.stop())
+        return False
+
+#
+#                                                         STAGES (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         COUNTERS (START)
+#
+
+
+def add_to_counter(counter_, value_):
+    ''' Add value_ to counter_ of the profile, counters are shared by all the threads
+        status: finished
+        return: None
+        raise: None
+    '''
+    with skj_std.profile["lock"]:
+        skj_std.profile["counters"][counter_] = skj_std.profile["counters"].get(counter_, 0) + value_
+
+
+class counted_pipe:
+    ''' Pipe counting bytes written into it, they are added to counter_ when closed (and reported as progress) '''
+
+    def __init__(self, pipe_, counter_):
+        self.pipe = pipe_
+        self.counter = counter_
+        self.written = 0
+        self.added = 0
+        self.reported = 0 # See skj_progress.update_progress()
+
+    def write(self, data_):
+        self.written += memoryview(data_).nbytes # Packed points are arrays of float64
+        return self.pipe.write(data_)
+
+    def flush(self):
+        return self.pipe.flush()
+
+    def close(self):
+        if skj_std.profile != None:
+            add_to_counter(self.counter, self.written - self.added)
+        self.added = self.written
+
+
+def count_pipe(pipe_, counter_):
+    ''' Get pipe_ which counts written bytes to counter_ (when profiling or reporting progress),
+        call it's close() when done
+        status: finished
+        return: counted_pipe / pipe_
+        raise: None
+    '''
+    if skj_std.profile == None and skj_std.progress == None:
+        return pipe_
+    return counted_pipe(pipe_, counter_)
+
+#
+#                                                         COUNTERS (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         REPORT (START)
+#
+
+
+def write_profile(exit_code_):
+    ''' Write the profile to arguments_values['profile'] (if profiling), with rendering frames/s && encoding time
+        status: finished
+        return: None
+        raise: None
+    '''
+    import json
+    import platform
+    import sys
+
+    if skj_std.profile == None:
+        return
+
+    stages = dict((stage["stage"], stage) for stage in skj_std.profile["stages"])
+    report = {"version": __version__, "python": platform.python_version(), "argv": sys.argv,
+              "exit_code": exit_code_, "stages": skj_std.profile["stages"]}
+    report.update(skj_std.profile["counters"])
+
+    if "draw_animation_frames" in stages and skj_std.arguments_values.get('frames'):
+        report["frames"] = skj_std.arguments_values['frames']
+        if stages["draw_animation_frames"]["wall"] > 0:
+            report["render_fps"] = skj_std.arguments_values['frames'] / stages["draw_animation_frames"]["wall"]
+    if "create_animation" in stages: # Streamed frames are mostly encoded while drawing, this is just the rest
+        report["encode_seconds"] = stages["create_animation"]["wall"]
+        report["streamed"] = skj_std.arguments_values['stream']
+
+    try:
+        with open(skj_std.arguments_values['profile'], mode="w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    except OSError as exception_msg: # Profile is not worth failing the animation
+        print(skj_std.create_error_msg("PYTHON", exception_msg), file=skj_std.get_job_stream("stdout"))
+
+#
+#                                                         REPORT (END)
+#
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+''' Report progress, throughput and ETA of drawing && encoding frames (--progress) '''
+
+# IMPORTS
+import skj_std
+
+# AUTHOR
+__author__ = skj_std.__author__
+__email__ = skj_std.__email__
+__status__ = skj_std.__status__
+__version__ = skj_std.__version__
+__license__ = skj_std.__license__
+__year__ = skj_std.__year__
+__maintainer__ = skj_std.__maintainer__
+
+#
+#                                                         PROGRESS (START)
+#
+progress_intervals = {"tty": 0.5, "machine": 5.0} # Seconds between two printed reports
+
+
+def start_progress(stage_, total_, done_=0):
+    ''' Start reporting progress of stage_ with total_ frames, done_ of them are already done (eg. cached)
+        status: finished
+        return: None
+        raise: None
+    '''
+    from threading import Lock
+    from time import perf_counter
+
+    if skj_std.arguments_values['progress'] == None:
+        return
+
+    now = perf_counter()
+    skj_std.progress = {"stage": stage_, "total": total_, "done": done_, "bytes": 0, "started": now,
+                        "started_done": done_, "next": now, "lock": Lock()}
+
+
+def update_progress(frames_=0, pipe_=None, done_=None):
+    ''' Add frames_ done frames (or set done_ frames) and bytes written to pipe_ since the last update
+        (see skj_profile.count_pipe()). Report is printed at most once per progress_intervals.
+        status: finished
+        return: None
+        raise: None
+    '''
+    from time import perf_counter
+
+    progress = skj_std.progress
+    if progress == None:
+        return
+
+    with progress["lock"]: # Updated by all drawing threads
+        progress["done"] = done_ if done_ != None else progress["done"] + frames_
+        if pipe_ != None:
+            progress["bytes"] += pipe_.written - pipe_.reported
+            pipe_.reported = pipe_.written
+
+        now = perf_counter()
+        if now < progress["next"]:
+            return
+        progress["next"] = now + progress_intervals[skj_std.arguments_values['progress']]
+        print_progress(progress, now)
+
+
+def end_progress():
+    ''' Print the final report of the current stage and stop reporting
+        status: finished
+        return: None
+        raise: None
+    '''
+    from time import perf_counter
+
+    if skj_std.progress == None:
+        return
+
+    print_progress(skj_std.progress, perf_counter())
+    if skj_std.arguments_values['progress'] == "tty":
+        print(file=skj_std.get_job_stream("stderr"))
+    skj_std.progress = None
+
+
+def print_progress(progress_, now_):
+    ''' Print progress_ to stderr of the job: one rewritten line on tty, key=value lines for machines
+        status: finished
+        return: None
+        raise: None
+    '''
+    stderr = skj_std.get_job_stream("stderr")
+
+    elapsed = now_ - progress_["started"]
+    fps = (progress_["done"] - progress_["started_done"]) / elapsed if elapsed > 0 else 0.0
+    mbps = progress_["bytes"] / elapsed / 1e6 if elapsed > 0 else 0.0
+    percent = 100 * progress_["done"] / progress_["total"] if progress_["total"] else 100.0
+    eta = (progress_["total"] - progress_["done"]) / fps if fps > 0 else None
+
+    if skj_std.arguments_values['progress'] == "machine":
+        print("progress stage={0} done={1} total={2} percent={3:.1f} fps={4:.2f} mbps={5:.2f} eta={6}".format(
+              progress_["stage"], progress_["done"], progress_["total"], percent, fps, mbps,
+              "-" if eta == None else int(eta)), file=stderr, flush=True)
+    else:
+        eta = "--:--:--" if eta == None else "{0}:{1:02d}:{2:02d}".format(int(eta) // 3600, int(eta) % 3600 // 60,
+                                                                          int(eta) % 60)
+        print("\r{0}: {1}/{2} frames ({3:5.1f}%) {4:7.2f} frames/s {5:7.2f} MB/s ETA {6}".format(
+              progress_["stage"], progress_["done"], progress_["total"], percent, fps, mbps, eta),
+              end="", file=stderr, flush=True)
+
+#
+#                                                         PROGRESS (END)
+#
@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+''' Draw frames inside the script using NumPy (--renderer raster), raw RGB frames go straight to ffmpeg.
+    Covers what the script configures gnuplot with: time x axis, grid, critical values, legend, effects,
+    multiplot colors. Anything else (-g) is left to gnuplot. '''
+
+# IMPORTS
+import skj_std
+
+# AUTHOR
+__author__ = skj_std.__author__
+__email__ = skj_std.__email__
+__status__ = skj_std.__status__
+__version__ = skj_std.__version__
+__license__ = skj_std.__license__
+__year__ = skj_std.__year__
+__maintainer__ = skj_std.__maintainer__
+
+#
+#                                                         FONT (START)
+#
+# 5x7 pixels glyphs, 7 rows of 5 bits each (as hex), lowercase letters are drawn as uppercase
+font = {" ": "00000000000000", "0": "0E11131519110E", "1": "040C040404040E", "2": "0E11010204081F",
+        "3": "1F02040201110E", "4": "02060A121F0202", "5": "1F101E0101110E", "6": "0608101E11110E",
+        "7": "1F010204080808", "8": "0E11110E11110E", "9": "0E11110F01020C", "A": "0E11111F111111",
+        "B": "1E11111E11111E", "C": "0E11101010110E", "D": "1C12111111121C", "E": "1F10101E10101F",
+        "F": "1F10101E101010", "G": "0E11101711110F", "H": "1111111F111111", "I": "0E04040404040E",
+        "J": "0702020202120C", "K": "11121418141211", "L": "1010101010101F", "M": "111B1515111111",
+        "N": "11111915131111", "O": "0E11111111110E", "P": "1E11111E101010", "Q": "0E11111115120D",
+        "R": "1E11111E141211", "S": "0F10100E01011E", "T": "1F040404040404", "U": "1111111111110E",
+        "V": "11111111110A04", "W": "1111111515150A", "X": "11110A040A1111", "Y": "1111110A040404",
+        "Z": "1F01020408101F", ".": "00000000000C0C", ",": "000000000C0408", ":": "000C0C000C0C00",
+        ";": "000C0C000C0408", "-": "0000001F000000", "+": "0004041F040400", "/": "00010204081000",
+        "\\": "00100804020100", "[": "0E08080808080E", "]": "0E02020202020E", "(": "02040808080402",
+        ")": "08040202020408", "_": "0000000000001F", "'": "0C040800000000", '"': "0A0A0A00000000",
+        "!": "04040404040004", "?": "0E110102040004", "%": "18190204081303", "#": "0A0A1F0A1F0A0A",
+        "=": "00001F001F0000", "*": "0004150E150400", "&": "0C12140815120D", "<": "02040810080402",
+        ">": "08040201020408", "@": "0E11010D15150E", "|": "04040404040404"}
+glyphs = dict() # Font turned into boolean arrays, see get_glyph()
+
+
+def get_glyph(char_):
+    ''' Get glyph of char_ as 7x5 boolean array, unknown chars are drawn as "?"
+        status: finished
+        return: numpy.ndarray
+        raise: None
+    '''
+    import numpy
+
+    char = char_.upper() if char_.upper() in font else "?"
+    if char not in glyphs:
+        rows = [int(font[char][i:i + 2], 16) for i in range(0, 14, 2)]
+        glyphs[char] = numpy.array([[row >> (4 - bit) & 1 for bit in range(0, 5)] for row in rows], dtype=bool)
+    return glyphs[char]
+
+
+def render_text(text_, scale_):
+    ''' Render text_ into boolean array, every glyph is scale_ times bigger and followed by one (scaled) pixel space
+        status: finished
+        return: numpy.ndarray
+        raise: None
+    '''
+    import numpy
+
+    text = numpy.zeros((7, 6 * max(1, len(text_))), dtype=bool)
+    for i, char in enumerate(text_):
+        text[:, 6 * i:6 * i + 5] = get_glyph(char)
+    return text.repeat(scale_, axis=0).repeat(scale_, axis=1)
+
+
+def draw_text(canvas_, text_, x_, y_, color_, scale_, anchor_="left", vertical_=False):
+    ''' Draw text_ to canvas_ at x_, y_ (top of the text) aligned by anchor_ ("left", "center", "right"),
+        vertical_ text goes from bottom up
+        status: finished
+        return: None
+        raise: None
+    '''
+    import numpy
+
+    text = render_text(text_, scale_)
+    if vertical_:
+        text = numpy.rot90(text)
+    height, width = text.shape
+    if anchor_ == "center":
+        x_ -= width // 2
+    elif anchor_ == "right":
+        x_ -= width
+    if vertical_:
+        y_ -= height // 2
+
+    # Clip the text to the canvas
+    top, left = max(0, y_), max(0, x_)
+    bottom, right = min(canvas_.shape[0], y_ + height), min(canvas_.shape[1], x_ + width)
+    if top >= bottom or left >= right:
+        return
+    canvas_[top:bottom, left:right][text[top - y_:bottom - y_, left - x_:right - x_]] = color_
+
+#
+#                                                         FONT (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         PLOT (START)
+#
+default_lines = ["#9400D3", "#009E73", "#56B4E9", "#E69F00", "#F0E442", "#0072B2", "#E51E10", "#000000"] # gnuplot's
+
+
+def get_rgb(color_):
+    ''' Convert "#RRGGBB" color_ to (r, g, b)
+        status: finished
+        return: tuple
+        raise: None
+    '''
+    return tuple(int(color_[i:i + 2], 16) for i in (1, 3, 5))
+
+
+def get_plot_style():
+    ''' Get colors of the plot the same way configure_effects() sets them for gnuplot
+        status: finished
+        return: dict
+        raise: None
+    '''
+    from skj_subprocess_gnuplot import set_scheme_lines
+
+    style = {"background": get_rgb("#FFFFFF"), "border": get_rgb("#000000"), "border_width": 1,
+             "tics": get_rgb("#000000"), "grid": get_rgb("#A0A0A0"), "labels": get_rgb("#FF0000"),
+             "critical": get_rgb("#FF0000"), "lines": [get_rgb(color) for color in default_lines]}
+
+    effects = skj_std.arguments_values['effectparams']
+    if effects != skj_std.arguments_defaults['effectparams'] and "scheme" in effects:
+        style["border"] = style["tics"] = get_rgb("#FF0000")
+        style["border_width"] = 3
+        if effects['scheme'] == "black":
+            style["background"] = get_rgb("#000000")
+        style["lines"] = [get_rgb(line.split('"')[1]) for line in set_scheme_lines(effects['scheme'])]
+
+    return style
+
+
+def get_plot_ranges():
+    ''' Get x (epoch seconds) && y ranges set by the user, the same way configure_xy_basics() sets them for gnuplot.
+        None is for autoscaled end of range.
+        status: finished
+        return: list of lists
+        raise: IndexError, ValueError
+    '''
+    from calendar import timegm
+    from skj_subprocess_gnuplot import get_record_extremes, get_epoch_time
+
+    data_max, data_min = get_record_extremes(type_="data") # raise IndexError, ValueError
+    epoch_max, epoch_min = [timegm(t) for t in get_record_extremes(type_="time", format_=False)]
+    extremes = [{"min": epoch_min, "max": epoch_max}, {"min": data_min, "max": data_max}]
+
+    ranges = [[None, None], [None, None]]
+    for axis, end, value in [(0, 0, "xmin"), (0, 1, "xmax"), (1, 0, "ymin"), (1, 1, "ymax")]:
+        if skj_std.arguments_values[value] in extremes[axis]:
+            ranges[axis][end] = extremes[axis][skj_std.arguments_values[value]]
+        elif skj_std.arguments_values[value] != "auto":
+            ranges[axis][end] = get_epoch_time(skj_std.arguments_values[value]) if axis == 0 else \
+                                float(skj_std.arguments_values[value]) # raise ValueError
+
+    return ranges
+
+
+def get_nice_tics(low_, high_, count_):
+    ''' Get about count_ tics spanning low_ ... high_ at "nice" (1, 2, 5 times power of 10) steps
+        status: finished
+        return: (step, first tic)
+        raise: None
+    '''
+    from math import ceil, floor, log10
+
+    step = abs(high_ - low_) / max(1, count_)
+    magnitude = 10 ** floor(log10(step))
+    for nice in [1, 2, 5, 10]:
+        if step <= nice * magnitude:
+            step = nice * magnitude
+            break
+    return step, ceil(min(low_, high_) / step) * step
+
+
+def autoscale(range_, extremes_, nice_):
+    ''' Fill autoscaled ends of range_ from extremes_ of plotted values (extended to nice tics if nice_,
+        as gnuplot does). Empty frame has extremes_ None.
+        status: finished
+        return: tuple
+        raise: None
+    '''
+    from math import ceil, floor
+
+    low, high = range_
+    if low == None:
+        low = extremes_[0] if extremes_ != None else (high if high != None else 0.0)
+    if high == None:
+        high = extremes_[1] if extremes_ != None else low
+    if low == high: # gnuplot widens empty range too
+        low, high = low - 1, high + 1
+    if nice_ and (range_[0] == None or range_[1] == None):
+        step = get_nice_tics(low, high, 5)[0]
+        if range_[0] == None:
+            low = floor(low / step) * step
+        if range_[1] == None:
+            high = ceil(high / step) * step
+    return low, high
+
+
+def draw_background(style_, ranges_, width_, height_):
+    ''' Draw everything but the records: border, grid, tics, labels, critical values && legend
+        status: finished
+        return: (canvas, plot area (left, top, right, bottom))
+        raise: ValueError
+    '''
+    import numpy
+    from time import gmtime, strftime
+    from skj_subprocess_gnuplot import get_epoch_time
+
+    scale = max(1, height_ // 480)
+    char_width, char_height = 6 * scale, 7 * scale
+    (x_low, x_high), (y_low, y_high) = ranges_
+    canvas = numpy.empty((height_, width_, 3), dtype=numpy.uint8)
+    canvas[:, :] = style_["background"]
+
+    # Y tics are labeled by numbers, X tics by times formatted as in source files
+    y_step, y_first = get_nice_tics(y_low, y_high, 5)
+    y_tics = [y_first + i * y_step for i in range(0, int(abs(y_high - y_low) / y_step + 1e-9) + 1)]
+    y_labels = ["%g" % round(tic, 12) for tic in y_tics]
+    x_label_width = len(strftime(skj_std.arguments_values['timeformat'], gmtime(x_low))) * char_width
+
+    left = max(3 * char_width + max(len(label) for label in y_labels) * char_width, x_label_width // 2 + char_width)
+    right = width_ - max(2 * char_width, x_label_width // 2 + char_width)
+    top = 3 * char_height if skj_std.arguments_values['legend'] else 2 * char_height
+    bottom = height_ - 5 * char_height
+    if right - left < 10 or bottom - top < 10:
+        raise ValueError(skj_std.create_error_msg("INVALID_VALUE", "frame too small for the plot"))
+
+    def x_pixel(x_):
+        return int(round(left + (x_ - x_low) / (x_high - x_low) * (right - left)))
+
+    def y_pixel(y_):
+        return int(round(bottom - (y_ - y_low) / (y_high - y_low) * (bottom - top)))
+
+    x_count = max(2, min(8, (right - left) // (x_label_width + 2 * char_width)))
+    x_tics = [x_low + i * (x_high - x_low) / (x_count - 1) for i in range(0, x_count)]
+
+    for tic, label in zip(y_tics, y_labels):
+        y = y_pixel(tic)
+        if top <= y <= bottom:
+            canvas[y, left:right:2] = style_["grid"] # Dotted grid
+            canvas[y, left:left + 3 * scale] = canvas[y, right - 3 * scale:right] = style_["border"]
+            draw_text(canvas, label, left - char_width // 2, y - char_height // 2, style_["tics"], scale, "right")
+    for tic in x_tics:
+        x = x_pixel(tic)
+        canvas[top:bottom:2, x] = style_["grid"]
+        canvas[bottom - 3 * scale:bottom, x] = canvas[top:top + 3 * scale, x] = style_["border"]
+        draw_text(canvas, strftime(skj_std.arguments_values['timeformat'], gmtime(tic)), x, \
+                  bottom + char_height // 2, style_["tics"], scale, "center")
+
+    # Critical values are drawn over the grid
+    for x_crit in skj_std.arguments_values['criticalvalue']['x'] if skj_std.arguments_values['criticalvalue'] else []:
+        x = x_pixel(get_epoch_time(x_crit)) # raise ValueError
+        if left <= x <= right:
+            canvas[top:bottom, x] = style_["critical"]
+    for y_crit in skj_std.arguments_values['criticalvalue']['y'] if skj_std.arguments_values['criticalvalue'] else []:
+        y = y_pixel(float(y_crit))
+        if top <= y <= bottom:
+            canvas[y, left:right] = style_["critical"]
+
+    for i in range(0, style_["border_width"] * scale):
+        canvas[top - i, left - i:right + i + 1] = canvas[bottom + i, left - i:right + i + 1] = style_["border"]
+        canvas[top - i:bottom + i + 1, left - i] = canvas[top - i:bottom + i + 1, right + i] = style_["border"]
+
+    draw_text(canvas, "Date && Time", (left + right) // 2, height_ - 2 * char_height, style_["labels"], scale, \
+              "center")
+    draw_text(canvas, "Values", char_width // 2, (top + bottom) // 2, style_["labels"], scale, vertical_=True)
+    if skj_std.arguments_values['legend']:
+        draw_text(canvas, skj_std.arguments_values['legend'], (left + right) // 2, char_height, \
+                  style_["labels"], scale, "center")
+
+    return canvas, (left, top, right, bottom)
+
+
+def draw_points(canvas_, area_, ranges_, points_, color_, scale_, owners_, stream_):
+    ''' Draw points_ (array of x, y pairs) of stream_ into plot area_ of canvas_ as "+" marks, like gnuplot does by
+        default. Pixel is painted only if no later stream has painted it (owners_ holds the last stream of each pixel),
+        so points added later look the same as if all the streams were drawn again in their order.
+        status: finished
+        return: None
+        raise: None
+    '''
+    import numpy
+
+    left, top, right, bottom = area_
+    (x_low, x_high), (y_low, y_high) = ranges_
+    x = numpy.rint(left + (points_[:, 0] - x_low) * ((right - left) / (x_high - x_low))).astype(numpy.int64)
+    y = numpy.rint(bottom - (points_[:, 1] - y_low) * ((bottom - top) / (y_high - y_low))).astype(numpy.int64)
+    inside = (x >= left) & (x <= right) & (y >= top) & (y <= bottom)
+    x, y = x[inside], y[inside]
+
+    size = 2 * scale_
+    for offset in range(-size, size + 1): # Marks are clipped by the plot area, as in gnuplot
+        for mark_x, mark_y in [(x + offset, y), (x, y + offset)]:
+            visible = (mark_x >= left) & (mark_x <= right) & (mark_y >= top) & (mark_y <= bottom)
+            mark_x, mark_y = mark_x[visible], mark_y[visible]
+            free = owners_[mark_y, mark_x] <= stream_
+            mark_x, mark_y = mark_x[free], mark_y[free]
+            canvas_[mark_y, mark_x] = color_
+            owners_[mark_y, mark_x] = stream_
+
+#
+#                                                         PLOT (END)
+#
+# -------------------------------------------------------------------------------------------------------------------- #
+#
+#                                                         FRAMES (START)
+#
+
+
+def draw_raster_frames(encoder_):
+    ''' Draw all frames and write them as raw RGB into encoder_ stdin (see start_animation_encoder()).
+        Frames are cumulative, so one canvas is kept for all of them and every frame draws only the records added
+        since the previous one. Canvas is drawn again from its background only when autoscaled ranges change.
+        status: finished
+        return: None
+        raise: ValueError, IndexError, OSError
+    '''
+    import numpy
+    from skj_profile import count_pipe
+    from skj_progress import start_progress, update_progress, end_progress
+    from skj_subprocess_gnuplot import load_frame_streams, create_frame_counter, get_frame_size
+
+    width, height = get_frame_size()
+    scale = max(1, height // 480)
+    style = get_plot_style()
+    user_ranges = get_plot_ranges() # raise IndexError, ValueError
+    streams = load_frame_streams() # Points are packed for raster too
+    points = [numpy.frombuffer(stream['points'], dtype=numpy.float64).reshape(-1, 2) for stream in streams]
+    count_frame = create_frame_counter()
+
+    extremes = [None, None] # Of x && y of records plotted so far, frames are cumulative so they are just updated
+    counted = [0] * len(streams) # Records plotted so far
+    drawn = [0] * len(streams) # Records drawn on canvas so far
+    canvas, area, ranges = None, None, None
+    owners = numpy.empty((height, width), dtype=numpy.int32) # Stream which painted the pixel last, see draw_points()
+    backgrounds = dict() # Autoscaled ranges change only sometimes, so do the backgrounds
+    start_progress("render", skj_std.arguments_values['frames'])
+    output = count_pipe(encoder_.stdin, "encoder_stdin_bytes") # Counted for progress too
+    try:
+        for frame in range(0, skj_std.arguments_values['frames']):
+            plotted = [count if stream['plotted_points'] == None else stream['plotted_points'][count] \
+                       for stream, count in zip(streams, count_frame(frame))]
+            for i, count in enumerate(plotted):
+                if count > counted[i]:
+                    added = points[i][counted[i]:count]
+                    for axis in (0, 1):
+                        low, high = float(added[:, axis].min()), float(added[:, axis].max())
+                        if extremes[axis] != None:
+                            low, high = min(low, extremes[axis][0]), max(high, extremes[axis][1])
+                        extremes[axis] = (low, high)
+                    counted[i] = count
+
+            frame_ranges = (autoscale(user_ranges[0], extremes[0], False), \
+                            autoscale(user_ranges[1], extremes[1], True))
+            if frame_ranges != ranges: # Every point moves, start again from the background
+                ranges = frame_ranges
+                if ranges not in backgrounds:
+                    if len(backgrounds) > 16:
+                        backgrounds.clear()
+                    backgrounds[ranges] = draw_background(style, ranges, width, height) # raise ValueError
+                canvas, area = backgrounds[ranges][0].copy(), backgrounds[ranges][1]
+                owners.fill(-1)
+                drawn = [0] * len(streams)
+
+            for i, count in enumerate(plotted):
+                if count > drawn[i]:
+                    draw_points(canvas, area, ranges, points[i][drawn[i]:count], \
+                                style["lines"][i % len(style["lines"])], scale, owners, i)
+                    drawn[i] = count
+
+            try:
+                output.write(memoryview(canvas).cast("B"))
+            except (OSError, ValueError) as exception_msg: # ffmpeg has died
+                raise OSError(skj_std.create_error_msg("PYTHON", exception_msg))
+            update_progress(1, output)
+        output.close()
+    finally:
+        end_progress()
+
+#
+#                                                         FRAMES (END)
+#
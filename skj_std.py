@@ -12,21 +12,134 @@ __maintainer__ = __author__
 #
 #                                                         GLOBALS (START)
 #
-temp_directories = {"root": "", "gnuplot": "", "source": ""}
+temp_directories_lazy = ("gnuplot",) # Created only when needed, see create_temp_dir()
 allowed_effects = {"scheme": ["white", "black"], "size": ["xga", "hd"]}
-arguments_defaults = dict()
-arguments_values = dict()
 arguments_repeatable = ("criticalvalue", "gnuplotparams", "effectparams")
+gnuplot_workers = None # Warm gnuplots kept between jobs, only in --daemon, see skj_daemon
+properties_memory = None # Source properties kept between jobs, only in --daemon, see skj_cache
 exit_codes = {"SUCCESS": 0, "CLINE_ARG_PARSE": 10,
               "CNF_DIR_PARSE": 20, "ARGS_ERR_CHECK": 30,
               "REQ_CMD_MISS": 40, "TEMP_DIR_CREATE": 90,
               "SET_FILE_PROPERTIES": 50, "SET_ANIM_PROPERTIES": 60,
-              "DRAW_ANIM_FRAMES": 70, "CREATE_ANIM": 80}
+              "DRAW_ANIM_FRAMES": 70, "CREATE_ANIM": 80,
+              "DAEMON": 100}
 #
 #                                                         GLOBALS (END)
 #
 #-----------------------------------------------------------------------------------------------------------------------
 #
+#                                                         JOBS (START)
+#
+import sys
+from types import ModuleType
+from contextvars import ContextVar
+
+
+class Job(object):
+    ''' One animation: its arguments (sources with their records && frame schedules once they are described),
+        temp dirs, sources scanned while downloading, profile && progress. Globals of skj_std with the same names
+        belong to the job active in the current thread/task. Job has its own working directory cwd_ (relative
+        paths of its arguments are resolved against it, see skj_job) and its own stdout_ && stderr_ (of the
+        process if None), so jobs can run concurrently in one process.
+    '''
+
+    def __init__(self, cwd_=None, stdout_=None, stderr_=None):
+        import os
+
+        self.cwd = cwd_ if cwd_ != None else os.getcwd()
+        self.stdout = stdout_ # Also messages of the job's gnuplots && ffmpegs go to its streams
+        self.stderr = stderr_
+        self.arguments_values = dict()
+        self.arguments_defaults = dict()
+        self.temp_directories = {"root": "", "gnuplot": ""}
+        self.downloaded_sources = dict() # Properties of sources scanned while downloading, see download_url()
+        self.profile = None # Measured stages && counters, only with --profile, see skj_profile
+        self.progress = None # Progress of the current stage, only with --progress, see skj_progress
+
+    def run(self, function_, *args_, **kwargs_):
+        ''' Call function_ with this job active, it is active only there (and in threads started by bind_job())
+            status: finished
+            return: whatever function_ returns
+            raise: whatever function_ raises
+        '''
+        from contextvars import copy_context
+
+        def run_job_function():
+            current_job.set(self)
+            return function_(*args_, **kwargs_)
+
+        return copy_context().run(run_job_function)
+
+    def close(self, exit_code_="SUCCESS"):
+        ''' Delete temp files of the job and write its profile (if profiling)
+            status: finished
+            return: None
+            raise: None
+        '''
+        self.run(cleanup_temp_files)
+        if self.profile != None:
+            from skj_profile import write_profile
+            self.run(write_profile, exit_codes[exit_code_])
+
+
+current_job = ContextVar("job", default=Job()) # Default job is the one of the command line
+job_globals = ("arguments_values", "arguments_defaults", "temp_directories", "downloaded_sources", \
+               "profile", "progress")
+
+
+def get_job():
+    ''' Get the job active in the current thread/task, see Job.run()
+            status: finished
+            return: Job
+    '''
+    return current_job.get()
+
+
+def get_job_stream(stream_):
+    ''' Get stream_ ("stdout" / "stderr") of the current job, the process has the default ones
+            status: finished
+            return: file
+    '''
+    stream = getattr(get_job(), stream_)
+    return stream if stream != None else getattr(sys, stream_)
+
+
+def get_job_path(path_):
+    ''' Get path_ relative to the working directory of the current job (absolute path_ is kept)
+            status: finished
+            return: str
+    '''
+    from os.path import join
+    return join(get_job().cwd, path_)
+
+
+def bind_job(function_):
+    ''' Bind function_ to the job active now, threads do not inherit it (every call gets a fresh context, so one
+        function can run in more threads at once)
+            status: finished
+            return: function
+    '''
+    job = get_job()
+
+    def run_job_function(*args_, **kwargs_):
+        return job.run(function_, *args_, **kwargs_)
+
+    return run_job_function
+
+
+class JobModule(ModuleType):
+    ''' skj_std itself, its job_globals are read from && written to the job active in the current context '''
+
+
+for name in job_globals:
+    setattr(JobModule, name, property(lambda module_, name_=name: getattr(current_job.get(), name_), \
+                                      lambda module_, value_, name_=name: setattr(current_job.get(), name_, value_)))
+sys.modules[__name__].__class__ = JobModule
+#
+#                                                         JOBS (END)
+#
+#-----------------------------------------------------------------------------------------------------------------------
+#
 #                                                         FUNCTIONS (START)
 #
 
@@ -52,7 +165,8 @@ def create_error_msg(type_, value_, ignorable_=True):
                    "OUTPUT_DIR_CREATE": "cannot create output directory, " + \
                    "use -E for storing output in OS temp files"}
 
-    if arguments_values['ignoreerrors'] and ignorable_ == True:
+    arguments_values = get_job().arguments_values
+    if arguments_values.get('ignoreerrors') and ignorable_ == True: # Job may not have parsed its arguments yet
         err_level = "ignored error"
     else:
         err_level = "fatal error"
@@ -90,47 +204,101 @@ def print_msg_verbose(debug_=None, info_=None, err_=None):
             status: finished
             return: None
     '''
+    arguments_values = get_job().arguments_values
     if arguments_values['verbose'] == 0:
         return
 
     if err_ != None and arguments_values['verbose'] >= 1 and arguments_values['ignoreerrors'] == True:
-        print(err_)
+        print(err_, file=get_job_stream("stdout"))
 
     if info_ != None and arguments_values['verbose'] >= 1:
-        print(info_)
+        print(info_, file=get_job_stream("stdout"))
 
     if debug_ != None and arguments_values['verbose'] >= 2:
-        print(debug_)
+        print(debug_, file=get_job_stream("stdout"))
 
 
-def download_url(url_, store_url_to_, ignorable_=True):
-    ''' Download url_, store it to temp_directories
+def download_url(url_, scan_, store_url_to_=None, ignorable_=True):
+    ''' Download url_ and scan it while it is downloading: every line goes to scan_ as soon as it is received.
+        Unchanged data are not downloaded again, but loaded from the download cache (revalidated with
+        ETag/Last-Modified). Result of scan_ (or it's ValueError) is stored to downloaded_sources[url_].
+        Copy of the data is stored to store_url_to_ directory only if it is set.
             status: finished
-            return: full path to temp_file / None
+            return: url_ / None
     '''
-    from os.path import isdir
-    if not isdir(store_url_to_):  # If directory for storing the url doesn't exist raise an exception
-        raise OSError(create_error_msg("TEMP_DIR_NOT_EXIST", store_url_to_, False))
-
-    from tempfile import mkstemp
-    temp_file = mkstemp(dir=store_url_to_)  # Create temp file which will store downloaded data
-
-    from os import fdopen
-    from urllib.request import urlopen
-    from urllib.request import URLError
-    try:  # Download file from url_, store it localy in temp_file which is in store_url_to_
-        with urlopen(url_) as url_response, fdopen(temp_file[0], mode="wb") as out_file:
-            from shutil import copyfileobj
-            copyfileobj(url_response, out_file)
+    import skj_cache
+    from io import BytesIO
+    from urllib.request import Request, urlopen
+    from urllib.request import URLError, HTTPError
+
+    def tee_lines(f_, data_):
+        for line in f_: # Everything scanned is kept for the cache
+            data_.append(line)
+            yield line
+
+    arguments_values, downloaded_sources = get_job().arguments_values, get_job().downloaded_sources
+    cached = skj_cache.load_download(url_)
+    request = Request(url_)
+    if cached != None: # Ask server to send the data only if they have changed
+        if cached['etag'] != None:
+            request.add_header("If-None-Match", cached['etag'])
+        if cached['last_modified'] != None:
+            request.add_header("If-Modified-Since", cached['last_modified'])
+
+    try:  # Download file from url_, scan it and store it to the cache
+        url_data = list()
+        try:
+            with urlopen(request) as url_response:
+                try:
+                    downloaded_sources[url_] = scan_(tee_lines(url_response, url_data))
+                except ValueError as exception_msg: # Bad data are reported when source properties are set
+                    downloaded_sources[url_] = exception_msg
+                url_data.append(url_response.read()) # Lines after the bad one
+                skj_cache.store_download(url_, url_response.headers, b''.join(url_data))
+        except HTTPError as exception_msg:
+            if exception_msg.code != 304 or cached == None: # 304 Not Modified
+                raise
+            print_msg_verbose(info_=create_info_msg("cached download used: " + url_))
+            url_data = [cached['data']]
+            try:
+                downloaded_sources[url_] = scan_(BytesIO(cached['data']))
+            except ValueError as exception_msg:
+                downloaded_sources[url_] = exception_msg
+
+        if store_url_to_ != None:
+            from os import makedirs
+            from os.path import basename, join
+            from hashlib import sha1
+            from urllib.parse import urlsplit
+            makedirs(store_url_to_, exist_ok=True)
+            with open(join(store_url_to_, sha1(url_.encode()).hexdigest()[:10] + "__" + \
+                      (basename(urlsplit(url_).path) or "index")), mode="wb") as out_file:
+                out_file.write(b''.join(url_data))
 
     except (URLError, ValueError, OSError) as exception_msg:  # some other error happened when trying to download
+        downloaded_sources.pop(url_, None)
         if arguments_values['ignoreerrors'] and ignorable_ == True:
             print_msg_verbose(err_=create_error_msg("PYTHON", exception_msg))
             return None
         else:
             raise OSError(create_error_msg("PYTHON", exception_msg, False))
     else:
-        return temp_file[1]  # File successfuly created, return it's name
+        return url_  # Url is used as the name of the source
+
+
+def download_urls(urls_, scan_, store_url_to_=None, ignorable_=True):
+    ''' Download && scan all urls_ at once, using at most arguments_values['downloads'] connections
+            status: finished
+            return: list of urls / None
+            raise: OSError
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=get_job().arguments_values['downloads']) as executor:
+        downloads = [executor.submit(bind_job(download_url), url, scan_, store_url_to_, ignorable_) \
+                     for url in urls_] # Threads of the pool download for the current job
+
+    return [download.result() for download in downloads] # raise OSError of the first failed url
 
 
 def cleanup_temp_files():
@@ -141,24 +309,33 @@ def cleanup_temp_files():
     from shutil import rmtree
     from os import listdir
 
+    from os.path import abspath
+
+    arguments_values, temp_directories = get_job().arguments_values, get_job().temp_directories
+    if temp_directories["root"] == "": # Nothing has been created yet (eg. daemon && its clients)
+        return
+
     try: 
-        rmtree(temp_directories["gnuplot"], ignore_errors=True) # If this fails, then it is up to the OS
-        rmtree(temp_directories["source"], ignore_errors=True)
+        work_dir = arguments_values.get('workdir')
+        if work_dir == None or abspath(work_dir) != temp_directories["gnuplot"]: # Frames of work dir are kept
+            rmtree(temp_directories["gnuplot"], ignore_errors=True) # If this fails, then it is up to the OS
         if listdir(temp_directories["root"]) == []: # If animation has been stored here then don't delete it
             rmtree(temp_directories["root"], ignore_errors=True) 
     except OSError as exception_msg:
-        print(create_error_msg("INTERNAL", exception_msg))
+        print(create_error_msg("INTERNAL", exception_msg), file=get_job_stream("stdout"))
 
 
-def create_temp_files(overwrite_=True):
+def create_temp_files(overwrite_=True, job_=None):
     ''' Create temp directories and store their names
             status: finished
             return: None
             raise: ValueError
     '''
-    global temp_directories
+    if job_ != None: # Run in job_ (in-process API, see skj_job), otherwise in the current job
+        return job_.run(create_temp_files, overwrite_)
 
     from os.path import isdir
+    temp_directories = get_job().temp_directories
     if isdir(temp_directories["root"]):
         if overwrite_:
             cleanup_temp_files()
@@ -171,10 +348,24 @@ def create_temp_files(overwrite_=True):
     temp_directories["root"] = mkdtemp(suffix="__" + split(argv[0])[1], prefix="tmp__")
 
     for directory in temp_directories:
-        if directory != "root":
-            temp_directories[directory] = mkdtemp(suffix="__" + directory,
-                                                  prefix="tmp__",
-                                                  dir=temp_directories["root"])
+        if directory != "root" and directory not in temp_directories_lazy:
+            create_temp_dir(directory)
+
+
+def create_temp_dir(directory_):
+    ''' Create temp directory directory_ inside the root temp directory and store it's name
+            status: finished
+            return: str
+            raise: ValueError
+    '''
+    from os.path import isdir
+    temp_directories = get_job().temp_directories
+    if not isdir(temp_directories["root"]):
+        raise ValueError(create_error_msg("TEMP_DIR_NOT_EXIST", temp_directories["root"], False))
+
+    from tempfile import mkdtemp
+    temp_directories[directory_] = mkdtemp(suffix="__" + directory_, prefix="tmp__", dir=temp_directories["root"])
+    return temp_directories[directory_]
 
 
 def exit_with_failure(exit_msg_, exit_code_):
@@ -182,8 +373,8 @@ def exit_with_failure(exit_msg_, exit_code_):
             status: finished
             return: None
     '''
-    print(exit_msg_)
-    cleanup_temp_files()
+    print(exit_msg_, file=get_job_stream("stdout"))
+    get_job().close(exit_code_)
     exit(exit_codes[exit_code_])
 
 
@@ -192,7 +383,7 @@ def exit_with_success():
             status: finished
             return: None
     '''
-    cleanup_temp_files()
+    get_job().close()
     exit(exit_codes["SUCCESS"])
 #
 #                                                         FUNCTIONS (END)
@@ -14,83 +14,414 @@ __year__ = skj_std.__year__
 __maintainer__ = skj_std.__maintainer__
 
 
-def set_file_properties(file_, datetime_format_=skj_std.arguments_values['timeformat']):
-    ''' Get number of lines, min/max time value, min/max data and check time formatting on every line
+def split_source_lines(f_):
+    ''' Split binary file f_ into lines, every line is read && decoded once.
+        Lines are split on \\n, \\r\\n and \\r, just like in text mode.
+        status: finished
+        yield: (bytes, str) - line without line separator, decoded line
+        raise: ValueError
+    '''
+    for raw_line in f_:
+        if b'\r' in raw_line: # Old mac line separators, just split the line once more
+            for raw_part in raw_line.splitlines():
+                yield raw_part, raw_part.decode("utf-8") # raise UnicodeDecodeError (ValueError)
+        else:
+            raw_line = raw_line.rstrip(b'\n')
+            yield raw_line, raw_line.decode("utf-8")
+
+
+def read_source_lines(file_):
+    ''' Read lines of file_
+        status: finished
+        yield: (bytes, str) - line without line separator, decoded line
+        raise: ValueError
+    '''
+    with open(file_, mode="rb") as f:
+        yield from split_source_lines(f)
+
+
+def read_source_range(file_, start_, end_):
+    ''' Read lines of file_ starting at byte start_ and ending before byte end_
+        status: finished
+        yield: (bytes, str) - line without line separator, decoded line
+        raise: ValueError
+    '''
+    from io import BytesIO
+
+    with open(file_, mode="rb") as f:
+        f.seek(start_)
+        yield from split_source_lines(BytesIO(f.read(end_ - start_)))
+
+
+def get_source_ranges(file_, ranges_):
+    ''' Split file_ into at most ranges_ byte ranges of about the same size, every range ends after a \\n
+        status: finished
+        return: list of (start, end) tuples
+        raise: OSError
+    '''
+    from os.path import getsize
+
+    file_size = getsize(file_)
+    ranges = list()
+    start = 0
+    with open(file_, mode="rb") as f:
+        for i in range(1, ranges_):
+            if start >= file_size * i // ranges_: # Previous range has ended after this one should have
+                continue
+            f.seek(file_size * i // ranges_)
+            f.readline() # Move to the start of the next line
+            end = f.tell()
+            if end >= file_size:
+                break
+            ranges.append((start, end))
+            start = end
+    ranges.append((start, file_size))
+
+    return ranges
+
+
+def scan_lines(lines_, datetime_format_):
+    ''' Get number of lines, min/max time value, min/max data of lines_ and check time formatting on every line.
+        Every record is also stored into the record store: it's line (bytes), time (epoch seconds) and data
         status: finished
         raise: ValueError
         return: dict / None
     '''
-    with open(file_, mode="r", encoding="utf-8") as f:
-        first_line = f.readline() # Read first line
+    from array import array
+    from calendar import timegm
+    from skj_checker_common import check_time_format, check_float_ok, get_time_parser
+
+    parse_time = get_time_parser(datetime_format_) # Format is compiled only once for the whole file
+    records = {"lines": list(), "times": array('d'), "values": array('d')}
+
+    for raw_line, first_line in lines_: # Read first line
+        if first_line and not first_line.isspace(): # Skip lines containing only whitespaces
+            break
+    else: # Skip files containing only whitespaces
+        return None
+
+    num_of_lines = 1  # First line is read for setting first_line/time_max before the loop
+    first_line = first_line.strip() # Remove trailing/foregoing whitespaces
+
+    # Default values for date/data min/max are the values of first record
+    data_min = check_float_ok(first_line[first_line.rfind(' '):].strip(), False) # Last fields belongs to data
+    data_max = data_min 
+    time_min = check_time_format((first_line[:first_line.rfind(' ')], datetime_format_), False)  # raise ValueError 
+    time_max = time_min
+
+    records["lines"].append(raw_line + b'\n')
+    records["times"].append(timegm(time_min))
+    records["values"].append(data_min)
+
+    for raw_line, one_line in lines_:
+        if not one_line or one_line.isspace(): # Skip lines containing only whitespaces
+            continue
 
-        while first_line.isspace(): # Skip lines containing only whitespaces
-            first_line = f.readline()
-        if first_line == '': # Skip files containing only whitespaces
-            return None
+        num_of_lines += 1  # Count lines in file
+        one_line = one_line.strip() # Prepare line for processing
+
+        # Grab data(float) from record
+        data_from_line = check_float_ok(one_line[one_line.rfind(' '):].strip(), False)
+        try:
+            date_from_line = parse_time(one_line[:one_line.rfind(' ')])
+        except (ValueError, TypeError): # Let the checker create the error message
+            date_from_line = check_time_format((one_line[:one_line.rfind(' ')], datetime_format_), False)
+
+        # Find min/max in data
+        data_max = max(data_max, data_from_line)
+        data_min = min(data_min, data_from_line)
+
+        # Find min/max in date
+        time_max = max(time_max, date_from_line)
+        time_min = min(time_min, date_from_line)
+
+        # Store the record, so the file never has to be read again
+        records["lines"].append(raw_line + b'\n')
+        records["times"].append(timegm(date_from_line))
+        records["values"].append(data_from_line)
+
+    return {"num_of_lines": num_of_lines, "time_min": time_min, "time_max": time_max,
+            "data_column": len(first_line.split()), "data_min": data_min, "data_max": data_max, "records": records}
+
+
+def scan_mapped_range(file_, start_, end_, datetime_format_):
+    ''' Scan byte range start_ ... end_ - 1 of memory mapped file_ just like scan_lines does, but on bytes.
+        Whitespace-only lines are skipped without decoding, date and data are parsed from memoryviews
+        and only lines with non-ASCII bytes (or with errors) are decoded.
+        status: finished
+        raise: ValueError
+        return: dict / None
+    '''
+    from array import array
+    from calendar import timegm
+    from math import isinf, isnan
+    from mmap import mmap, ACCESS_READ
+    from re import compile as re_compile
+    from skj_checker_common import check_time_format, check_float_ok, get_time_parser
 
-        num_of_lines = 1  # First line is read for setting first_line/time_max before the loop
-        first_line = first_line.strip() # Remove trailing/foregoing whitespaces
+    parse_time = get_time_parser(datetime_format_, bytes_=True)
+    records = {"lines": list(), "times": array('d'), "values": array('d')}
+    num_of_lines = 0
+    first_line = None
 
-        # Default values for date/data min/max are the values of first record
-        from skj_checker_common import check_time_format, check_float_ok
-        data_min = check_float_ok(first_line[first_line.rfind(' '):].strip(), False) # Last fields belongs to data
-        data_max = data_min 
-        time_min = check_time_format((first_line[:first_line.rfind(' ')], datetime_format_), False)  # raise ValueError 
-        time_max = time_min
+    with open(file_, mode="rb") as f, mmap(f.fileno(), 0, access=ACCESS_READ) as mm:
+        # Text mode splits lines on \r too and str.strip() knows more whitespaces than bytes.strip()
+        if re_compile(rb"[\r\x1c-\x1f]").search(mm, start_, end_):
+            return scan_lines(read_source_range(file_, start_, end_), datetime_format_)
 
-        for one_line in f:
-            if one_line.isspace(): # Skip lines containing only whitespaces
+        mm.seek(start_)
+        while mm.tell() < end_:
+            raw_line = mm.readline()
+            one_line = raw_line.strip()
+            if not one_line: # Skip lines containing only whitespaces
                 continue
 
+            data_from_line = None
+            if one_line.isascii(): # Grab data(float) and date from record
+                line_view = memoryview(one_line)
+                try:
+                    data_from_line = float(line_view[one_line.rfind(b' '):])
+                    date_from_line = parse_time(line_view[:one_line.rfind(b' ')])
+                except (ValueError, TypeError):
+                    data_from_line = None
+
+            if data_from_line == None or isnan(data_from_line) or isinf(data_from_line):
+                one_line = raw_line.decode("utf-8").strip() # Non-ASCII or bad record, check it as text
+                if not one_line: # Non-ASCII whitespaces
+                    continue
+                data_from_line = check_float_ok(one_line[one_line.rfind(' '):].strip(), False)
+                date_from_line = check_time_format((one_line[:one_line.rfind(' ')], datetime_format_), False)
+
             num_of_lines += 1  # Count lines in file
-            one_line = one_line.strip() # Prepare line for processing
+            if first_line == None: # Default values for date/data min/max are the values of first record
+                first_line = one_line
+                data_min = data_max = data_from_line
+                time_min = time_max = date_from_line
+            else:
+                data_max = max(data_max, data_from_line)
+                data_min = min(data_min, data_from_line)
+                time_max = max(time_max, date_from_line)
+                time_min = min(time_min, date_from_line)
 
-            # Grab data(float) from record
-            data_from_line = check_float_ok(one_line[one_line.rfind(' '):].strip(), False)
-            date_from_line = check_time_format((one_line[:one_line.rfind(' ')], datetime_format_), False)
+            # Store the record, so the file never has to be read again
+            records["lines"].append(raw_line if raw_line.endswith(b'\n') else raw_line + b'\n')
+            records["times"].append(timegm(date_from_line))
+            records["values"].append(data_from_line)
+
+    if first_line == None: # Skip files containing only whitespaces
+        return None
+
+    return {"num_of_lines": num_of_lines, "time_min": time_min, "time_max": time_max,
+            "data_column": len(first_line.split()), "data_min": data_min, "data_max": data_max, "records": records}
+
+
+def scan_source_range(file_, start_, end_, datetime_format_):
+    ''' Scan byte range start_ ... end_ - 1 of file_, this is run by the scanning processes
+        status: finished
+        raise: ValueError
+        return: dict / None
+    '''
+    return scan_mapped_range(file_, start_, end_, datetime_format_)
+
+
+def init_scan_job(arguments_values_):
+    ''' Scanning processes need the arguments for creating error messages
+        status: finished
+        return: None
+        raise: None
+    '''
+    skj_std.arguments_values = arguments_values_
+
+
+def merge_file_properties(file_, parts_):
+    ''' Merge properties of consecutive parts_ of file_ into properties of the whole file
+        status: finished
+        raise: None
+        return: dict / None
+    '''
+    parts = [part for part in parts_ if part != None] # Parts with only whitespaces
+    if not parts:
+        return None
+
+    file_properties = {"path": file_, "date_column": 1, "data_column": parts[0]['data_column'], # First line
+                       "num_of_lines": sum(part['num_of_lines'] for part in parts),
+                       "time_min": min(part['time_min'] for part in parts),
+                       "time_max": max(part['time_max'] for part in parts),
+                       "data_min": min(part['data_min'] for part in parts),
+                       "data_max": max(part['data_max'] for part in parts),
+                       "records": parts[0]['records']}
+    for part in parts[1:]:
+        for record_property in file_properties['records']:
+            file_properties['records'][record_property] += part['records'][record_property]
+
+    return file_properties
+
+
+def scan_download(f_, datetime_format_=None):
+    ''' Scan binary file-like f_ (downloading source) just like scan_lines does
+        status: finished
+        raise: ValueError
+        return: dict / None
+    '''
+    if datetime_format_ == None:
+        datetime_format_ = skj_std.arguments_values['timeformat']
+
+    return scan_lines(split_source_lines(f_), datetime_format_)
+
+
+def set_file_properties(file_, datetime_format_=None, job_=None):
+    ''' Get number of lines, min/max time value, min/max data and check time formatting on every line
+        status: finished
+        raise: ValueError
+        return: dict / None
+    '''
+    from os.path import getsize
+
+    if job_ != None: # Run in job_ (in-process API, see skj_job), otherwise in the current job
+        return job_.run(set_file_properties, file_, datetime_format_)
 
-            # Find min/max in data
-            data_max = max(data_max, data_from_line)
-            data_min = min(data_min, data_from_line)
+    if datetime_format_ == None:
+        datetime_format_ = skj_std.arguments_values['timeformat']
 
-            # Find min/max in date
-            time_max = max(time_max, date_from_line)
-            time_min = min(time_min, date_from_line)
+    if file_ in skj_std.downloaded_sources: # Scanned while downloading
+        file_properties = skj_std.downloaded_sources.pop(file_)
+        if isinstance(file_properties, ValueError):
+            raise file_properties
+        return merge_file_properties(file_, [file_properties])
 
-    return {"path": file_, "num_of_lines": num_of_lines, "time_min": time_min, "time_max": time_max, 
-            "date_column": 1, "data_column": len(first_line.split()), "data_min": data_min,
-            "data_max": data_max}
+    mmap_size = 1024 * 1024 # Smaller files are faster to read than to map
+    if getsize(file_) >= mmap_size:
+        return merge_file_properties(file_, [scan_mapped_range(file_, 0, getsize(file_), datetime_format_)])
+    return merge_file_properties(file_, [scan_lines(read_source_lines(file_), datetime_format_)])
 
 
-def set_file_name(base_of_name_=""):
-    ''' Create unique file name each time called
+def scan_files_properties(files_, datetime_format_=None):
+    ''' Scan properties of all files_, using arguments_values['jobs'] processes.
+        Big files are split into byte ranges scanned in parallel too.
+        status: finished
+        raise: ValueError
+        return: list of dict / None
+    '''
+    if datetime_format_ == None:
+        datetime_format_ = skj_std.arguments_values['timeformat']
+
+    if skj_std.arguments_values['jobs'] == 1:
+        return [set_file_properties(f, datetime_format_) for f in files_]
+
+    import multiprocessing
+    import threading
+    from concurrent.futures import ProcessPoolExecutor
+    from os.path import getsize
+    range_size = 16 * 1024 * 1024 # Smaller ranges are not worth of sending the records between processes
+    context = multiprocessing.get_context("fork")
+    if threading.active_count() > 1: # Fork would copy locks held && files opened by the other threads (jobs)
+        context = multiprocessing.get_context("forkserver")
+
+    try:
+        with ProcessPoolExecutor(max_workers=skj_std.arguments_values['jobs'], mp_context=context, \
+                                 initializer=init_scan_job, initargs=(skj_std.arguments_values,)) as executor:
+            files_parts = list()
+            for f in files_:
+                if f in skj_std.downloaded_sources: # Already scanned while downloading
+                    files_parts.append(None)
+                    continue
+                ranges = get_source_ranges(f, max(1, min(skj_std.arguments_values['jobs'], getsize(f) // range_size)))
+                files_parts.append([executor.submit(scan_source_range, f, start, end, datetime_format_) \
+                                    for start, end in ranges])
+
+            files_properties = list()
+            for f, file_parts in zip(files_, files_parts):
+                if file_parts == None:
+                    files_properties.append(set_file_properties(f, datetime_format_))
+                else: # Results are collected in order, so the error of the first bad record is raised
+                    files_properties.append(merge_file_properties(f, [part.result() for part in file_parts]))
+    except OSError as exception_msg:
+        raise ValueError(skj_std.create_error_msg("PYTHON", exception_msg, False))
+
+    return files_properties
+
+
+def set_files_properties(files_, datetime_format_=None, job_=None):
+    ''' Set properties of all files_. Properties of files unchanged since the last run are loaded from
+        the cache, only the other files are scanned (and cached afterwards).
+        status: finished
+        raise: ValueError
+        return: list of dict / None
+    '''
+    import skj_cache
+
+    if job_ != None: # Run in job_ (in-process API, see skj_job), otherwise in the current job
+        return job_.run(set_files_properties, files_, datetime_format_)
+
+    if datetime_format_ == None: # Not default value of the argument, daemon runs jobs with other time formats
+        datetime_format_ = skj_std.arguments_values['timeformat']
+
+    cached = [skj_cache.load_file_properties(f, datetime_format_) for f in files_]
+    missing = [i for i, (key, file_properties) in enumerate(cached) if file_properties == None]
+    scanned = scan_files_properties([files_[i] for i in missing], datetime_format_) if missing else list()
+
+    files_properties = [file_properties for key, file_properties in cached]
+    for i, file_properties in zip(missing, scanned):
+        skj_cache.store_file_properties(cached[i][0], file_properties)
+        files_properties[i] = file_properties
+
+    return files_properties
+
+
+def get_file_name(frame_, base_of_name_=""):
+    ''' Create file name of frame_, the name is unique for each frame
         status: finished
         return: str
         raise: None
     '''
-    for x in range(0, skj_std.arguments_values['frames']):
-        num_of_zeroes = len(str(skj_std.arguments_values['frames'])) - len(str(x))
-        yield base_of_name_ + "_" + num_of_zeroes * "0" + str(x) + ".png"
+    num_of_zeroes = len(str(skj_std.arguments_values['frames'])) - len(str(frame_))
+    return base_of_name_ + "_" + num_of_zeroes * "0" + str(frame_) + ".png"
 
 
 def create_output_command(filename_):
-    ''' Create output command for given filename_
+    ''' Create output command for given filename_, frames streamed to ffmpeg go to gnuplot stdout
         status: finished
         return: str
         raise: None
     '''
+    if skj_std.arguments_values['stream']:
+        return "set output\n"
+
     from os.path import join
     return "set output '" + join(skj_std.temp_directories['gnuplot'], filename_) + "'\n"
 
+def use_epoch_times():
+    ''' Check whether gnuplot gets times as epoch seconds (with --epoch or --binary) instead of formatted strings
+        status: finished
+        return: bool
+        raise: None
+    '''
+    return bool(skj_std.arguments_values['epoch'] or skj_std.arguments_values['binary'])
+
+
+def get_epoch_time(time_):
+    ''' Convert time_ formatted by arguments_values['timeformat'] to epoch seconds
+        status: finished
+        return: int
+        raise: ValueError
+    '''
+    from calendar import timegm
+    from skj_checker_common import check_time_format
+
+    return timegm(check_time_format((time_, skj_std.arguments_values['timeformat']), False)) # raise ValueError
+
+
 def configure_crit_values(x_color_="red", y_color="red"):
     ''' Draw lines for each critical value
         status: finished
         return: str
-        raise: None
+        raise: ValueError
     '''
     configuration = ""
     
     for x_crits in skj_std.arguments_values['criticalvalue']['x']:
+        if use_epoch_times():
+            x_crits = str(get_epoch_time(x_crits)) # raise ValueError
         configuration += 'set arrow from "' + x_crits + '", graph 0 to "' + x_crits + \
                          '", graph 1 nohead lc rgb "' + x_color_ + '"\n'
 
@@ -100,8 +431,8 @@ def configure_crit_values(x_color_="red", y_color="red"):
 
     return configuration
 
-def get_record_extremes(type_):
-    ''' Get global date/data min/max. type_ can be "time" or "data"
+def get_record_extremes(type_, format_=True):
+    ''' Get global date/data min/max. type_ can be "time" or "data", time is formatted unless format_ is False
         status: finished
         return: tuple
         raise: IndexError, ValueError
@@ -116,7 +447,7 @@ def get_record_extremes(type_):
         maximum = max(maximum, f[type_ + '_max'])
         minimum = min(minimum, f[type_ + '_min'])
         
-    if type_ == "time":
+    if type_ == "time" and format_:
         from time import strftime
         try:      
             maximum = strftime(skj_std.arguments_values['timeformat'], maximum)
@@ -133,16 +464,33 @@ def configure_xy_basics():
         return: str
         raise: IndexError, ValueError
     '''
-    configuration  = 'set timefmt "' + skj_std.arguments_values['timeformat'] + '"\n'
-    configuration += 'set xdata time\n'
+    from calendar import timegm
+
+    if use_epoch_times(): # Times are parsed only once by the script, tics are still formatted the user's way
+        configuration  = 'set timefmt "%s"\n'
+        configuration += 'set xdata time\n'
+        configuration += 'set format x "' + skj_std.arguments_values['timeformat'] + '" timedate\n'
+    else:
+        configuration  = 'set timefmt "' + skj_std.arguments_values['timeformat'] + '"\n'
+        configuration += 'set xdata time\n'
     configuration += 'set grid\n'
     configuration += 'unset key\n'
 
     data_max, data_min = get_record_extremes(type_="data") # raise IndexError, ValueError 
     time_max, time_min = get_record_extremes(type_="time") # raise IndexError, ValueError
+    epoch_max, epoch_min = [timegm(t) for t in get_record_extremes(type_="time", format_=False)]
 
     for value in ["ymax", "ymin", "xmax", "xmin"]:
-        if skj_std.arguments_values[value] == "auto":
+        if value[0] == "x" and use_epoch_times(): # Numeric range, no time strings
+            if skj_std.arguments_values[value] == "auto":
+                skj_std.arguments_values[value] = "*"
+            elif skj_std.arguments_values[value] == "max":
+                skj_std.arguments_values[value] = str(epoch_max)
+            elif skj_std.arguments_values[value] == "min":
+                skj_std.arguments_values[value] = str(epoch_min)
+            else:
+                skj_std.arguments_values[value] = str(get_epoch_time(skj_std.arguments_values[value]))
+        elif skj_std.arguments_values[value] == "auto":
             skj_std.arguments_values[value] = "*"
         elif skj_std.arguments_values[value] == "max":
             if value == "ymax":
@@ -165,79 +513,581 @@ def configure_xy_basics():
 
     return configuration
 
-def create_frames_oneline(process_, filename_, date_column_, data_column_):
-    ''' Create animation frames for "oneline" plot type
+def load_frame_streams():
+    ''' Get records of all source files from the record store and split them into streams plotted by gnuplot.
+        Oneline animation has one stream made of all the records, multiplot has one stream per source file.
+        Every stream is shuffled, the same records are always shuffled the same way so cached frames can be reused.
+        Stream is a dict of "lines" (records in the plotting order) and their "points" packed for binary transfer
+        (or raster renderer).
+        status: finished
+        return: list of dict
+        raise: IndexError
+    '''
+    from hashlib import sha1
+    from random import Random
+
+    streams_records = list()
+    for source_file in skj_std.arguments_values['source']:
+        if skj_std.arguments_values['animation_type'] == "oneline" and streams_records:
+            streams_records[0].append(source_file['records']) # Oneline plots records of all files as one line
+        else:
+            streams_records.append([source_file['records']])
+
+    streams = list()
+    for stream_records in streams_records:
+        lines = [line for records in stream_records for line in records['lines']]
+        records = sha1()
+        for record in lines:
+            records.update(record)
+        order = list(range(0, len(lines))) # Shuffle depends only on the length, so records follow the same order
+        Random(records.digest()).shuffle(order) # Randomize those records
+        if skj_std.arguments_values['epoch']:
+            lines = get_epoch_lines(stream_records)
+        streams.append({"lines": [lines[i] for i in order], "points": None, "plotted_points": None})
+
+        if skj_std.arguments_values['decimate']:
+            decimate_frame_stream(streams[-1]['lines'], order, stream_records)
+        if skj_std.arguments_values['binary'] or skj_std.arguments_values['renderer'] == "raster":
+            pack_frame_stream(streams[-1], order, stream_records)
+
+    return streams
+
+
+def get_stream_points(stream_records_):
+    ''' Get times && values of all records of stream, in the order they are in source files
+        status: finished
+        return: (array, array)
+        raise: None
+    '''
+    from array import array
+
+    times, values = array('d'), array('d')
+    for records in stream_records_:
+        times.extend(records['times'])
+        values.extend(records['values'])
+
+    return times, values
+
+
+def get_epoch_lines(stream_records_):
+    ''' Get records of stream as lines with epoch seconds && value, so gnuplot does not parse the time strings
+        status: finished
+        return: list
+        raise: None
+    '''
+    times, values = get_stream_points(stream_records_)
+    return [b"%d %r\n" % (time, value) for time, value in zip(times, values)]
+
+
+def pack_frame_stream(stream_, order_, stream_records_):
+    ''' Pack times && values of stream_ records (but decimated) into one array of float64 pairs in plotting order.
+        Frames send just a memoryview of its beginning to gnuplot, so records are never encoded again.
+        If some records are decimated, "plotted_points" holds number of points packed from first k records.
         status: finished
         return: None
         raise: None
     '''
-    gnuplot_data = str()
-    file_lines = list()
-    
-    for source_file in skj_std.arguments_values['source']:
-        with open(source_file['path'], encoding="utf-8", mode="r") as f:
-            file_lines += f.readlines()
-        if not file_lines[-1].endswith('\n'): # Same as with multiplot
-            file_lines[-1] += '\n'
+    from array import array
 
-    from random import seed, shuffle
-    seed()
-    shuffle(file_lines)    
+    times, values = get_stream_points(stream_records_)
+    packed = [record for i, record in enumerate(order_) if stream_['lines'][i]] # Decimated records are empty
 
-    for source_file in skj_std.arguments_values['source']:
-        for number in source_file['adding_seq']:
-        # len(adding_seq) = num_of_frames => for each frame ...
-            for i in range(0, number):
-            # ... add the number of records that should be added to this frame
-                gnuplot_data += file_lines.pop()
+    stream_['points'] = array('d', bytes(16 * len(packed)))
+    stream_['points'][0::2] = array('d', [times[record] for record in packed])
+    stream_['points'][1::2] = array('d', [values[record] for record in packed])
+
+    if len(packed) != len(order_):
+        plotted_points = array('L', [0])
+        for line in stream_['lines']:
+            plotted_points.append(plotted_points[-1] + (1 if line else 0))
+        stream_['plotted_points'] = plotted_points
+
+
+def get_decimation_grid():
+    ''' Get the grid of pixels records are decimated to: (x origin, x pixels per second, y origin, y pixels per value).
+        The grid spans the whole frame, so it is a bit finer than the plot itself (without borders, tics, labels).
+        There is no grid if any range is autoscaled: every frame is scaled to the records plotted so far, so early
+        frames have much smaller pixels than the whole range. Neither with raw gnuplot params: records may be
+        plotted as lines (eg. "set style data lines"), so every one of them shapes the plot.
+        status: finished
+        return: tuple / None
+        raise: IndexError
+    '''
+    from calendar import timegm
+    from skj_checker_common import get_time_parser
+
+    if any(skj_std.arguments_values[value] in ["auto", "*"] for value in ["xmin", "xmax", "ymin", "ymax"]):
+        # "*" is auto range already passed to gnuplot, see configure_xy_basics()
+        skj_std.print_msg_verbose(info_=skj_std.create_info_msg("records not decimated: x/y range is auto"))
+        return None
+    if skj_std.arguments_values['gnuplotparams']:
+        skj_std.print_msg_verbose(info_=skj_std.create_info_msg("records not decimated: raw gnuplot params"))
+        return None
 
-            plot =  "plot '-' using " + date_column_ + ":" + data_column_ + "\n"
+    time_max, time_min = get_record_extremes("time", False) # raise IndexError
+    data_max, data_min = get_record_extremes("data") # raise IndexError
+    x_range = [timegm(time_min), timegm(time_max)]
+    y_range = [data_min, data_max]
+    for i, value in enumerate(["xmin", "xmax"]): # User ranges make the plot (and its pixels) smaller
+        try:
+            if use_epoch_times():
+                x_range[i] = float(skj_std.arguments_values[value])
+            else:
+                x_range[i] = timegm(get_time_parser(skj_std.arguments_values['timeformat'])( \
+                                    skj_std.arguments_values[value].strip('"')))
+        except (ValueError, TypeError, AttributeError):
+            pass # "min"/"max" range is as wide as records are
+    for i, value in enumerate(["ymin", "ymax"]):
+        try:
+            y_range[i] = float(skj_std.arguments_values[value])
+        except (ValueError, TypeError):
+            pass
 
-            process_.stdin.write(create_output_command(next(filename_)).encode())
-            process_.stdin.write(plot.encode())
-            process_.stdin.write(gnuplot_data.encode())
-            process_.stdin.write("e\n".encode())
+    width, height = get_frame_size()
+    x_scale = width / abs(x_range[1] - x_range[0]) if x_range[1] != x_range[0] else 0 # Range can be reversed
+    y_scale = height / abs(y_range[1] - y_range[0]) if y_range[1] != y_range[0] else 0
+    return x_range[0], x_scale, y_range[0], y_scale
 
 
-def create_frames_multiplot(process_, filename_, date_column_, data_column_):
-    ''' Create animation frames for "multiplot" plot type
+def decimate_frame_stream(stream_, order_, stream_records_):
+    ''' Replace records of stream_ hidden by previously plotted records (in the same pixel) by empty bytes.
+        Frames are cumulative, so the hiding record stays plotted in all the following frames, and the frames
+        look the same with only at most one record per pixel. Empty records are skipped when sent to gnuplot.
         status: finished
         return: None
+        raise: IndexError
+    '''
+    from math import floor
+
+    grid = get_decimation_grid() # raise IndexError
+    if grid == None:
+        return
+
+    times, values = get_stream_points(stream_records_)
+    x_origin, x_scale, y_origin, y_scale = grid
+    pixels = set()
+    for i, record in enumerate(order_):
+        pixel = (floor((times[record] - x_origin) * x_scale), floor((values[record] - y_origin) * y_scale))
+        if pixel in pixels:
+            stream_[i] = b''
+        else:
+            pixels.add(pixel)
+
+    skj_std.print_msg_verbose(info_=skj_std.create_info_msg("decimated records: " + \
+                                                            str(len(stream_) - len(pixels)) + "/" + str(len(stream_))))
+
+
+def create_frame_counter():
+    ''' Create function returning the number of records plotted from each stream after given frame.
+        Nothing is precomputed per frame, the counts come from the frame schedules (adding_seq) of files.
+        status: finished
+        return: function
         raise: None
     '''
-    from random import seed, shuffle
-    seed()
+    from bisect import bisect_right
 
-    for source_file in skj_std.arguments_values['source']:
-    # This prepares files for processing
-        with open(source_file['path'], encoding="utf-8", mode="r") as f:
-            source_file['data_list'] = f.readlines() # Load every file's records into memory
-        
-        # Files without empty line at the EOF would fail otherwise
-        if not source_file['data_list'][-1].endswith('\n'):
-            source_file['data_list'][-1] += '\n'
+    sources = skj_std.arguments_values['source']
+    if skj_std.arguments_values['animation_type'] == "oneline":
+        first_frames = [0] # Files are drawn one after another, so every file starts where the previous ended
+        first_records = [0]
+        for source_file in sources:
+            first_frames.append(first_frames[-1] + len(source_file['adding_seq']))
+            first_records.append(first_records[-1] + source_file['num_of_lines'])
+
+        def count_frame(frame_):
+            i = bisect_right(first_frames, frame_) - 1
+            return (first_records[i] + sources[i]['adding_seq'].plotted(frame_ - first_frames[i]),)
+    else:
+        def count_frame(frame_): # Files which have no more records keep all of them plotted
+            return tuple(f['adding_seq'].plotted(min(frame_, len(f['adding_seq']) - 1)) for f in sources)
 
-        shuffle(source_file['data_list']) # Randomize those records
-        source_file['data_str'] = str() # And prepare string those records will be moved to
+    return count_frame
 
-    for i in range(0, skj_std.arguments_values['frames']):
-    # This creates every single frame
+
+def get_frame_cost(counts_):
+    ''' Get the cost of drawing one frame with counts_ records plotted from the streams
+        status: finished
+        return: int
+        raise: None
+    '''
+    return 100 + sum(counts_) # Drawing empty frame (axes, grid, labels) costs about as much as drawing 100 records
+
+
+def get_frames_cost(frames_):
+    ''' Get the cost of drawing first frames_ frames, it is the sum of plotted records plus overhead of frames
+        status: finished
+        return: int
+        raise: None
+    '''
+    frames_cost = frames_ * get_frame_cost(())
+
+    if skj_std.arguments_values['animation_type'] == "oneline":
+        first_frame = first_record = 0
         for source_file in skj_std.arguments_values['source']:
-            if len(source_file['adding_seq']) != 0: # If this file still has records... 
-                for i in range(0, source_file['adding_seq'].pop(0)): # ... add them to string passed to gnuplot
-                    source_file['data_str'] += source_file['data_list'].pop() 
-
-        # Start the plot command ... 
-        plot =  "plot"
-        for i in skj_std.arguments_values['source']: # ... create the command body ...
-            plot += " '-' using " + date_column_ + ":" + data_column_ + ","
-        plot = plot[:-1] + "\n" # ... and finish it
-
-        process_.stdin.write(create_output_command(next(filename_)).encode())
-        process_.stdin.write(plot.encode())
+            file_frames = max(0, min(frames_ - first_frame, len(source_file['adding_seq'])))
+            frames_cost += file_frames * first_record + source_file['adding_seq'].plotted_sum(file_frames)
+            first_frame += len(source_file['adding_seq'])
+            first_record += source_file['num_of_lines']
+    else:
         for source_file in skj_std.arguments_values['source']:
-            process_.stdin.write(source_file['data_str'].encode())
-            process_.stdin.write("e\n".encode())
+            file_frames = min(frames_, len(source_file['adding_seq']))
+            frames_cost += source_file['adding_seq'].plotted_sum(file_frames) + \
+                           (frames_ - file_frames) * source_file['num_of_lines']
+
+    return frames_cost
+
+
+def split_frames(jobs_, skip_=None):
+    ''' Split frames into at most jobs_ continuous ranges which take about the same time to draw.
+        Frames are cumulative, so the ranges at the end of animation have less frames than those at the start.
+        Frames marked in skip_ are not drawn at all (they are cached), so they cost nothing.
+        status: finished
+        return: list of (first, last) tuples, last frame is not included
+        raise: None
+    '''
+    frames = skj_std.arguments_values['frames']
+    get_cost = get_frames_cost
+    if skip_ != None: # No shortcut here, cost of every frame has to be summed
+        count_frame = create_frame_counter()
+        costs = [0]
+        for frame in range(0, frames):
+            costs.append(costs[-1] + (0 if skip_[frame] else get_frame_cost(count_frame(frame))))
+        get_cost = costs.__getitem__
+
+    frames_cost = get_cost(frames)
+    if frames_cost == 0:
+        return list()
+
+    ranges = list()
+    first = 0
+    for job in range(1, jobs_):
+        if first == frames:
+            break
+        low, high = first + 1, frames # Find the first range end, which costs at least job/jobs_ of all frames
+        while low < high:
+            middle = (low + high) // 2
+            if get_cost(middle) < frames_cost * job / jobs_:
+                low = middle + 1
+            else:
+                high = middle
+        ranges.append((first, low))
+        first = low
+    if first < frames:
+        ranges.append((first, frames))
+
+    return ranges
+
+
+def create_plot_command(streams_, date_column_, data_column_):
+    ''' Create plot command reading every stream from gnuplot input or from datablock $S<stream> if incremental
+        status: finished
+        return: str
+        raise: None
+    '''
+    if skj_std.arguments_values['incremental']:
+        sources = ["$S" + str(i) for i in range(0, streams_)]
+    else:
+        sources = ["'-'"] * streams_
+
+    return "plot " + ", ".join([s + " using " + date_column_ + ":" + data_column_ for s in sources]) + "\n"
+
+
+def create_binary_plot_command(points_):
+    ''' Create plot command reading points_[i] float64 (time, value) pairs of stream i from gnuplot input
+        status: finished
+        return: str
+        raise: None
+    '''
+    return "plot " + ", ".join(["'-' binary record=(" + str(points) + ") format='%float64%float64' using 1:2" \
+                                for points in points_]) + "\n"
+
+
+def create_datablock_append(stream_, records_):
+    ''' Create commands appending records_ to datablock of stream_, so gnuplot gets every record just once
+        status: finished
+        return: bytes
+        raise: None
+    '''
+    commands = [b"set print $S" + str(stream_).encode() + b" append\n"]
+    for record in records_: # Single quoted gnuplot string only needs to have the quotes doubled
+        if record: # Decimated records are empty
+            commands.append(b"print '" + record[:-1].replace(b"'", b"''") + b"'\n")
+    commands.append(b"unset print\n")
+
+    return b''.join(commands)
+
+
+def start_gnuplot(output_=None):
+    ''' Start gnuplot in working directory of the job, its stdout is redirected to output_. Daemon gives one of
+        its warm gnuplots instead if frames go into files.
+        status: finished
+        return: subprocess.Popen
+        raise: OSError
+    '''
+    import subprocess
+
+    if output_ == None and skj_std.gnuplot_workers != None:
+        from skj_daemon import take_gnuplot_worker
+        return take_gnuplot_worker() # raise OSError
+
+    return subprocess.Popen(["gnuplot"], stdin=subprocess.PIPE, stdout=output_, stderr=skj_std.get_job().stderr, \
+                            cwd=skj_std.get_job().cwd)
+
+
+def stop_gnuplot(gnuplot_, stdin_=None):
+    ''' Let gnuplot_ finish all frames written into stdin_ (None if drawing has failed) and wait for it.
+        Warm gnuplot of the daemon is kept for the next job instead.
+        status: finished
+        return: None
+        raise: OSError
+    '''
+    if skj_std.gnuplot_workers != None:
+        from skj_daemon import is_gnuplot_worker, release_gnuplot_worker
+        if is_gnuplot_worker(gnuplot_):
+            release_gnuplot_worker(gnuplot_, stdin_)
+            if stdin_ != None and stdin_ is not gnuplot_.stdin: # Only counted pipe is closed, gnuplot stays
+                stdin_.close()
+            return
+
+    try:
+        if stdin_ != None:
+            stdin_.write("quit\n".encode())
+            stdin_.close() # Closed by Popen anyway, this passes the bytes written to the profile
+    finally:
+        with gnuplot_: # Waits for gnuplot
+            pass
+
+
+def draw_frames(gnuplot_config_, streams_, first_, last_, date_column_, data_column_, output_=None, skip_=None):
+    ''' Draw frames first_ ... last_ - 1 (but those marked in skip_) using one gnuplot process,
+        its stdout is redirected to output_
+        status: finished
+        return: None
+        raise: None
+    '''
+    from skj_profile import count_pipe
+    from skj_progress import update_progress
+
+    frames = range(first_, last_)
+    if skip_ != None:
+        frames = [frame for frame in frames if not skip_[frame]]
+        if not frames:
+            return
+
+    plot = create_plot_command(len(streams_), date_column_, data_column_)
+    count_frame = create_frame_counter()
+
+    gnuplot = start_gnuplot(output_) # raise OSError
+    stdin = count_pipe(gnuplot.stdin, "gnuplot_stdin_bytes")
+    drawn = False
+    try:
+        stdin.write(gnuplot_config_.encode())
+
+        if skj_std.arguments_values['incremental']:
+            plotted = [0] * len(streams_) # First frame gets all the records plotted so far, next ones only new
+            for i in range(0, len(streams_)):
+                stdin.write(("$S" + str(i) + " << EOD\nEOD\n").encode()) # Empty datablock per stream
+
+        for frame in frames: # Skipped records are appended to datablocks in the next drawn frame
+            stdin.write(create_output_command(get_file_name(frame, "g")).encode())
+            if skj_std.arguments_values['incremental']:
+                for i, count in enumerate(count_frame(frame)):
+                    if count > plotted[i]:
+                        stdin.write(create_datablock_append(i, streams_[i]['lines'][plotted[i]:count]))
+                        plotted[i] = count
+                stdin.write(plot.encode())
+            elif skj_std.arguments_values['binary']: # Packed points are sent without any copying
+                points = [count if stream['plotted_points'] == None else stream['plotted_points'][count] \
+                          for stream, count in zip(streams_, count_frame(frame))]
+                stdin.write(create_binary_plot_command(points).encode())
+                for stream, count in zip(streams_, points):
+                    stdin.write(memoryview(stream['points'])[:2 * count])
+            else:
+                stdin.write(plot.encode())
+                for stream, count in zip(streams_, count_frame(frame)):
+                    stdin.write(b''.join(stream['lines'][:count]))
+                    stdin.write("e\n".encode())
+            update_progress(1, stdin)
+        drawn = True
+    finally: # Gnuplot which has failed is not kept by the daemon
+        stop_gnuplot(gnuplot, stdin if drawn else None)
+
+
+def iter_frame_keys(frame_config_, streams_):
+    ''' Yield (frame, key) for every frame, key is a hash of frame_config_ and all the records plotted in frame.
+        Plotted records are prefixes of streams, so their hashes are just updated by records added in each frame.
+        status: finished
+        return: generator
+        raise: None
+    '''
+    from hashlib import sha1
+
+    config = sha1(frame_config_.encode()).digest()
+    records = [sha1() for stream in streams_]
+    plotted = [0] * len(streams_)
+    count_frame = create_frame_counter()
+
+    for frame in range(0, skj_std.arguments_values['frames']):
+        for i, count in enumerate(count_frame(frame)):
+            if count > plotted[i]:
+                for record in streams_[i]['lines'][plotted[i]:count]:
+                    records[i].update(record)
+                plotted[i] = count
+        yield frame, sha1(config + b''.join([r.digest() for r in records])).hexdigest()
+
+
+def load_cached_frames(cache_dir_, frame_config_, streams_, done_=None):
+    ''' Put every frame found in the frame cache to gnuplot temp dir, frames marked in done_ are already there
+        status: finished
+        return: bytearray, 1 for every frame loaded from the cache (or done)
+        raise: None
+    '''
+    import skj_cache
+    from os.path import join
+
+    cached = bytearray(done_) if done_ != None else bytearray(skj_std.arguments_values['frames'])
+    for frame, key in iter_frame_keys(frame_config_, streams_):
+        if not cached[frame]:
+            cached[frame] = skj_cache.load_frame(cache_dir_, key, \
+                                                 join(skj_std.temp_directories['gnuplot'], get_file_name(frame, "g")))
+
+    skj_std.print_msg_verbose(info_=skj_std.create_info_msg("cached frames used: " + str(sum(cached)) + "/" + \
+                                                            str(len(cached))))
+    return cached
+
+
+def store_drawn_frames(cache_dir_, frame_config_, streams_, cached_):
+    ''' Store every frame drawn by gnuplot (not loaded from the cache) to the frame cache,
+        then evict least recently used frames over arguments_values['cachesize'] MiB
+        status: finished
+        return: None
+        raise: None
+    '''
+    import skj_cache
+    from os.path import join
+
+    for frame, key in iter_frame_keys(frame_config_, streams_):
+        if not cached_[frame]:
+            skj_cache.store_frame(cache_dir_, key, join(skj_std.temp_directories['gnuplot'], get_file_name(frame, "g")))
+
+    skj_cache.evict_frames(cache_dir_, skj_std.arguments_values['cachesize'] * 1024 * 1024)
+
+
+def get_work_key(frame_config_, streams_):
+    ''' Get the key of frames in the work dir: hash of frame_config_, frame schedules and all the records
+        status: finished
+        return: str
+        raise: None
+    '''
+    from hashlib import sha1
+
+    key = sha1(frame_config_.encode())
+    key.update(repr([skj_std.arguments_values['animation_type'], skj_std.arguments_values['frames']] + \
+                    [(f['num_of_lines'], f['adding_seq'].numerator, f['adding_seq'].denominator) \
+                     for f in skj_std.arguments_values['source']]).encode())
+    for stream in streams_:
+        for record in stream['lines']:
+            key.update(record)
+        key.update(b"\0") # End of stream
+    return key.hexdigest()
+
+
+def is_frame_complete(path_):
+    ''' Check if frame path_ has been completely written: png files end with the IEND chunk
+        status: finished
+        return: bool
+        raise: None
+    '''
+    try:
+        with open(path_, mode="rb") as f:
+            f.seek(-12, 2)
+            return f.read() == b"\x00\x00\x00\x00IEND\xaeB`\x82"
+    except OSError: # Missing or shorter than 12 bytes
+        return False
+
+
+def find_done_frames(done_):
+    ''' Mark frames completely drawn into the work dir to done_ (frames already marked are not checked again)
+        status: finished
+        return: bytearray - done_
+        raise: None
+    '''
+    import os
+
+    try:
+        frames = [entry for entry in os.scandir(skj_std.temp_directories['gnuplot']) \
+                  if entry.name.startswith("g_") and entry.name.endswith(".png")]
+    except OSError:
+        return done_
+
+    for entry in frames:
+        try:
+            frame = int(entry.name[2:-4])
+        except ValueError: # Not ours
+            continue
+        if 0 <= frame < len(done_) and not done_[frame]:
+            done_[frame] = is_frame_complete(entry.path)
+    return done_
+
+
+def load_work_dir(work_key_):
+    ''' Find frames done by previous runs in the work dir when resuming (and their work key is work_key_),
+        otherwise delete all the frames and start over. Every frame is checked, not just those in the manifest,
+        as the run could have been killed before writing it.
+        status: finished
+        return: bytearray, 1 for every frame done
+        raise: None
+    '''
+    import json
+    import os
+
+    done = bytearray(skj_std.arguments_values['frames'])
+    manifest = None
+    if skj_std.arguments_values['resume']:
+        try:
+            with open(os.path.join(skj_std.temp_directories['gnuplot'], "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+
+    if not isinstance(manifest, dict) or manifest.get("key") != work_key_:
+        for entry in os.scandir(skj_std.temp_directories['gnuplot']):
+            if entry.name.startswith("g_") and entry.name.endswith(".png"):
+                os.remove(entry.path)
+        store_work_manifest(work_key_, done)
+        return done
+
+    find_done_frames(done)
+
+    skj_std.print_msg_verbose(info_=skj_std.create_info_msg("resumed frames: " + str(sum(done)) + "/" + \
+                                                            str(len(done))))
+    return done
+
+
+def store_work_manifest(work_key_, done_):
+    ''' Store manifest of the work dir: work_key_ and ranges of frames done
+        status: finished
+        return: None
+        raise: None
+    '''
+    import json
+    import os
+    import skj_cache
+
+    ranges = list()
+    for frame, frame_done in enumerate(done_):
+        if frame_done:
+            if ranges and ranges[-1][1] == frame:
+                ranges[-1][1] = frame + 1
+            else:
+                ranges.append([frame, frame + 1])
+
+    try:
+        skj_cache.write_cache_file(os.path.join(skj_std.temp_directories['gnuplot'], "manifest.json"), \
+                                   json.dumps({"version": __version__, "key": work_key_, \
+                                               "frames": len(done_), "done": ranges}).encode())
+    except OSError as exception_msg: # Next run just starts over
+        print(skj_std.create_error_msg("PYTHON", exception_msg), file=skj_std.get_job_stream("stdout"))
 
 
 def set_scheme_lines(color_):
@@ -258,6 +1108,20 @@ def set_scheme_lines(color_):
         i += 1 # First line in gnuplot has number 1
         yield 'set linetype ' + str(i) + 'lc rgb "' + color + '"\n'
 
+def get_frame_size():
+    ''' Get width && height of frames in pixels, it is set by size effect
+        status: finished
+        return: tuple
+        raise: None
+    '''
+    if skj_std.arguments_values['effectparams'] != skj_std.arguments_defaults['effectparams'] and \
+       "size" in skj_std.arguments_values['effectparams']:
+        resolutions = {"xga": (1024, 768), "hd": (1920, 1080)} # Make changes to skj_std too if editing
+        return resolutions[skj_std.arguments_values['effectparams']['size']]
+
+    return 640, 480 # Default size
+
+
 def configure_effects():
     ''' Set effects like background/line colors, animation size, etc
         status: finished
@@ -268,11 +1132,7 @@ def configure_effects():
     if skj_std.arguments_values['effectparams'] == skj_std.arguments_defaults['effectparams']:
         return terminal + '\n' # Default with no effect configured
 
-    if "size" in skj_std.arguments_values['effectparams']:
-        resolutions = {"xga": "1024,768", "hd": "1920,1080"} # Make changes to skj_std too if editing
-        resolution = ' size ' + resolutions[skj_std.arguments_values['effectparams']['size']] + ' '
-    else:
-        resolution = ' size 640,480 ' # Default size
+    resolution = ' size ' + ",".join([str(pixels) for pixels in get_frame_size()]) + ' '
 
     if "scheme" in skj_std.arguments_values['effectparams']:
         scheme = 'set border 15 lw 3 lc rgb "#FF0000"\n' # use red for axes, ..
@@ -292,13 +1152,22 @@ def configure_effects():
     
     return terminal + resolution + background + '\n' + scheme
 
-def draw_animation_frames():
-    ''' Confgure gnuplot and draw frames into temp dir 
+def draw_animation_frames(encoder_=None, job_=None):
+    ''' Confgure gnuplot and draw frames into temp dir or into encoder_ stdin if streaming,
+        frames are split among arguments_values['jobs'] gnuplots. Raster renderer draws them itself.
         status: finished
         return: None
         raise: ValueError, IndexError
     '''
-    import subprocess
+    from skj_progress import start_progress, end_progress
+
+    if job_ != None: # Run in job_ (in-process API, see skj_job), otherwise in the current job
+        return job_.run(draw_animation_frames, encoder_)
+
+    if skj_std.arguments_values['renderer'] == "raster": # Gnuplot is not needed at all
+        from skj_renderer_raster import draw_raster_frames
+        draw_raster_frames(encoder_) # raise ValueError, IndexError, OSError
+        return
 
     gnuplot_config = configure_effects()
     gnuplot_config += configure_xy_basics() # raise ValueError, IndexError
@@ -315,15 +1184,124 @@ def draw_animation_frames():
         for gnuplot_user_param in skj_std.arguments_values['gnuplotparams']:
             gnuplot_config += gnuplot_user_param + "\n"
 
-    with subprocess.Popen(["gnuplot"], stdin=subprocess.PIPE) as gnuplot:
-        gnuplot.stdin.write(gnuplot_config.encode())
-        file_name_gen = set_file_name("g")
-   
-        date = str(skj_std.arguments_values['source'][0]['date_column'])
-        data = str(skj_std.arguments_values['source'][0]['data_column'])
-        if skj_std.arguments_values['animation_type'] == "oneline":
-            create_frames_oneline(gnuplot, file_name_gen, date, data)
-        else:
-            create_frames_multiplot(gnuplot, file_name_gen, date, data)
+    if skj_std.arguments_values['workdir'] != None: # Frames are kept there, so the next run can resume
+        import os
+        skj_std.temp_directories['gnuplot'] = os.path.abspath(skj_std.arguments_values['workdir'])
+        try:
+            os.makedirs(skj_std.temp_directories['gnuplot'], exist_ok=True)
+        except OSError as exception_msg:
+            raise ValueError(skj_std.create_error_msg("PYTHON", exception_msg, False))
+    elif encoder_ == None: # Streamed frames never touch the disk
+        skj_std.create_temp_dir("gnuplot") # raise ValueError
+
+    streams = load_frame_streams()
+    date = str(skj_std.arguments_values['source'][0]['date_column'])
+    data = str(skj_std.arguments_values['source'][0]['data_column'])
+    if skj_std.arguments_values['epoch']: # Lines have just two columns
+        date, data = "1", "2"
+
+    # Frames drawn by previous runs are reused, streamed frames never touch the disk so they are not cached
+    cache_dir = cached = None
+    if encoder_ == None and not skj_std.arguments_values['nocache']:
+        import skj_cache
+        cache_dir = skj_cache.get_cache_dir("frames")
+    frame_config = gnuplot_config + date + ":" + data + "\n"
+
+    # Frames done by the previous run in the work dir are not drawn again, drawing starts at the first missing one
+    work_key = None
+    if skj_std.arguments_values['workdir'] != None:
+        work_key = get_work_key(frame_config, streams)
+        cached = load_work_dir(work_key)
+    if cache_dir != None:
+        cached = load_cached_frames(cache_dir, frame_config, streams, cached)
+
+    # Every gnuplot gets the same configuration and continuous range of frames to draw
+    frame_ranges = split_frames(skj_std.arguments_values['jobs'], cached)
+    start_progress("render", skj_std.arguments_values['frames'], sum(cached) if cached != None else 0)
+    drawn = False
+    try:
+        if len(frame_ranges) == 1:
+            output = encoder_.stdin if encoder_ != None else None
+            draw_frames(gnuplot_config, streams, frame_ranges[0][0], frame_ranges[0][1], date, data, output, cached)
+        elif frame_ranges:
+            draw_frames_parallel(gnuplot_config, streams, frame_ranges, date, data, encoder_, cached)
+        drawn = True
+    finally: # Even failed (or interrupted) run leaves checkpoint of the frames it has drawn
+        end_progress()
+        if work_key != None:
+            done = bytearray(b"\x01" * skj_std.arguments_values['frames']) if drawn else find_done_frames(cached)
+            store_work_manifest(work_key, done)
+
+    if cache_dir != None:
+        store_drawn_frames(cache_dir, frame_config, streams, cached)
+
+
+def draw_frames_parallel(gnuplot_config_, streams_, frame_ranges_, date_column_, data_column_, encoder_, skip_):
+    ''' Draw frame_ranges_ using one gnuplot for each range, frames go into temp dir or into encoder_ stdin
+        status: finished
+        return: None
+        raise: ValueError
+    '''
+    import os
+    from queue import Queue
+    from threading import Thread
+    failures = list()
+    # Frames of the later ranges wait for ffmpeg in memory, at most 64 chunks (of at most 64 KiB) of every range.
+    # Then gnuplot waits too, so a long animation is never kept in memory.
+    frames_queues = [Queue(maxsize=64) for frame_range in frame_ranges_]
+
+    def read_frames_job(pipe_, queue_):
+        for chunk in iter(lambda: os.read(pipe_, 65536), b''):
+            queue_.put(chunk)
+        queue_.put(None) # gnuplot has finished
+        os.close(pipe_)
+
+    def draw_frames_job(first_, last_, queue_):
+        # Exceptions are not propagated from threads, so store them for the main one
+        if encoder_ == None:
+            try:
+                draw_frames(gnuplot_config_, streams_, first_, last_, date_column_, data_column_, skip_=skip_)
+            except (OSError, ValueError, IndexError) as exception_msg:
+                failures.append(exception_msg)
+            return
+
+        # Streamed frames have to reach ffmpeg in order, so keep them until all the previous are passed on
+        try:
+            pipe_read, pipe_write = os.pipe()
+        except OSError as exception_msg:
+            failures.append(exception_msg)
+            queue_.put(None) # Nothing will be read from this job
+            return
+
+        Thread(target=read_frames_job, args=(pipe_read, queue_)).start()
+        try:
+            draw_frames(gnuplot_config_, streams_, first_, last_, date_column_, data_column_, pipe_write)
+        except (OSError, ValueError, IndexError) as exception_msg:
+            failures.append(exception_msg)
+        finally:
+            os.close(pipe_write)
+
+    jobs = [Thread(target=skj_std.bind_job(draw_frames_job), args=(frame_range[0], frame_range[1], frames_queue)) \
+            for frame_range, frames_queue in zip(frame_ranges_, frames_queues)]
+    for job in jobs:
+        job.start()
+    if encoder_ != None:
+        encoder = encoder_.stdin
+        for frames_queue in frames_queues:
+            for chunk in iter(frames_queue.get, None): # Drained even if ffmpeg has died, gnuplots wait for it
+                try:
+                    if encoder != None:
+                        encoder.write(chunk)
+                except OSError as exception_msg: # ffmpeg has died
+                    failures.append(exception_msg)
+                    encoder = None
+        try:
+            if encoder != None:
+                encoder.flush()
+        except OSError as exception_msg:
+            failures.append(exception_msg)
+    for job in jobs:
+        job.join()
 
-        gnuplot.stdin.write("quit\n".encode())
\ No newline at end of file
+    if failures:
+        raise ValueError(skj_std.create_error_msg("PYTHON", failures[0], False))
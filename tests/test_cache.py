@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+''' Frame cache && source properties cache (also kept in memory of the daemon), used by more jobs (threads) at once.
+    Run from the package directory: python -m pytest tests (or python -m unittest discover tests)
+'''
+
+# IMPORTS
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from threading import Lock
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import skj_std
+import skj_cache
+from skj_job import create_job
+
+
+class FrameCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.root, "frames")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def draw(self, name_, data_):
+        ''' Draw "frame" name_ with data_
+            return: str - its path
+        '''
+        path = os.path.join(self.root, name_)
+        with open(path, mode="wb") as f:
+            f.write(data_)
+        return path
+
+    def test_store_load(self):
+        key = "ab" + "0" * 38
+        self.assertFalse(skj_cache.load_frame(self.cache_dir, key, os.path.join(self.root, "missing.png")))
+        skj_cache.store_frame(self.cache_dir, key, self.draw("frame.png", b"frame"))
+        self.assertTrue(skj_cache.load_frame(self.cache_dir, key, os.path.join(self.root, "loaded.png")))
+        with open(os.path.join(self.root, "loaded.png"), mode="rb") as f:
+            self.assertEqual(f.read(), b"frame")
+
+    def test_store_concurrent(self): # Frames of one shard stored by more threads never get mixed up
+        keys = ["aa" + str(i).zfill(38) for i in range(0, 400)]
+        paths = [self.draw(key + ".png", key.encode()) for key in keys]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda key_, path_: skj_cache.store_frame(self.cache_dir, key_, path_), keys, paths))
+
+        for key in keys:
+            with open(skj_cache.get_frame_path(self.cache_dir, key), mode="rb") as f:
+                self.assertEqual(f.read(), key.encode())
+        self.assertEqual(sorted(os.listdir(os.path.join(self.cache_dir, "aa"))), sorted(key + ".png" for key in keys))
+
+
+class PropertiesCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.source = os.path.join(self.root, "source.data")
+        self.write(b"[2009/05/01 00:00:00] 1\n")
+        self.job = create_job(["--cache-dir", os.path.join(self.root, "cache"), self.source])
+
+    def tearDown(self):
+        skj_std.properties_memory = None
+        shutil.rmtree(self.root)
+
+    def write(self, data_):
+        ''' Write data_ to the source (it gets another mtime than it had)
+            return: None
+        '''
+        mtime = os.stat(self.source).st_mtime_ns if os.path.exists(self.source) else 0
+        with open(self.source, mode="wb") as f:
+            f.write(data_)
+        os.utime(self.source, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+    def test_store_load(self):
+        key, file_properties = self.job.run(skj_cache.load_file_properties, self.source, "%Y")
+        self.assertEqual(file_properties, None)
+        self.job.run(skj_cache.store_file_properties, key, {"num_of_lines": 1, "path": self.source})
+        self.assertEqual(self.job.run(skj_cache.load_file_properties, self.source, "%Y"),
+                         (key, {"num_of_lines": 1, "path": self.source}))
+        self.assertEqual(self.job.run(skj_cache.load_file_properties, self.source, "%H")[1], None) # Other format
+
+        self.write(b"[2009/05/01 00:00:00] 1\n[2009/05/01 01:00:00] 2\n")
+        self.assertEqual(self.job.run(skj_cache.load_file_properties, self.source, "%Y")[1], None)
+
+        self.job.arguments_values['nocache'] = True
+        self.assertEqual(self.job.run(skj_cache.load_file_properties, self.source, "%Y"), (None, None))
+
+    def test_memory(self): # Daemon keeps the properties, even when the cache file is gone
+        skj_std.properties_memory = {"properties": OrderedDict(), "lock": Lock()}
+        key = self.job.run(skj_cache.load_file_properties, self.source, "%Y")[0]
+        self.job.run(skj_cache.store_file_properties, key, {"num_of_lines": 1, "path": self.source})
+        shutil.rmtree(os.path.join(self.root, "cache"))
+        self.assertEqual(self.job.run(skj_cache.load_file_properties, self.source, "%Y"),
+                         (key, {"num_of_lines": 1, "path": self.source}))
+
+    def test_memory_concurrent(self): # Jobs (threads) of the daemon remember && forget properties at once
+        skj_std.properties_memory = {"properties": OrderedDict(), "lock": Lock()}
+        memory_records = skj_cache.memory_records
+        skj_cache.memory_records = 50
+
+        def remember(number_):
+            key = self.job.run(skj_cache.get_properties_key, self.source, number_) # Number is the time format
+            self.job.run(skj_cache.remember_file_properties, key, {"num_of_lines": 7, "number": number_})
+            found = 0
+            for other in range(max(0, number_ - 8), number_ + 1): # Recent ones, some of them are forgotten
+                remembered = self.job.run(skj_cache.load_file_properties, self.source, other)[1]
+                if remembered != None:
+                    self.assertEqual(remembered['number'], other)
+                    found += 1
+            return found
+
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                found = sum(executor.map(remember, range(0, 2000)))
+        finally:
+            skj_cache.memory_records = memory_records
+        self.assertGreater(found, 2000)
+        self.assertEqual(len(skj_std.properties_memory["properties"]), 50 // 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
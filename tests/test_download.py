@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+''' Downloads of URL sources: concurrent fetching, the conditional GET cache (ETag, Last-Modified) and ignored failures.
+    Run from the package directory: python -m pytest tests (or python -m unittest discover tests)
+'''
+
+# IMPORTS
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import skj_std
+from skj_job import create_job
+
+SOURCE = b"[2009/05/01 00:00:00] 1\n[2009/05/01 01:00:00] 2\n[2009/05/01 02:00:00] 3\n"
+
+
+class SourceHandler(SimpleHTTPRequestHandler):
+    ''' Serves files of the server's directory (validated by Last-Modified), /etag.data is validated by ETag only.
+        Status of every request is recorded in server.statuses.
+    '''
+
+    def do_GET(self):
+        if self.path != "/etag.data":
+            return SimpleHTTPRequestHandler.do_GET(self)
+        if self.headers.get("If-None-Match") == '"source"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"source"')
+        self.send_header("Content-Length", str(len(SOURCE)))
+        self.end_headers()
+        self.wfile.write(SOURCE)
+
+    def log_request(self, code='-', size='-'):
+        self.server.statuses.append((self.path, int(code)))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "www"))
+        with open(os.path.join(self.root, "www", "source.data"), mode="wb") as f:
+            f.write(SOURCE)
+
+        handler = lambda *args_: SourceHandler(*args_, directory=os.path.join(self.root, "www"))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.statuses = list()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = "http://127.0.0.1:" + str(self.server.server_address[1]) + "/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.root)
+
+    def download(self, urls_, *argv_):
+        ''' Download urls_ (scanned by counting their lines) in a new job with argv_, as a new run of the script would
+            return: tuple - result of download_urls(), downloaded_sources of the job
+        '''
+        job = create_job(["--cache-dir", os.path.join(self.root, "cache"), *argv_, *urls_])
+        try:
+            return job.run(skj_std.download_urls, urls_, lambda lines_: len(list(lines_))), job.downloaded_sources
+        finally:
+            job.close()
+
+    def test_cached(self):
+        for name in ["source.data", "etag.data"]:
+            urls = [self.url + name]
+            self.assertEqual(self.download(urls), (urls, {urls[0]: 3}))
+            self.assertEqual(self.download(urls), (urls, {urls[0]: 3})) # Scanned from the cache
+            self.assertEqual(self.server.statuses, [("/" + name, 200), ("/" + name, 304)])
+            self.server.statuses.clear()
+
+    def test_changed(self):
+        urls = [self.url + "source.data"]
+        self.download(urls)
+        with open(os.path.join(self.root, "www", "source.data"), mode="ab") as f:
+            f.write(b"[2009/05/01 03:00:00] 4\n")
+        os.utime(os.path.join(self.root, "www", "source.data"), (0, 2000000000)) # Surely newer than the cached one
+        self.assertEqual(self.download(urls), (urls, {urls[0]: 4}))
+        self.assertEqual([status for path, status in self.server.statuses], [200, 200])
+
+    def test_no_cache(self):
+        urls = [self.url + "etag.data"]
+        self.download(urls, "--no-cache")
+        self.download(urls, "--no-cache")
+        self.assertEqual([status for path, status in self.server.statuses], [200, 200])
+        self.assertEqual(os.listdir(os.path.join(self.root, "cache", "downloads")), [])
+
+    def test_failed_ignored(self):
+        urls = [self.url + "source.data", self.url + "missing.data", self.url + "etag.data"]
+        self.assertEqual(self.download(urls, "-E"), ([urls[0], None, urls[2]], {urls[0]: 3, urls[2]: 3}))
+
+    def test_failed(self):
+        with self.assertRaises(OSError):
+            self.download([self.url + "source.data", self.url + "missing.data"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+''' Frame schedules (records added in every frame) && splitting of frames into ranges of about the same cost.
+    Run from the package directory: python -m pytest tests (or python -m unittest discover tests)
+'''
+
+# IMPORTS
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skj_job import create_job
+from skj_animation import FrameSchedule
+from skj_subprocess_gnuplot import create_frame_counter, get_frame_cost, get_frames_cost, split_frames
+
+SCHEDULES = [(1, 1), (10, 1), (10, 3), (10, 0.3), (1000, 5.76), (997, 1 / 3), (5, 10), (12345, 7.25)]
+
+
+class FrameScheduleTest(unittest.TestCase):
+
+    def test_records(self):
+        for records, speed in SCHEDULES:
+            schedule = FrameSchedule(records, speed)
+            added = list(schedule)
+            self.assertEqual(len(added), len(schedule))
+            self.assertEqual(sum(added), records, (records, speed))
+            self.assertGreater(added[-1], 0) # Every frame adds a record, the last one too
+            self.assertEqual(schedule[-1], added[-1])
+            self.assertRaises(IndexError, schedule.__getitem__, len(schedule))
+            plotted = 0
+            for frame, frame_records in enumerate(added):
+                plotted += frame_records
+                self.assertEqual(schedule.plotted(frame), plotted)
+
+    def test_exact_speed(self): # Float speeds do not accumulate rounding errors
+        schedule = FrameSchedule(1000, 5.76)
+        self.assertEqual([schedule.plotted(frame) for frame in range(0, 173)],
+                         [(frame + 1) * 144 // 25 for frame in range(0, 173)])
+        self.assertEqual(FrameSchedule(144 * 1000, 5.76).plotted(24999), 144000)
+
+    def test_plotted_sum(self):
+        for records, speed in SCHEDULES:
+            schedule = FrameSchedule(records, speed)
+            plotted_sum = 0
+            for frames in range(0, len(schedule) + 1):
+                self.assertEqual(schedule.plotted_sum(frames), plotted_sum, (records, speed, frames))
+                plotted_sum += schedule.plotted(frames)
+
+
+class SplitFramesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.job = create_job(["source.data"])
+
+    def describe(self, animation_type_, schedules_):
+        ''' Describe animation of animation_type_ with sources of schedules_ to the job
+            return: None
+        '''
+        sources = [{"num_of_lines": records, "adding_seq": FrameSchedule(records, speed)} \
+                   for records, speed in schedules_]
+        if animation_type_ == "oneline":
+            frames = sum(len(source['adding_seq']) for source in sources)
+        else:
+            frames = max(len(source['adding_seq']) for source in sources)
+        self.job.arguments_values.update(animation_type=animation_type_, source=sources, frames=frames)
+
+    def get_costs(self):
+        ''' Get the cost of drawing every frame of the job, frame by frame
+            return: list of int
+        '''
+        count_frame = self.job.run(create_frame_counter)
+        return [get_frame_cost(count_frame(frame)) for frame in range(0, self.job.arguments_values['frames'])]
+
+    def check_ranges(self, ranges_, costs_, jobs_):
+        ''' Check ranges_ cover all frames with costs_ in order && every one costs about 1/jobs_ of them
+            return: None
+        '''
+        self.assertLessEqual(len(ranges_), jobs_)
+        self.assertEqual([first for first, last in ranges_], [0] + [last for first, last in ranges_[:-1]])
+        self.assertEqual(ranges_[-1][1], len(costs_))
+        for first, last in ranges_:
+            self.assertLess(first, last)
+            self.assertLessEqual(sum(costs_[first:last]), sum(costs_) / jobs_ + max(costs_[first:last]))
+
+    def test_frames_cost(self):
+        for animation_type in ["oneline", "multiplot"]:
+            self.describe(animation_type, [(100, 3), (37, 0.5), (250, 7.25)])
+            costs = self.get_costs()
+            for frames in range(0, len(costs) + 1):
+                self.assertEqual(self.job.run(get_frames_cost, frames), sum(costs[:frames]), (animation_type, frames))
+
+    def test_split(self):
+        for animation_type in ["oneline", "multiplot"]:
+            self.describe(animation_type, [(1000, 3), (370, 0.5), (2500, 7.25)])
+            costs = self.get_costs()
+            for jobs in [1, 2, 3, 8, 50]:
+                ranges = self.job.run(split_frames, jobs)
+                self.check_ranges(ranges, costs, jobs)
+            ranges = self.job.run(split_frames, 4) # Frames are cumulative, so the last ranges are shorter
+            self.assertGreater(ranges[0][1] - ranges[0][0], ranges[-1][1] - ranges[-1][0])
+
+    def test_split_skipped(self): # Skipped (cached) frames cost nothing
+        self.describe("multiplot", [(1000, 3)])
+        frames = self.job.arguments_values['frames']
+        skip = bytearray(frames)
+        skip[:frames // 2] = b"\x01" * (frames // 2)
+        costs = [0 if skipped else cost for skipped, cost in zip(skip, self.get_costs())]
+        ranges = self.job.run(split_frames, 4, skip)
+        self.check_ranges(ranges, costs, 4)
+        self.assertGreater(ranges[0][1], frames // 2)
+        self.assertEqual(self.job.run(split_frames, 4, bytearray(b"\x01" * frames)), list())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+''' Whole runs of the script (single animation, batch, resumed work dir, daemon && its client) with stub gnuplot
+    && ffmpeg.
+    Run from the package directory: python -m pytest tests (or python -m unittest discover tests)
+'''
+
+# IMPORTS
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import tempfile
+import subprocess
+import unittest
+
+PACKAGE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(PACKAGE, "examples", "real", "sin_week_real.data")
+TIME_FORMAT = "[%Y/%m/%d %H:%M:%S]"
+
+# Writes the smallest complete "png" for every plot (a big one to stdout if streamed) && logs its name, passes print
+# messages (warm gnuplot markers) to stderr
+GNUPLOT = r'''#!/usr/bin/env python3
+import os, re, sys
+if "-V" in sys.argv: # Every check is counted
+    open(os.path.join(os.path.dirname(__file__), "checks"), "a").write("gnuplot -V\n")
+    sys.exit(print("gnuplot stub"))
+output = None
+for line in sys.stdin.buffer:
+    found = re.match(rb"set output '(.*)'", line)
+    if found:
+        output = found.group(1)
+    elif line.startswith(b"print '"):
+        sys.stderr.write(line[7:].decode().rstrip().rstrip("'") + "\n")
+        sys.stderr.flush()
+    elif line.startswith(b"plot") and output != None:
+        open(output, "wb").write(b"\x00\x00\x00\x00IEND\xaeB`\x82")
+        open(os.path.join(os.path.dirname(__file__), "plots"), "a").write(os.path.basename(output).decode() + "\n")
+    elif line.startswith(b"plot"):
+        sys.stdout.buffer.write(b"frame".ljust(100000))
+'''
+
+# Writes the last argument (the animation), with frames from stdin if they are piped
+FFMPEG = r'''#!/usr/bin/env python3
+import sys
+if "-version" in sys.argv:
+    sys.exit(0)
+frames = sys.stdin.buffer.read() if "-" in sys.argv or "pipe:0" in sys.argv else b""
+open(sys.argv[-1], "wb").write(frames)
+'''
+
+
+class JobsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "bin"))
+        for name, script in [("gnuplot", GNUPLOT), ("ffmpeg", FFMPEG)]:
+            with open(os.path.join(self.root, "bin", name), mode="w") as f:
+                f.write(script)
+            os.chmod(os.path.join(self.root, "bin", name), 0o755)
+        self.env = dict(os.environ, PATH=os.path.join(self.root, "bin") + os.pathsep + os.environ["PATH"],
+                        XDG_CACHE_HOME=os.path.join(self.root, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def run_script(self, *argv_):
+        ''' Run the script (its __main__.py, as multiprocessing would import it again) with argv_ in the temp dir
+            return: subprocess.CompletedProcess
+        '''
+        return subprocess.run([sys.executable, os.path.join(PACKAGE, "__main__.py"), "-t", TIME_FORMAT, *argv_],
+                              cwd=self.root, env=self.env, capture_output=True, timeout=120)
+
+    def count_checks(self):
+        ''' Count how many times gnuplot has been checked (gnuplot -V)
+            return: int
+        '''
+        try:
+            with open(os.path.join(self.root, "bin", "checks")) as f:
+                return len(f.readlines())
+        except FileNotFoundError:
+            return 0
+
+    def count_plots(self):
+        ''' Count frames drawn by gnuplot (into files) since the last count
+            return: int
+        '''
+        try:
+            with open(os.path.join(self.root, "bin", "plots")) as f:
+                plots = len(f.readlines())
+        except FileNotFoundError:
+            return 0
+        os.remove(os.path.join(self.root, "bin", "plots"))
+        return plots
+
+    def test_jobs_profile(self): # Profile samples memory in a thread, so sources are scanned by a fork server
+        result = self.run_script("-n", "anim", "--no-cache", "-j", "2", "--profile", "profile.json", SOURCE)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertTrue(os.path.isfile(os.path.join(self.root, "anim", "anim.mp4")))
+        with open(os.path.join(self.root, "profile.json"), encoding="utf-8") as f:
+            stages = [stage["stage"] for stage in json.load(f)["stages"]]
+        self.assertIn("set_files_properties", stages)
+        self.assertIn("create_animation", stages)
+
+    def test_daemon_jobs(self): # Daemon runs jobs in threads, so sources are scanned by a fork server
+        socket = os.path.join(self.root, "socket")
+        daemon = subprocess.Popen([sys.executable, os.path.join(PACKAGE, "__main__.py"), "--daemon", socket,
+                                   "-j", "2"], cwd=self.root, env=self.env, stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT)
+        try:
+            for _ in range(100):
+                if os.path.exists(socket):
+                    break
+                time.sleep(0.1)
+            for name in ["first", "second"]: # The second one finds the fork server running
+                result = self.run_script("--connect", socket, "-n", name, "--no-cache", "-j", "2", SOURCE)
+                self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+                self.assertTrue(os.path.isfile(os.path.join(self.root, name, name + ".mp4")))
+        finally:
+            daemon.send_signal(signal.SIGTERM)
+            log = daemon.communicate(timeout=60)[0]
+        self.assertEqual(daemon.returncode, 0, log)
+        self.assertNotIn(b"already", log)
+        self.assertEqual(self.count_checks(), 1) # Only by the daemon itself, not by its jobs
+
+    def test_batch(self): # Every entry gets its own output dir, gnuplot is checked just once
+        with open(os.path.join(self.root, "manifest"), mode="w") as f:
+            f.write("Name week\nSource " + SOURCE + "\n\nName week\nSource " + SOURCE + "\nSpeed 3\n\n"
+                    "Name raster\nRenderer raster\nSource " + SOURCE + "\n")
+        result = self.run_script("--batch", "manifest", "--no-cache", "-j", "2")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        for output, name in [("week", "week"), ("week_0", "week"), ("raster", "raster")]:
+            self.assertTrue(os.path.isfile(os.path.join(self.root, output, name + ".mp4")))
+        self.assertEqual(self.count_checks(), 1)
+
+    def test_stream_jobs(self): # Frames of the later ranges wait for ffmpeg, none of them is lost
+        sizes = list()
+        for jobs in ["1", "3"]:
+            result = self.run_script("-n", "stream" + jobs, "--no-cache", "-s", "-j", jobs, SOURCE)
+            self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+            sizes.append(os.path.getsize(os.path.join(self.root, "stream" + jobs, "stream" + jobs + ".mp4")))
+        self.assertEqual(sizes[0], sizes[1])
+        self.assertGreater(sizes[0], 64 * 65536) # More than a queue can hold
+
+    def test_resume(self): # Only missing && incomplete frames are drawn again, all of them if options have changed
+        work_dir = os.path.join(self.root, "work")
+        result = self.run_script("-n", "first", "--no-cache", "--work-dir", "work", "-j", "2", SOURCE)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        frames = self.count_plots()
+        self.assertEqual(len([name for name in os.listdir(work_dir) if name.endswith(".png")]), frames)
+
+        for frame in range(10, 20):
+            os.remove(os.path.join(work_dir, "g_%03d.png" % frame))
+        open(os.path.join(work_dir, "g_%03d.png" % (frames - 1)), "wb").close() # Killed while writing it
+        result = self.run_script("-n", "second", "-v", "--no-cache", "--work-dir", "work", "--resume", "-j", "2",
+                                 SOURCE)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn(("resumed frames: " + str(frames - 11) + "/" + str(frames)).encode(), result.stdout)
+        self.assertEqual(self.count_plots(), 11)
+
+        result = self.run_script("-n", "third", "--no-cache", "--work-dir", "work", "--resume", "-e", "size=hd", SOURCE)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertEqual(self.count_plots(), frames)
+
+    def test_decimate(self): # Only points can be decimated, raw gnuplot params may plot lines
+        ranges = ["-x", "[2009/05/01 00:00:00]", "-X", "[2009/05/08 00:00:00]", "-y", "-2", "-Y", "2"]
+        result = self.run_script("-n", "points", "-v", "--no-cache", "--decimate", *ranges, SOURCE)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn(b"decimated records:", result.stdout)
+        result = self.run_script("-n", "lines", "-v", "--no-cache", "--decimate", *ranges, "-g", "set style data lines",
+                                 SOURCE)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn(b"records not decimated: raw gnuplot params", result.stdout)
+        result = self.run_script("-n", "auto", "-v", "--no-cache", "--decimate", SOURCE)
+        self.assertIn(b"records not decimated: x/y range is auto", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+''' Config file directives (also directives of batch manifest entries) get the values command line arguments would,
+    batch manifest is split into entries.
+    Run from the package directory: python -m pytest tests (or python -m unittest discover tests)
+'''
+
+# IMPORTS
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import skj_std
+from skj_job import create_job
+from skj_batch import read_manifest
+from skj_parser_cnffile import parse_directive_lines, parse_directives
+
+
+class DirectivesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def parse(self, *lines_):
+        ''' Parse directive lines_ in a job with default arguments
+            return: dict
+        '''
+        job = create_job(["source.data"], self.root)
+        return job.run(parse_directive_lines, [line + "\n" for line in lines_], skj_std.arguments_repeatable)
+
+    def create_job(self, *lines_):
+        ''' Create job with config file of lines_ (-f of it is the only argument besides the source), add its
+            directives to the arguments
+            return: skj_std.Job
+        '''
+        with open(os.path.join(self.root, "config"), mode="w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines_))
+        job = create_job(["-f", os.path.join(self.root, "config"), "source.data"], self.root)
+        parse_directives(job_=job)
+        return job
+
+    def test_values(self):
+        self.assertEqual(self.parse("Speed 2", "Jobs 3", "Name week # comment", "Progress machine"),
+                         {"speed": 2.0, "jobs": 3, "name": "week", "progress": "machine", "criticalvalue": list(),
+                          "gnuplotparams": list(), "effectparams": list()})
+        self.assertEqual(self.parse("GnuplotParams set grid", "GnuplotParams set key")["gnuplotparams"],
+                         ["set grid", "set key"])
+
+    def test_booleans(self):
+        for value, expected in [("true", True), ("Yes", True), ("on", True), ("1", True), ("false", False),
+                                ("no", False), ("OFF", False), ("0", False)]:
+            for directive in ["Incremental", "Stream", "Epoch", "Binary", "Decimate", "NoCache", "Resume"]:
+                self.assertIs(self.parse(directive + " " + value)[directive.lower()], expected, (directive, value))
+        self.assertRaises(ValueError, self.parse, "Decimate maybe")
+
+    def test_invalid(self):
+        for line in ["Unknown 1", "Jobs", "Jobs many", "Progress fancy", "Renderer svg"]:
+            self.assertRaises(ValueError, self.parse, line)
+
+    def test_config_file(self):
+        job = self.create_job("Decimate no", "Stream yes", "Jobs 2")
+        self.assertIs(job.arguments_values['decimate'], False)
+        self.assertIs(job.arguments_values['stream'], True)
+        self.assertEqual(job.arguments_values['jobs'], 2)
+        self.assertRaises(IOError, self.create_job, "Progress fancy")
+
+
+class ManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def read(self, manifest_):
+        ''' Read entries of manifest_ (text)
+            return: list of list
+        '''
+        with open(os.path.join(self.root, "manifest"), mode="w", encoding="utf-8") as f:
+            f.write(manifest_)
+        return read_manifest(os.path.join(self.root, "manifest"))
+
+    def test_entries(self):
+        self.assertEqual(self.read("Name a\nSource a.data\n\nName b\nSpeed 2\n"),
+                         [["Name a\n", "Source a.data\n"], ["Name b\n", "Speed 2\n"]])
+        self.assertEqual(self.read("\n\nName a\n \n\t\n\nName b"), [["Name a\n"], ["Name b"]])
+        self.assertEqual(self.read("# Only comments\n\nName a # first\n\n# Jobs 2\n  # skipped\n"),
+                         [["Name a # first\n"]])
+        self.assertEqual(self.read(""), list())
+
+    def test_missing(self):
+        self.assertRaises(IOError, read_manifest, os.path.join(self.root, "missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+''' Scanners of source files: the memory mapped one (also on byte ranges of the file, as scanning processes use it)
+    finds the same properties && records as the text one, also the same errors.
+    Run from the package directory: python -m pytest tests (or python -m unittest discover tests)
+'''
+
+# IMPORTS
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skj_job import create_job
+from skj_subprocess_gnuplot import read_source_lines, scan_lines, scan_mapped_range, get_source_ranges, \
+                                   merge_file_properties, set_file_properties
+
+PACKAGE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIME_FORMAT = "[%Y/%m/%d %H:%M:%S]"
+SOURCES = {"plain": b"[2009/05/01 00:00:00] 1\n[2009/05/01 01:00:00] -2.5\n[2009/05/01 02:00:00] 3e2\n",
+           "no_newline": b"[2009/05/01 00:00:00] 1\n[2009/05/01 01:00:00] 2",
+           "blank": b"\n  \n[2009/05/01 00:00:00] 1\n\t\n\n[2009/05/01 01:00:00] 2\n   \n",
+           "windows": b"[2009/05/01 00:00:00] 1\r\n[2009/05/01 01:00:00] 2\r\n",
+           "mac": b"[2009/05/01 00:00:00] 1\r[2009/05/01 01:00:00] 2\r",
+           "unicode": "[2009/05/01 00:00:00] 1\n\u00a0\u2003\n[2009/05/01 01:00:00] \u0662\n".encode(),
+           "padded": b"  [2009/05/01 00:00:00] 1  \n\t[2009/05/01 01:00:00] 2\t\n",
+           "unordered": b"[2009/05/03 00:00:00] 3\n[2009/05/01 00:00:00] 1\n[2009/05/02 00:00:00] 2\n",
+           "whitespace": b" \n\n\t\n"} # Empty sources are rejected by check_file(), they can not be mapped
+BAD_SOURCES = {"date": b"[2009/05/01 00:00:00] 1\n[2009/13/01 00:00:00] 2\n",
+               "data": b"[2009/05/01 00:00:00] 1\n[2009/05/01 01:00:00] x\n",
+               "nan": b"[2009/05/01 00:00:00] 1\n[2009/05/01 01:00:00] nan\n",
+               "utf": b"[2009/05/01 00:00:00] 1\n[2009/05/01 01:00:00] \xff\n"}
+
+
+def comparable(file_properties_):
+    ''' Turn records of file_properties_ into lists, so properties can be compared
+        return: dict / None
+    '''
+    if file_properties_ == None:
+        return None
+    records = file_properties_['records']
+    return dict(file_properties_, records={name: list(values) for name, values in records.items()})
+
+
+class ScannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.job = create_job(["-t", TIME_FORMAT, "source.data"], self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name_, data_):
+        ''' Write source name_ with data_
+            return: str - its path
+        '''
+        path = os.path.join(self.root, name_)
+        with open(path, mode="wb") as f:
+            f.write(data_)
+        return path
+
+    def scan(self, path_):
+        ''' Scan path_ by the text scanner, by the mapped one && by the mapped one in 1 ... 4 byte ranges
+            return: list of dict / None
+        '''
+        def scan_all():
+            size = os.path.getsize(path_)
+            scanned = [merge_file_properties(path_, [scan_lines(read_source_lines(path_), TIME_FORMAT)]),
+                       merge_file_properties(path_, [scan_mapped_range(path_, 0, size, TIME_FORMAT)])]
+            for ranges in range(1, 5):
+                scanned.append(merge_file_properties(path_, [scan_mapped_range(path_, start, end, TIME_FORMAT) \
+                                                             for start, end in get_source_ranges(path_, ranges)]))
+            return [comparable(file_properties) for file_properties in scanned]
+
+        return self.job.run(scan_all)
+
+    def test_same_properties(self):
+        for name, data in SOURCES.items():
+            scanned = self.scan(self.write(name, data))
+            for file_properties in scanned[1:]:
+                self.assertEqual(file_properties, scanned[0], name)
+
+        self.assertEqual(self.scan(self.write("plain", SOURCES["plain"]))[0]['records']['values'], [1.0, -2.5, 300.0])
+        self.assertEqual(self.scan(self.write("whitespace", SOURCES["whitespace"]))[0], None)
+
+    def test_same_errors(self):
+        for name, data in BAD_SOURCES.items():
+            path = self.write(name, data)
+            self.assertRaises(ValueError, self.job.run, scan_lines, read_source_lines(path), TIME_FORMAT)
+            self.assertRaises(ValueError, self.job.run, scan_mapped_range, path, 0, len(data), TIME_FORMAT)
+
+    def test_example_sources(self): # Big enough (>= 1 MiB) sources are mapped by set_file_properties()
+        path = os.path.join(PACKAGE, "examples", "real", "sin_week_real.data")
+        with open(path, mode="rb") as f:
+            data = f.read()
+        big = self.write("big.data", data * (1024 * 1024 // len(data) + 1))
+        expected = self.scan(big)[0]
+        self.assertEqual(comparable(set_file_properties(big, TIME_FORMAT, self.job)), expected)
+        self.assertEqual(self.scan(path)[1:], [self.scan(path)[0]] * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
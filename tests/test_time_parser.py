@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+''' Compiled time formats (see skj_checker_common.compile_time_format()) parse exactly as strptime does.
+    Run from the package directory: python -m pytest tests (or python -m unittest discover tests)
+'''
+
+# IMPORTS
+import os
+import sys
+import unittest
+from time import strptime, gmtime, strftime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skj_checker_common import compile_time_format
+
+FORMATS = ["[%Y/%m/%d %H:%M:%S]", "%Y-%m-%d %H:%M:%S", "%d.%m.%y %H:%M", "%H:%M:%S", "%Y%m%d%H%M%S",
+           "%y/%m/%d  %H", "[%Y/%m/%d %H:%M:%S] %%"]
+STRINGS = ["[2009/05/01 00:00:00]", "[2009/5/1 0:0:0]", "[2009/02/29 10:00:00]", "[2008/02/29 10:00:00]",
+           "[2009/13/01 00:00:00]", "[2009/05/01 24:00:00]", "[2009/05/01 00:00:61]", "[2009/05/01 00:00:00] ",
+           "2009-05-01 23:59:59", "2009-05-01  23:59:59", "01.05.09 12:30", "01.05.69 12:30", "01.05.68 12:30",
+           "29.02.00 00:00", "12:30:45", "25:00:00", "20090501123045", "09/05/01  7", "09/05/01 7", "",
+           "[2009/05/01 00:00:00] %", "abc", "[2009/05/01 00:00:00"]
+
+
+def parse(parser_, datetime_):
+    ''' Result of parser_, or type of exception it raises
+        return: time.struct_time / type
+    '''
+    try:
+        return parser_(datetime_)
+    except (ValueError, TypeError) as exception_msg:
+        return type(exception_msg)
+
+
+class TimeParserTest(unittest.TestCase):
+
+    def test_as_strptime(self):
+        for time_format in FORMATS:
+            text, binary = compile_time_format(time_format), compile_time_format(time_format, True)
+            for datetime in STRINGS:
+                expected = parse(lambda datetime_: strptime(datetime_, time_format), datetime)
+                self.assertEqual(parse(text, datetime), expected, (time_format, datetime))
+                self.assertEqual(parse(binary, datetime.encode()), expected, (time_format, datetime))
+                self.assertEqual(parse(binary, memoryview(datetime.encode())), expected, (time_format, datetime))
+
+    def test_not_text(self):
+        self.assertEqual(parse(compile_time_format("%Y"), 2009), TypeError)
+        self.assertEqual(parse(compile_time_format(None), "2009"), TypeError)
+
+    def test_shared_by_threads(self): # Date cache is cleared while the other threads are reading it
+        time_format = "[%Y/%m/%d %H:%M:%S]"
+        parser = compile_time_format(time_format, True)
+
+        def parse_days(first_):
+            for day in range(first_, first_ + 40000):
+                datetime = strftime(time_format, gmtime(day * 86400 - 62135596800 + 3600)) # Day since year 1
+                if parser(datetime.encode()) != strptime(datetime, time_format):
+                    return datetime
+            return None
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6) # Threads are switched even between a lookup and a read of dates
+        try: # Years > 999, strftime does not pad the others, more than 65536 dates, so dates are cleared
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                self.assertEqual(list(executor.map(parse_days, [400000, 500000, 600000, 700000])), [None] * 4)
+        finally:
+            sys.setswitchinterval(interval)
+
+
+if __name__ == "__main__":
+    unittest.main()